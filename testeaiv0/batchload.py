@@ -0,0 +1,43 @@
+from collections import defaultdict
+
+from sqlalchemy.orm import object_session
+from sqlalchemy.orm.attributes import set_committed_value
+
+
+def batch_load(objects, relationship, options=()):
+    """Carregar um relacionamento para vários objetos com uma única consulta.
+
+    Busca as linhas relacionadas com um IN pelas chaves e preenche o
+    atributo de cada objeto sem disparar o lazy load. Retorna a lista de
+    objetos relacionados (sem repetição), para encadear o próximo nível.
+    options vai para a consulta (ex.: load_only só com as colunas usadas).
+    """
+    objects = [obj for obj in objects if obj is not None]
+    if not objects:
+        return []
+
+    prop = relationship.property
+    target = prop.mapper.class_
+    (local_column, remote_column), = prop.local_remote_pairs
+    local_key = prop.parent.get_property_by_column(local_column).key
+    remote_key = prop.mapper.get_property_by_column(remote_column).key
+
+    keys = {getattr(obj, local_key) for obj in objects} - {None}
+    related = []
+    if keys:
+        related = object_session(objects[0]).query(target).options(*options).filter(
+            getattr(target, remote_key).in_(keys)
+        ).order_by(*prop.mapper.primary_key).all()
+
+    if prop.uselist:
+        grouped = defaultdict(list)
+        for row in related:
+            grouped[getattr(row, remote_key)].append(row)
+        for obj in objects:
+            set_committed_value(obj, prop.key, grouped.get(getattr(obj, local_key), []))
+    else:
+        by_key = {getattr(row, remote_key): row for row in related}
+        for obj in objects:
+            set_committed_value(obj, prop.key, by_key.get(getattr(obj, local_key)))
+
+    return related
@@ -0,0 +1,275 @@
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlalchemy import update
+
+
+class CartLine:
+    """Linha do carrinho fora do SQL (mesmos atributos usados do CartItem)"""
+
+    def __init__(self, id, product_id, quantity, size, added_at):
+        self.id = id
+        self.product_id = product_id
+        self.quantity = quantity
+        self.size = size
+        self.added_at = added_at
+
+    def to_json(self):
+        return {
+            'id': self.id,
+            'product_id': self.product_id,
+            'quantity': self.quantity,
+            'size': self.size,
+            'added_at': self.added_at.isoformat()
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data['id'], data['product_id'], data['quantity'], data['size'],
+                   datetime.fromisoformat(data['added_at']))
+
+
+class SqlCartStore:
+    """Carrinho na tabela cart_items (participa da transação da sessão; quem chama faz o commit)"""
+
+    shares_transaction = True
+
+    def __init__(self, db, model):
+        self.db = db
+        self.model = model
+
+    def lines(self, user_id):
+        return self.model.query.filter_by(user_id=user_id).order_by(self.model.id).all()
+
+    def apply(self, user_id, adds=(), updates=None, removes=()):
+        """Remover, atualizar quantidades e somar/criar linhas, nessa ordem"""
+        items = {item.id: item for item in self.lines(user_id)}
+
+        for item_id in removes:
+            if item_id in items:
+                self.db.session.delete(items.pop(item_id))
+
+        for item_id, quantity in (updates or {}).items():
+            if item_id in items:
+                items[item_id].quantity = quantity
+
+        by_key = {(item.product_id, item.size): item for item in items.values()}
+        for product_id, quantity, size in adds:
+            if (product_id, size) in by_key:
+                by_key[(product_id, size)].quantity += quantity
+            else:
+                item = self.model(user_id=user_id, product_id=product_id, quantity=quantity, size=size)
+                self.db.session.add(item)
+                by_key[(product_id, size)] = item
+
+    def clear(self, user_id):
+        self.model.query.filter_by(user_id=user_id).delete()
+
+    @contextmanager
+    def checkout_lock(self, user_id):
+        # As linhas do pedido saem na mesma transação (remove_ordered): a trava é a das próprias linhas
+        yield True
+
+    def remove_ordered(self, user_id, lines):
+        """Descontar do carrinho as quantidades do pedido; False se outra transação já as levou.
+
+        UPDATE condicional por linha: um fechamento simultâneo do mesmo carrinho
+        espera a trava da linha e, depois do commit do primeiro, não acha mais
+        a quantidade. O que foi somado depois da leitura continua no carrinho.
+        """
+        table = self.model.__table__
+        for line in lines:
+            result = self.db.session.execute(
+                update(table)
+                .where(table.c.id == line.id, table.c.user_id == user_id, table.c.quantity >= line.quantity)
+                .values(quantity=table.c.quantity - line.quantity)
+            )
+            if result.rowcount != 1:
+                return False
+        self.db.session.execute(table.delete().where(table.c.user_id == user_id, table.c.quantity <= 0))
+        return True
+
+
+class KeyValueCartStore:
+    """Carrinho num armazenamento chave-valor: um documento JSON por usuário.
+
+    Fica fora do banco principal; só vira linhas SQL no fechamento do pedido.
+    """
+
+    shares_transaction = False
+
+    def __init__(self, backend, ttl=30 * 24 * 3600, lock_ttl=30):
+        self.backend = backend
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl  # segundos; libera a trava se o processo morrer no meio do pedido
+
+    @staticmethod
+    def _key(user_id):
+        return f'cart:{user_id}'
+
+    def lines(self, user_id):
+        raw = self.backend.get(self._key(user_id))
+        if raw is None:
+            return []
+        return [CartLine.from_json(line) for line in json.loads(raw)['lines']]
+
+    def apply(self, user_id, adds=(), updates=None, removes=()):
+        """Remover, atualizar quantidades e somar/criar linhas, nessa ordem (atômico por carrinho)"""
+
+        def mutate(raw):
+            cart = json.loads(raw) if raw is not None else {'next_id': 1, 'lines': []}
+            lines = [line for line in cart['lines'] if line['id'] not in set(removes)]
+
+            for line in lines:
+                if line['id'] in (updates or {}):
+                    line['quantity'] = updates[line['id']]
+
+            by_key = {(line['product_id'], line['size']): line for line in lines}
+            for product_id, quantity, size in adds:
+                if (product_id, size) in by_key:
+                    by_key[(product_id, size)]['quantity'] += quantity
+                else:
+                    line = CartLine(cart['next_id'], product_id, quantity, size, datetime.utcnow()).to_json()
+                    cart['next_id'] += 1
+                    lines.append(line)
+                    by_key[(product_id, size)] = line
+
+            cart['lines'] = lines
+            return json.dumps(cart)
+
+        self.backend.update(self._key(user_id), mutate, self.ttl)
+
+    def clear(self, user_id):
+        # Mantém o contador de ids, para um item antigo nunca apontar para um novo
+        self.backend.update(
+            self._key(user_id),
+            lambda raw: json.dumps(dict(json.loads(raw), lines=[])) if raw is not None else None,
+            self.ttl
+        )
+
+    @contextmanager
+    def checkout_lock(self, user_id):
+        """Um fechamento de pedido por carrinho: rende False se outro já está em andamento"""
+        key, token = f'cart-checkout:{user_id}', uuid.uuid4().hex
+        acquired = []
+
+        def acquire(raw):
+            if raw is None:
+                acquired.append(True)
+                return token
+            return None  # já travado: não escreve
+
+        self.backend.update(key, acquire, self.lock_ttl)
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired:
+                self.backend.delete_if(key, token)
+
+    def remove_ordered(self, user_id, lines):
+        """Descontar do carrinho as quantidades do pedido (linhas e somas feitas depois ficam)"""
+        ordered = {line.id: line.quantity for line in lines}
+
+        def mutate(raw):
+            if raw is None:
+                return None
+            cart = json.loads(raw)
+            remaining = []
+            for line in cart['lines']:
+                line['quantity'] -= ordered.get(line['id'], 0)
+                if line['quantity'] > 0:
+                    remaining.append(line)
+            cart['lines'] = remaining
+            return json.dumps(cart)
+
+        self.backend.update(self._key(user_id), mutate, self.ttl)
+        return True
+
+
+class MemoryKVBackend:
+    """Chave-valor em memória do processo (testes e desenvolvimento)"""
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= self.clock():
+                return None
+            return entry[0]
+
+    def update(self, key, mutate, ttl):
+        with self._lock:
+            entry = self._data.get(key)
+            current = entry[0] if entry is not None and entry[1] > self.clock() else None
+            value = mutate(current)
+            if value is not None:
+                self._data[key] = (value, self.clock() + ttl)
+
+    def delete_if(self, key, expected):
+        """Apagar a chave só se ela ainda tem o valor esperado"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] == expected:
+                del self._data[key]
+
+
+class RedisKVBackend:
+    """Chave-valor compatível com o protocolo Redis, compartilhado entre workers"""
+
+    def __init__(self, url):
+        import redis  # dependência opcional, só necessária com CART_STORE_BACKEND=redis
+        self.redis = redis
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        value = self.client.get(key)
+        return value.decode() if value is not None else None
+
+    def update(self, key, mutate, ttl):
+        # Otimista: WATCH/MULTI e repete se outro worker alterou a chave no meio
+        with self.client.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    current = pipe.get(key)
+                    value = mutate(current.decode() if current is not None else None)
+                    pipe.multi()
+                    if value is not None:
+                        pipe.set(key, value, ex=ttl)
+                    pipe.execute()
+                    return
+                except self.redis.WatchError:
+                    continue
+
+    def delete_if(self, key, expected):
+        """Apagar a chave só se ela ainda tem o valor esperado"""
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                current = pipe.get(key)
+                if current is None or current.decode() != expected:
+                    return
+                pipe.multi()
+                pipe.delete(key)
+                pipe.execute()
+            except self.redis.WatchError:
+                pass  # a chave mudou: já não é a nossa trava
+
+
+def cart_store_from_config(config, db, model):
+    backend = config.get('CART_STORE_BACKEND', 'sql')
+    if backend == 'sql':
+        return SqlCartStore(db, model)
+    if backend == 'memory':
+        return KeyValueCartStore(MemoryKVBackend(), ttl=config.get('CART_STORE_TTL', 30 * 24 * 3600))
+    if backend == 'redis':
+        return KeyValueCartStore(RedisKVBackend(config['CART_STORE_URL']), ttl=config.get('CART_STORE_TTL', 30 * 24 * 3600))
+    raise ValueError(f'CART_STORE_BACKEND desconhecido: {backend}')
@@ -0,0 +1,309 @@
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from jsonprovider import json_default
+
+# Por quanto tempo os ids de cada geração de produtos ficam disponíveis para
+# a busca dos workers; quem passar disso sem sincronizar reconstrói o índice
+CHANGE_LOG_TTL = 3600
+
+
+class LocalCacheBackend:
+    """Backend em memória do processo, com despejo LRU e TTL por entrada"""
+
+    shared = False
+
+    def __init__(self, maxsize=1024, clock=time.monotonic):
+        self.epoch = uuid.uuid4().hex[:8]  # distingue os contadores de cada processo
+        self.maxsize = maxsize
+        self.clock = clock
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= self.clock():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, self.clock() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get_counter(self, key):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def incr(self, key):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def set_counter(self, key, value):
+        with self._lock:
+            self._counters[key] = value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._counters.clear()
+
+
+class RedisCacheBackend:
+    """Backend compartilhado entre workers (protocolo Redis)"""
+
+    shared = True
+
+    def __init__(self, url):
+        import redis  # dependência opcional, só necessária com CATALOG_CACHE_BACKEND=redis
+        self.client = redis.Redis.from_url(url)
+        self.evictions = 0  # o Redis faz o próprio despejo (maxmemory-policy)
+
+    def get(self, key):
+        value = self.client.get(key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(key, json.dumps(value, default=json_default), ex=max(int(ttl), 1))
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def get_counter(self, key):
+        return int(self.client.get(key) or 0)
+
+    def incr(self, key):
+        return self.client.incr(key)
+
+    def set_counter(self, key, value):
+        self.client.set(key, value)
+
+    def clear(self):
+        self.client.flushdb()
+
+
+def cache_backend(kind, url=None, maxsize=1024):
+    if kind == 'redis':
+        return RedisCacheBackend(url)
+    return LocalCacheBackend(maxsize=maxsize)
+
+
+class ReadThroughCache:
+    """Cache read-through genérico com contadores de acerto/erro"""
+
+    def __init__(self, backend, ttl=60, enabled=True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.started = int(time.time())
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, key, loader, guard=None):
+        """Buscar no cache ou carregar (e guardar) o valor; None não é guardado.
+
+        guard devolve o contador que a invalidação da chave incrementa: se ele
+        mudar durante a carga, o valor gravado pode ser anterior à escrita e é
+        descartado.
+        """
+        if not self.enabled:
+            return loader()
+
+        value = self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        generation = guard() if guard else None
+        value = loader()
+        if value is not None:
+            self.backend.set(key, value, self.ttl)
+            if guard and guard() != generation:
+                self.backend.delete(key)
+        return value
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.backend.evictions,
+            'ttl': self.ttl
+        }
+
+
+class CatalogCache(ReadThroughCache):
+    """Cache read-through das respostas do catálogo.
+
+    As listagens e as categorias são versionadas por contadores de geração:
+    invalidar uma escrita só incrementa a geração, sem varrer as chaves.
+    """
+
+    @classmethod
+    def from_config(cls, config):
+        backend = cache_backend(
+            config.get('CATALOG_CACHE_BACKEND'),
+            url=config.get('CATALOG_CACHE_URL'),
+            maxsize=config.get('CATALOG_CACHE_MAXSIZE', 1024)
+        )
+        return cls(
+            backend,
+            ttl=config.get('CATALOG_CACHE_TTL', 60),
+            enabled=config.get('CATALOG_CACHE_ENABLED', True)
+        )
+
+    def _generation(self, name):
+        return self.backend.get_counter(f'catalog:gen:{name}')
+
+    def generations(self):
+        """(produtos, categorias): mudam a cada escrita no catálogo, em todos os workers quando o backend é compartilhado"""
+        return self._generation('products'), self._generation('categories')
+
+    def changes(self, since, until):
+        """Ids dos produtos invalidados nas gerações (since, until]; None se algum registro já expirou"""
+        product_ids = set()
+        for generation in range(since + 1, until + 1):
+            changed = self.backend.get(f'catalog:changes:{generation}')
+            if changed is None:
+                return None
+            product_ids.update(changed)
+        return product_ids
+
+    def product_key(self, product_id):
+        return f"catalog:product:{self._generation('categories')}:{product_id}"
+
+    def get_product(self, product_id, loader):
+        """Detalhe do produto; a chave é apagada na escrita, então a carga é conferida contra a geração"""
+        return self.get_or_load(self.product_key(product_id), loader, guard=lambda: self._generation('products'))
+
+    def products_key(self, filters):
+        generation = f"{self._generation('products')}:{self._generation('categories')}"
+        return f'catalog:products:{generation}:{json.dumps(filters)}'
+
+    def categories_key(self):
+        return f"catalog:categories:{self._generation('categories')}"
+
+    def version(self, scope='products'):
+        """Versão do catálogo para ETags: muda a cada escrita que afeta o escopo"""
+        if scope == 'categories':
+            version = str(self._generation('categories'))
+        else:
+            version = f"{self._generation('products')}:{self._generation('categories')}"
+        if not self.backend.shared:
+            # Contadores locais não veem escritas de outros workers: a validade
+            # fica limitada ao TTL, como a do próprio cache
+            version += f':{self.backend.epoch}:{int(time.time() // self._window())}'
+        return version
+
+    def last_modified(self):
+        """Momento (epoch) da última escrita no catálogo"""
+        modified = self.backend.get_counter('catalog:modified') or self.started
+        if not self.backend.shared:
+            window = self._window()
+            modified = max(modified, int(time.time() // window * window))
+        return modified
+
+    def _window(self):
+        # CATALOG_CACHE_TTL=0 (sem cache) ainda precisa de uma janela para as versões locais
+        return max(self.ttl, 1)
+
+    def _touch(self):
+        self.backend.set_counter('catalog:modified', int(time.time()))
+
+    def invalidate_products(self, product_ids):
+        # Incrementar antes de apagar: uma carga em andamento ou vê a nova
+        # geração e descarta o que gravou, ou grava antes da remoção
+        generation = self.backend.incr('catalog:gen:products')
+        self.backend.set(f'catalog:changes:{generation}', sorted(product_ids), CHANGE_LOG_TTL)
+        for product_id in product_ids:
+            self.backend.delete(self.product_key(product_id))
+        self._touch()
+
+    def invalidate_categories(self):
+        # Os produtos embutem a categoria, então tudo muda de geração
+        self.backend.incr('catalog:gen:categories')
+        self._touch()
+
+    def watch(self, product_model, category_model, variant_model=None):
+        """Invalidar as entradas afetadas quando uma transação com escritas no catálogo for confirmada"""
+
+        def invalidate(product_ids, categories):
+            if categories:
+                self.invalidate_categories()
+            self.invalidate_products(product_ids)
+
+        watch_catalog(product_model, category_model, invalidate, variant_model)
+
+
+def _dirty_key(model):
+    return f'dirty:{model.__tablename__}'
+
+
+def mark_dirty(session, model, ids):
+    """Registrar escritas feitas fora do ORM (UPDATE em massa) para os callbacks de commit"""
+    session.info.setdefault(_dirty_key(model), set()).update(ids)
+
+
+def watch_commits(model, callback, id_of=lambda obj: obj.id):
+    """Chamar callback(ids) após cada commit que altera linhas do modelo.
+
+    id_of escolhe o id repassado: o da própria linha ou, numa tabela filha,
+    o do registro pai que ela altera.
+    """
+    key = _dirty_key(model)
+
+    def collect(session, flush_context):
+        for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+            if isinstance(obj, model) and id_of(obj) is not None:
+                session.info.setdefault(key, set()).add(id_of(obj))
+
+    def after_commit(session):
+        ids = session.info.get(key)
+        if ids:
+            callback(set(ids))
+
+    def after_transaction_end(session, transaction):
+        # Roda depois de todos os after_commit (e também em rollbacks)
+        if transaction.parent is None:
+            session.info.pop(key, None)
+
+    event.listen(Session, 'after_flush', collect)
+    event.listen(Session, 'after_commit', after_commit)
+    event.listen(Session, 'after_transaction_end', after_transaction_end)
+
+
+def watch_catalog(product_model, category_model, callback, variant_model=None):
+    """Chamar callback(product_ids, categories) após cada commit que altera o catálogo"""
+    watch_commits(product_model, lambda product_ids: callback(product_ids, False))
+    if variant_model is not None:
+        # Estoque por tamanho faz parte do produto: a variante invalida o produto dono
+        watch_commits(variant_model, lambda product_ids: callback(product_ids, False), lambda obj: obj.product_id)
+    watch_commits(category_model, lambda category_ids: callback(set(), True))
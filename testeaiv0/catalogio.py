@@ -0,0 +1,336 @@
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import DBAPIError
+
+# Colunas do arquivo, na ordem da exportação (a importação aceita qualquer ordem)
+FIELDS = ('sku', 'name', 'description', 'price', 'category', 'brand', 'color', 'image_url', 'is_active', 'stock_quantity', 'sizes')
+FORMATS = ('csv', 'ndjson')
+MAX_PRICE = Decimal('100000000')  # Numeric(10, 2)
+TRUE_VALUES = ('1', 'true', 'sim', 'yes')
+FALSE_VALUES = ('0', 'false', 'nao', 'não', 'no')
+
+
+class RowError(ValueError):
+    """Linha inválida; a importação registra e segue para a próxima"""
+
+
+def detect_format(filename=None, content_type=None, default='csv'):
+    """Formato pela extensão do arquivo ou pelo Content-Type"""
+    for source in (filename or '', content_type or ''):
+        source = source.lower()
+        if source.endswith(('.ndjson', '.jsonl')) or 'ndjson' in source or 'jsonl' in source:
+            return 'ndjson'
+        if source.endswith('.csv') or 'csv' in source:
+            return 'csv'
+    return default
+
+
+def read_rows(stream, fmt):
+    """Ler o arquivo linha a linha: gera (número da linha, dict ou None, erro ou None)"""
+    if fmt not in FORMATS:
+        raise ValueError(f'format deve ser um de: {", ".join(FORMATS)}')
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='' if fmt == 'csv' else None)
+    try:
+        if fmt == 'csv':
+            reader = csv.DictReader(text)
+            for row in reader:
+                yield reader.line_num, row, None
+            return
+        for number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as error:
+                yield number, None, f'JSON inválido: {error}'
+                continue
+            if not isinstance(row, dict):
+                yield number, None, 'cada linha deve ser um objeto JSON'
+                continue
+            yield number, row, None
+    finally:
+        text.detach()  # quem abriu o stream é quem fecha
+
+
+def parse_sizes(value):
+    """Tamanhos e estoque: {"38": 10} ou "38:10;39:5" (sem ":" o estoque é 0)"""
+    if value in (None, ''):
+        return None
+    if isinstance(value, dict):
+        items = value.items()
+    else:
+        items = [part.split(':', 1) if ':' in part else (part, 0) for part in str(value).split(';') if part.strip()]
+    sizes = {}
+    for size, stock in items:
+        size = str(size).strip()
+        try:
+            stock = int(stock)
+        except (TypeError, ValueError):
+            raise RowError(f'estoque inválido para o tamanho {size}: {stock}')
+        if not size or len(size) > 10 or stock < 0:
+            raise RowError(f'tamanho inválido: {size}:{stock}')
+        sizes[size] = stock
+    return sizes
+
+
+def format_sizes(sizes, fmt):
+    if fmt == 'ndjson':
+        return sizes
+    return ';'.join(f'{size}:{stock}' for size, stock in sizes.items())
+
+
+def validate(row, categories):
+    """Converter uma linha do arquivo em (valores de products, tamanhos); categories é {slug: id}"""
+    def text(name, limit=None, required=False):
+        value = row.get(name)
+        value = None if value is None else str(value).strip()
+        if required and not value:
+            raise RowError(f'{name} é obrigatório')
+        if value and limit and len(value) > limit:
+            raise RowError(f'{name} passa de {limit} caracteres')
+        return value or None
+
+    sku = text('sku', 64, required=True)
+    try:
+        price = Decimal(str(row.get('price', '')).strip().replace(',', '.'))
+    except InvalidOperation:
+        raise RowError(f"price inválido: {row.get('price')}")
+    if not price.is_finite() or price < 0 or price >= MAX_PRICE:
+        raise RowError(f"price inválido: {row.get('price')}")
+
+    category = text('category', required=True)
+    if category not in categories:
+        raise RowError(f'categoria desconhecida: {category}')
+
+    active = row.get('is_active', True)
+    if not isinstance(active, bool):
+        active = str(active).strip().lower()
+        if active in ('',) + TRUE_VALUES:
+            active = True
+        elif active in FALSE_VALUES:
+            active = False
+        else:
+            raise RowError(f"is_active inválido: {row.get('is_active')}")
+
+    sizes = parse_sizes(row.get('sizes'))
+    if sizes is not None:
+        stock = sum(sizes.values())
+    else:
+        try:
+            stock = int(row.get('stock_quantity') or 0)
+        except (TypeError, ValueError):
+            raise RowError(f"stock_quantity inválido: {row.get('stock_quantity')}")
+        if stock < 0:
+            raise RowError(f'stock_quantity inválido: {stock}')
+
+    values = {
+        'sku': sku,
+        'name': text('name', 100, required=True),
+        'description': text('description'),
+        'price': price.quantize(Decimal('0.01')),
+        'category_id': categories.get(category),
+        'brand': text('brand', 50),
+        'color': text('color', 50),
+        'image_url': text('image_url', 255),
+        'is_active': active,
+        'stock_quantity': stock,
+    }
+    if sizes is not None:
+        values['size_available'] = json.dumps(list(sizes))
+        if len(values['size_available']) > 100:
+            raise RowError('tamanhos demais para size_available')
+    return values, sizes
+
+
+def bulk_upsert(conn, table, rows, keys, update_columns):
+    """INSERT de várias linhas de uma vez; se a chave única já existe, atualiza update_columns"""
+    if not rows:
+        return
+    if conn.dialect.name == 'mysql':
+        statement = mysql_insert(table).values(rows)
+        conn.execute(statement.on_duplicate_key_update({column: statement.inserted[column] for column in update_columns}))
+    elif conn.dialect.name == 'sqlite':
+        statement = sqlite_insert(table).values(rows)
+        conn.execute(statement.on_conflict_do_update(
+            index_elements=list(keys), set_={column: statement.excluded[column] for column in update_columns}
+        ))
+    else:
+        # Outros bancos: executemany de UPDATE para as chaves existentes e de INSERT para o resto
+        existing = set(conn.execute(
+            select(*(table.c[key] for key in keys)).where(table.c[keys[0]].in_({row[keys[0]] for row in rows}))
+        ).all())
+        updates = [row for row in rows if tuple(row[key] for key in keys) in existing]
+        inserts = [row for row in rows if tuple(row[key] for key in keys) not in existing]
+        if updates:
+            conn.execute(
+                table.update()
+                .where(*(table.c[key] == bindparam(f'key_{key}') for key in keys))
+                .values({column: bindparam(f'new_{column}') for column in update_columns}),
+                [dict({f'key_{key}': row[key] for key in keys}, **{f'new_{column}': row[column] for column in update_columns})
+                 for row in updates]
+            )
+        if inserts:
+            conn.execute(table.insert(), inserts)
+
+
+class CatalogImporter:
+    """Importação do catálogo em blocos: cada bloco é validado e gravado com um upsert em massa.
+
+    Linhas inválidas entram no relatório e não interrompem a importação.
+    Se o banco recusar o bloco, ele é regravado linha a linha para achar
+    as culpadas. O SKU identifica o produto; os tamanhos de uma linha
+    substituem o estoque por tamanho do produto (tamanhos que não vieram
+    ficam com estoque 0). on_chunk(conn, created_ids, updated_ids) roda na
+    transação de cada bloco.
+    """
+
+    def __init__(self, product_table, variant_table, category_table, chunk_size=1000, max_errors=1000, on_chunk=None):
+        self.products = product_table
+        self.variants = variant_table
+        self.categories = category_table
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.on_chunk = on_chunk
+
+    def run(self, engine, rows):
+        """Importar as linhas de read_rows(); retorna o relatório"""
+        with engine.connect() as conn:
+            categories = dict(conn.execute(select(self.categories.c.slug, self.categories.c.id)).all())
+        report = {'rows': 0, 'created': 0, 'updated': 0, 'failed': 0, 'errors': []}
+        chunk = {}
+        for number, row, error in rows:
+            report['rows'] += 1
+            if error is None:
+                try:
+                    values, sizes = validate(row, categories)
+                except RowError as invalid:
+                    error = str(invalid)
+            if error is not None:
+                self._error(report, number, (row or {}).get('sku'), error)
+                continue
+            chunk.pop(values['sku'], None)  # SKU repetido: vale a última linha
+            chunk[values['sku']] = (number, values, sizes)
+            if len(chunk) >= self.chunk_size:
+                self._write(engine, chunk, report)
+                chunk = {}
+        self._write(engine, chunk, report)
+        return report
+
+    def _error(self, report, number, sku, message):
+        report['failed'] += 1
+        if len(report['errors']) < self.max_errors:
+            report['errors'].append({'line': number, 'sku': sku, 'error': message})
+
+    def _write(self, engine, chunk, report):
+        if not chunk:
+            return
+        try:
+            with engine.begin() as conn:
+                created, updated = self._upsert(conn, list(chunk.values()))
+        except DBAPIError:
+            # Bloco recusado: uma transação por linha isola as que o banco não aceita
+            created, updated = 0, 0
+            for number, values, sizes in chunk.values():
+                try:
+                    with engine.begin() as conn:
+                        row_created, row_updated = self._upsert(conn, [(number, values, sizes)])
+                except DBAPIError as error:
+                    self._error(report, number, values['sku'], f'recusada pelo banco: {error.orig}')
+                    continue
+                created += row_created
+                updated += row_updated
+        report['created'] += created
+        report['updated'] += updated
+
+    def _upsert(self, conn, entries):
+        products, variants = self.products, self.variants
+        skus = [values['sku'] for number, values, sizes in entries]
+        existing = set(conn.execute(select(products.c.sku).where(products.c.sku.in_(skus))).scalars())
+
+        now = datetime.utcnow()
+        # Linhas sem sizes mantêm o size_available e o estoque por tamanho atuais
+        sized = [entry for entry in entries if entry[2] is not None]
+        unsized = [entry for entry in entries if entry[2] is None]
+        for group in (sized, unsized):
+            rows = [dict(values, created_at=now, updated_at=now) for number, values, sizes in group]
+            if rows:
+                bulk_upsert(conn, products, rows, ('sku',), [column for column in rows[0] if column not in ('sku', 'created_at')])
+
+        ids = dict(conn.execute(select(products.c.sku, products.c.id).where(products.c.sku.in_(skus))).all())
+        if sized:
+            sized_ids = [ids[values['sku']] for number, values, sizes in sized]
+            conn.execute(variants.update().where(variants.c.product_id.in_(sized_ids)).values(stock_quantity=0))
+            bulk_upsert(conn, variants, [
+                {'product_id': ids[values['sku']], 'size': size, 'stock_quantity': stock}
+                for number, values, sizes in sized for size, stock in sizes.items()
+            ], ('product_id', 'size'), ['stock_quantity'])
+
+        created_ids = [ids[sku] for sku in skus if sku not in existing]
+        updated_ids = [ids[sku] for sku in skus if sku in existing]
+        if self.on_chunk is not None:
+            self.on_chunk(conn, created_ids, updated_ids)
+        return len(created_ids), len(updated_ids)
+
+
+def export_rows(engine, product_table, variant_table, category_table, fmt='csv', chunk_size=1000):
+    """Gerar o catálogo em pedaços de texto, lendo os produtos por faixas de id (nunca a tabela inteira)"""
+    if fmt not in FORMATS:
+        raise ValueError(f'format deve ser um de: {", ".join(FORMATS)}')
+    products, variants = product_table, variant_table
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDS, lineterminator='\n') if fmt == 'csv' else None
+
+    def flush():
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    if writer is not None:
+        writer.writeheader()
+        yield flush()
+
+    with engine.connect() as conn:
+        slugs = dict(conn.execute(select(category_table.c.id, category_table.c.slug)).all())
+        last_id = 0
+        while True:
+            rows = conn.execute(
+                select(products).where(products.c.id > last_id).order_by(products.c.id).limit(chunk_size)
+            ).all()
+            if not rows:
+                return
+            last_id = rows[-1].id
+            sizes = {}
+            for variant in conn.execute(
+                select(variants.c.product_id, variants.c.size, variants.c.stock_quantity)
+                .where(variants.c.product_id.in_([row.id for row in rows]))
+                .order_by(variants.c.product_id, variants.c.id)
+            ).all():
+                sizes.setdefault(variant.product_id, {})[variant.size] = variant.stock_quantity
+
+            for row in rows:
+                record = {
+                    'sku': row.sku,
+                    'name': row.name,
+                    'description': row.description,
+                    'price': str(row.price),
+                    'category': slugs.get(row.category_id),
+                    'brand': row.brand,
+                    'color': row.color,
+                    'image_url': row.image_url,
+                    'is_active': bool(row.is_active),
+                    'stock_quantity': row.stock_quantity,
+                    'sizes': format_sizes(sizes.get(row.id, {}), fmt) or None,
+                }
+                if writer is not None:
+                    writer.writerow(dict(record, is_active='true' if record['is_active'] else 'false'))
+                else:
+                    buffer.write(json.dumps(record, ensure_ascii=False) + '\n')
+            yield flush()
@@ -0,0 +1,56 @@
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, request
+
+from compression import ETAG_SUFFIXES
+
+
+def conditional_get(version, last_modified=None):
+    """GET condicional (ETag / Last-Modified) para respostas que só mudam com a versão dada.
+
+    version() retorna uma string que muda a cada escrita que afeta a rota
+    (ex.: contadores de geração do cache). O ETag é derivado dela, da rota
+    e da query string, então um If-None-Match que bate responde 304 sem
+    chamar a view, sem ORM e sem serializar nada. Cache-Control vem de
+    app.config['CACHE_CONTROL'][nome_da_view].
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            query = '&'.join(f'{key}={value}' for key, value in sorted(request.args.items(multi=True)))
+            digest = hashlib.sha1(f'{request.path}?{query}#{version()}'.encode()).hexdigest()
+            modified = last_modified() if last_modified else None
+            cache_control = current_app.config.get('CACHE_CONTROL', {}).get(view.__name__)
+
+            # O ETag pode ter voltado com o sufixo da compressão (gzip/br)
+            candidates = [digest] + [digest + suffix for suffix in ETAG_SUFFIXES.values()]
+            matched = next((tag for tag in candidates if tag in request.if_none_match), None)
+
+            def with_headers(response, etag=digest):
+                response.set_etag(etag)
+                if modified is not None:
+                    response.last_modified = modified
+                if cache_control:
+                    response.headers['Cache-Control'] = cache_control
+                return response
+
+            not_modified = matched is not None
+            if not request.if_none_match and modified is not None and request.if_modified_since:
+                not_modified = modified.replace(microsecond=0) <= request.if_modified_since
+
+            if not_modified:
+                return with_headers(current_app.response_class(status=304), matched or digest)
+
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                with_headers(response)
+            return response
+
+        return wrapper
+    return decorator
+
+
+def http_date(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
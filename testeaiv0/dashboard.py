@@ -0,0 +1,181 @@
+import random
+from decimal import Decimal
+
+from sqlalchemy import event, func, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+COUNTERS = ('total_users', 'total_products', 'total_orders', 'total_revenue')
+CENTS = Decimal('0.01')
+
+
+def money(value):
+    # SQLite devolve SUM de Numeric como float: arredonda para centavos antes de comparar
+    return Decimal(str(value or 0)).quantize(CENTS)
+
+
+def upsert_add(conn, table, key, amounts):
+    """INSERT da linha ou soma nas colunas de amounts se a chave já existe (atômico no banco)"""
+    values = dict(key, **amounts)
+    if conn.dialect.name == 'mysql':
+        statement = mysql_insert(table).values(**values)
+        statement = statement.on_duplicate_key_update({
+            column: table.c[column] + statement.inserted[column] for column in amounts
+        })
+    elif conn.dialect.name == 'sqlite':
+        statement = sqlite_insert(table).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=list(key),
+            set_={column: table.c[column] + statement.excluded[column] for column in amounts}
+        )
+    else:
+        # Outros bancos: UPDATE e, se a linha não existe, INSERT
+        where = [table.c[column] == value for column, value in key.items()]
+        result = conn.execute(table.update().where(*where).values({
+            column: table.c[column] + value for column, value in amounts.items()
+        }))
+        if result.rowcount:
+            return
+        statement = table.insert().values(**values)
+    conn.execute(statement)
+
+
+class DashboardAggregates:
+    """Totais do painel administrativo mantidos a cada escrita, na mesma transação.
+
+    Os contadores são divididos em shards (linhas (nome, shard) somadas na
+    leitura) para que pedidos simultâneos não disputem a mesma linha. As
+    vendas por produto ficam numa tabela própria, já ordenável por unidades.
+    Escritas fora do ORM (UPDATE/DELETE em massa, SQL manual) não passam
+    pelos eventos da sessão: rebuild() recalcula tudo do zero.
+    """
+
+    def __init__(self, counter_table, sales_table, shards=8):
+        self.counters = counter_table
+        self.sales = sales_table
+        self.shards = shards
+
+    def add(self, conn, counters=None, sales=None):
+        """Somar deltas: counters {nome: valor}, sales {product_id: (unidades, receita)}"""
+        for name, amount in (counters or {}).items():
+            if amount:
+                upsert_add(conn, self.counters, {'name': name, 'shard': random.randrange(self.shards)}, {'value': amount})
+        # Ordem fixa de product_id: dois pedidos travam as linhas na mesma ordem
+        for product_id, (units, revenue) in sorted((sales or {}).items()):
+            if units:
+                upsert_add(conn, self.sales, {'product_id': product_id}, {'units_sold': units, 'revenue': revenue})
+
+    def watch(self, user_model, product_model, order_model, order_item_model):
+        """Atualizar os totais a cada flush que cria ou remove usuários, produtos e pedidos"""
+
+        def collect(session, flush_context):
+            counters = dict.fromkeys(COUNTERS, 0)
+            sales = {}
+            changes = [(obj, 1) for obj in session.new] + [(obj, -1) for obj in session.deleted]
+            for obj, sign in changes:
+                if isinstance(obj, user_model):
+                    counters['total_users'] += sign
+                elif isinstance(obj, product_model):
+                    counters['total_products'] += sign
+                elif isinstance(obj, order_model):
+                    counters['total_orders'] += sign
+                    counters['total_revenue'] += sign * money(obj.total_amount)
+                elif isinstance(obj, order_item_model):
+                    units, revenue = sales.get(obj.product_id, (0, money(0)))
+                    sales[obj.product_id] = (units + sign * obj.quantity, revenue + sign * money(obj.price) * obj.quantity)
+            if any(counters.values()) or sales:
+                self.add(session.connection(), counters, sales)
+
+        event.listen(Session, 'after_flush', collect)
+
+    def totals(self, conn):
+        rows = conn.execute(
+            select(self.counters.c.name, func.sum(self.counters.c.value)).group_by(self.counters.c.name)
+        ).all()
+        totals = dict.fromkeys(COUNTERS, 0)
+        totals.update({name: value or 0 for name, value in rows})
+        return {
+            name: (money(value) if name == 'total_revenue' else int(value))
+            for name, value in totals.items()
+        }
+
+    def top_products(self, conn, product_table, limit=5):
+        rows = conn.execute(
+            select(product_table.c.id, product_table.c.name, self.sales.c.units_sold, self.sales.c.revenue)
+            .join(product_table, product_table.c.id == self.sales.c.product_id)
+            .where(self.sales.c.units_sold > 0)
+            .order_by(self.sales.c.units_sold.desc(), self.sales.c.product_id.desc())  # ix_product_sales_units_product de trás para frente
+            .limit(limit)
+        ).all()
+        return [
+            {'id': row.id, 'name': row.name, 'total_sold': row.units_sold, 'revenue': money(row.revenue)}
+            for row in rows
+        ]
+
+    @staticmethod
+    def compute(conn, user_table, product_table, order_table, order_item_table):
+        """Totais e vendas por produto calculados direto das tabelas (lento: só para rebuild/verify)"""
+        counters = {
+            'total_users': conn.execute(select(func.count()).select_from(user_table)).scalar(),
+            'total_products': conn.execute(select(func.count()).select_from(product_table)).scalar(),
+            'total_orders': conn.execute(select(func.count()).select_from(order_table)).scalar(),
+            'total_revenue': money(conn.execute(select(func.sum(order_table.c.total_amount))).scalar()),
+        }
+        rows = conn.execute(
+            select(
+                order_item_table.c.product_id,
+                func.sum(order_item_table.c.quantity),
+                func.sum(order_item_table.c.price * order_item_table.c.quantity)
+            ).group_by(order_item_table.c.product_id)
+        ).all()
+        sales = {product_id: (int(units), money(revenue)) for product_id, units, revenue in rows}
+        return counters, sales
+
+    def stored(self, conn):
+        sales = {
+            row.product_id: (row.units_sold, money(row.revenue))
+            for row in conn.execute(select(self.sales)).all()
+            if row.units_sold
+        }
+        return self.totals(conn), sales
+
+    def lock(self, conn):
+        """Travar os totais até o fim da transação: pedidos em andamento esperam para somar seus deltas"""
+        conn.execute(select(self.counters.c.name).with_for_update())
+        conn.execute(select(self.sales.c.product_id).with_for_update())
+        # A remoção trava as tabelas também onde não há FOR UPDATE (SQLite: trava de escrita do banco)
+        conn.execute(self.counters.delete())
+        conn.execute(self.sales.delete())
+
+    def rebuild(self, conn, *tables):
+        """Apagar e recalcular os totais a partir de users, products, orders e order_items.
+
+        Roda numa transação só e trava os totais antes de ler as tabelas: um
+        pedido simultâneo ou já está na contagem, ou espera o rebuild e soma
+        o seu delta depois, sobre os totais novos.
+        """
+        self.lock(conn)
+        counters, sales = self.compute(conn, *tables)
+        conn.execute(self.counters.insert(), [
+            {'name': name, 'shard': 0, 'value': value} for name, value in counters.items()
+        ])
+        if sales:
+            conn.execute(self.sales.insert(), [
+                {'product_id': product_id, 'units_sold': units, 'revenue': revenue}
+                for product_id, (units, revenue) in sales.items()
+            ])
+        return counters
+
+    def verify(self, conn, *tables):
+        """Diferenças entre os totais mantidos e os recalculados: [(chave, mantido, esperado)]"""
+        expected_counters, expected_sales = self.compute(conn, *tables)
+        counters, sales = self.stored(conn)
+        differences = [
+            (name, counters[name], expected_counters[name])
+            for name in COUNTERS if counters[name] != expected_counters[name]
+        ]
+        for product_id in sorted(set(sales) | set(expected_sales)):
+            if sales.get(product_id) != expected_sales.get(product_id):
+                differences.append((f'product:{product_id}', sales.get(product_id), expected_sales.get(product_id)))
+        return differences
@@ -0,0 +1,156 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from sqlalchemy import exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.util import queue as sqla_queue
+
+# Limites (em segundos) do histograma de espera por conexão
+WAIT_BUCKETS = (0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class _WaitTimedQueue(sqla_queue.Queue):
+    """Fila interna do QueuePool que mede só as esperas bloqueantes por uma conexão livre"""
+
+    pool = None  # TimedQueuePool dono da fila, ligado logo após a criação
+
+    def get(self, block=True, timeout=None):
+        # O QueuePool só bloqueia aqui quando já tem pool_size + max_overflow conexões abertas
+        if not block:
+            return super().get(block, timeout)
+        pool = self.pool
+        with pool._stats_lock:
+            pool.waiting += 1
+        started = time.perf_counter()
+        try:
+            return super().get(block, timeout)
+        finally:
+            with pool._stats_lock:
+                pool.waiting -= 1
+            pool._checkout.waited = getattr(pool._checkout, 'waited', 0.0) + time.perf_counter() - started
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que mede quanto cada checkout esperou na fila e quantos estão esperando agora.
+
+    Só conta a espera por uma conexão livre (pool no limite): abrir uma
+    conexão nova e o pre-ping não são espera do pool.
+    """
+
+    _queue_class = _WaitTimedQueue
+
+    def __init__(self, creator, pool_size=5, max_overflow=10, timeout=30.0, **kw):
+        super().__init__(creator, pool_size=pool_size, max_overflow=max_overflow, timeout=timeout, **kw)
+        self._pool.pool = self
+        self.limit = pool_size + max_overflow if max_overflow >= 0 else None
+        self.waiting = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)
+        self._stats_lock = threading.Lock()
+        self._checkout = threading.local()  # espera acumulada pelo checkout desta thread
+
+    def connect(self):
+        self._checkout.waited = 0.0
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        waited = self._checkout.waited
+        with self._stats_lock:
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            bucket = next((i for i, limit in enumerate(WAIT_BUCKETS) if waited <= limit), len(WAIT_BUCKETS))
+            self.wait_buckets[bucket] += 1
+        return connection
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS a partir das chaves DB_POOL_* do config"""
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return {}  # banco em memória: uma conexão só (StaticPool), sem pool para ajustar
+
+    options = {
+        'poolclass': TimedQueuePool,
+        'pool_size': config['DB_POOL_SIZE'],
+        'max_overflow': config['DB_POOL_MAX_OVERFLOW'],
+        'pool_timeout': config['DB_POOL_TIMEOUT'],
+        'pool_recycle': config['DB_POOL_RECYCLE'],
+        'pool_pre_ping': config['DB_POOL_PRE_PING'],
+    }
+    if url.get_backend_name() == 'mysql':
+        options['connect_args'] = {'connect_timeout': config['DB_CONNECT_TIMEOUT']}
+    return options
+
+
+def pool_status(pool):
+    """Números do pool; o que o tipo de pool não informa fica de fora"""
+    status = {'class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(size=pool.size(), checked_out=pool.checkedout(), checked_in=pool.checkedin(),
+                      overflow=max(pool.overflow(), 0))
+    if isinstance(pool, TimedQueuePool):
+        with pool._stats_lock:
+            status.update(
+                limit=pool.limit,
+                waiting=pool.waiting,
+                checkouts=pool.checkouts,
+                timeouts=pool.timeouts,
+                wait_avg_ms=round(pool.wait_total / pool.checkouts * 1000, 3) if pool.checkouts else 0,
+                wait_max_ms=round(pool.wait_max * 1000, 3),
+                wait_buckets=list(WAIT_BUCKETS),
+                wait_counts=list(pool.wait_buckets)
+            )
+        # Esgotado: todas as conexões em uso, ou alguém já bloqueado na fila esperando uma
+        status['exhausted'] = pool.waiting > 0 or (pool.limit is not None and status['checked_out'] >= pool.limit)
+    return status
+
+
+class ReadinessProbe:
+    """Checkout + SELECT 1 com prazo; um pool esgotado responde "não pronto" sem entrar na fila.
+
+    A checagem roda numa thread própria para o prazo valer mesmo quando o
+    checkout fica preso esperando pool_timeout; enquanto uma checagem
+    anterior não terminar, as novas respondem "não pronto" na hora.
+    """
+
+    def __init__(self, timeout=1.0):
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-readiness')
+        self._pending = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _ping(engine):
+        started = time.perf_counter()
+        with engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+        return time.perf_counter() - started
+
+    def check(self, engine):
+        """Retorna (pronto, detalhes)"""
+        status = pool_status(engine.pool)
+        if status.get('exhausted'):
+            return False, {'database': 'pool esgotado', 'pool': status}
+
+        with self._lock:
+            if self._pending is not None and not self._pending.done():
+                return False, {'database': 'checagem anterior ainda em andamento', 'pool': status}
+            self._pending = self._executor.submit(self._ping, engine)
+            pending = self._pending
+
+        try:
+            elapsed = pending.result(timeout=self.timeout)
+        except FutureTimeout:
+            return False, {'database': f'sem resposta em {self.timeout}s', 'pool': pool_status(engine.pool)}
+        except Exception as error:
+            return False, {'database': f'erro: {error}', 'pool': pool_status(engine.pool)}
+        return True, {'database': 'ok', 'ping_ms': round(elapsed * 1000, 3), 'pool': pool_status(engine.pool)}
@@ -0,0 +1,66 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+
+
+class InvalidFields(ValueError):
+    """Campo ou preset desconhecido no parâmetro fields"""
+
+
+class FieldSet:
+    """Campos que um recurso aceita em fields= e seus presets nomeados.
+
+    fields é a ordem do JSON. nested liga um campo a outro FieldSet:
+    product.name escolhe um campo do produto aninhado e product.card um
+    preset dele. O preset full (todos os campos) sempre existe.
+    """
+
+    def __init__(self, fields, presets=None, default='full', nested=None):
+        self.fields = tuple(fields)
+        self.nested = nested or {}
+        self.presets = dict(presets or {}, full=self.fields)
+        self.default = default
+
+    def parse(self, value=None):
+        """fields= (lista separada por vírgula) em {campo: subseleção ou None}; vazio é o preset padrão"""
+        return self._select(value.split(',') if value else [self.default])
+
+    def _select(self, tokens):
+        chosen = {}
+        for token in (token.strip() for token in tokens):
+            if not token:
+                continue
+            if token in self.presets:
+                selection = self._select(self.presets[token])
+            elif token in self.nested:
+                selection = {token: self.nested[token].parse()}
+            elif token in self.fields:
+                selection = {token: None}
+            elif token.partition('.')[0] in self.nested:
+                name, _, rest = token.partition('.')
+                selection = {name: self.nested[name]._select([rest])}
+            else:
+                raise InvalidFields(f'Campo desconhecido em fields: {token}')
+            for name, nested in selection.items():
+                chosen[name] = _merge(chosen.get(name), nested) if name in chosen else nested
+        return {name: chosen[name] for name in self.fields if name in chosen}
+
+
+def _merge(first, second):
+    if first is None or second is None:
+        return first if second is None else second
+    merged = dict(first)
+    for name, nested in second.items():
+        merged[name] = _merge(merged[name], nested) if name in merged else nested
+    return merged
+
+
+def project(obj, fields, **computed):
+    """Dict só com os campos escolhidos; computed(subseleção) monta os que não são colunas simples"""
+    return {name: computed[name](nested) if name in computed else getattr(obj, name) for name, nested in fields.items()}
+
+
+def load_columns(model, fields, *required):
+    """load_only com as colunas escolhidas mais as obrigatórias (chaves, ordenação, cálculo)"""
+    columns = inspect(model).column_attrs
+    keys = [column.key for column in required] + [name for name in fields if name in columns]
+    return load_only(*(getattr(model, key) for key in dict.fromkeys(keys)))
@@ -0,0 +1,49 @@
+from sqlalchemy import case, select
+
+
+def _active(table):
+    # Produtos inativos não vendem; tabelas sem is_active (variantes) não filtram
+    return (table.c.is_active.is_(True),) if 'is_active' in table.c else ()
+
+
+def reserve_stock(session, table, quantities):
+    """Baixar o estoque de vários produtos (ou variantes) com um único UPDATE condicional.
+
+    quantities é {id: quantidade}. Cada linha só é alterada se
+    stock_quantity >= quantidade, verificado pelo banco sob o lock da linha,
+    então checkouts concorrentes não vendem além do estoque. O banco trava
+    as linhas na ordem da chave primária, o que evita deadlocks entre pedidos.
+
+    Retorna False se algum produto não pôde ser reservado; nesse caso o
+    chamador deve desfazer a transação (parte das linhas pode ter sido alterada).
+    """
+    if not quantities:
+        return True
+
+    quantity = case(quantities, value=table.c.id)
+    result = session.execute(
+        table.update()
+        .where(
+            table.c.id.in_(sorted(quantities)),
+            *_active(table),
+            table.c.stock_quantity >= quantity
+        )
+        .values(stock_quantity=table.c.stock_quantity - quantity)
+    )
+    return result.rowcount == len(quantities)
+
+
+def stock_shortages(session, table, quantities):
+    """Produtos (ou variantes) sem estoque para a quantidade pedida: {id: disponível}"""
+    if not quantities:
+        return {}
+    rows = session.execute(
+        select(table.c.id, table.c.stock_quantity)
+        .where(table.c.id.in_(sorted(quantities)), *_active(table))
+    ).all()
+    available = {row.id: row.stock_quantity for row in rows}
+    return {
+        product_id: available.get(product_id, 0)
+        for product_id, requested in quantities.items()
+        if available.get(product_id, 0) < requested
+    }
@@ -0,0 +1,277 @@
+import json
+import logging
+import os
+import random
+import socket
+import time
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+
+from sqlalchemy import Float, and_, case, func, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import Grouping
+from sqlalchemy.sql.functions import FunctionElement
+
+logger = logging.getLogger(__name__)
+
+# Status em que um job com dedupe_key bloqueia outro igual
+ACTIVE_STATUSES = ('queued', 'running')
+
+
+def active_dedupe_key(status, dedupe_key):
+    """dedupe_key enquanto o job está ativo, NULL depois: base do índice único uq_jobs_active_dedupe"""
+    # Entre parênteses: PostgreSQL e MySQL só aceitam expressões de índice assim
+    return Grouping(case((status.in_(ACTIVE_STATUSES), dedupe_key)))
+
+
+class seconds_between(FunctionElement):
+    """Segundos de start até end, calculados no banco (para agregar sem trazer as linhas)"""
+    type = Float()
+    inherit_cache = True
+
+
+@compiles(seconds_between)
+def _seconds_between(element, compiler, **kw):
+    start, end = (compiler.process(argument, **kw) for argument in element.clauses)
+    return f'EXTRACT(EPOCH FROM ({end} - {start}))'
+
+
+@compiles(seconds_between, 'sqlite')
+def _seconds_between_sqlite(element, compiler, **kw):
+    start, end = (compiler.process(argument, **kw) for argument in element.clauses)
+    return f'((julianday({end}) - julianday({start})) * 86400.0)'
+
+
+@compiles(seconds_between, 'mysql')
+def _seconds_between_mysql(element, compiler, **kw):
+    start, end = (compiler.process(argument, **kw) for argument in element.clauses)
+    return f'(TIMESTAMPDIFF(MICROSECOND, {start}, {end}) / 1000000.0)'
+
+
+class JobQueue:
+    """Fila de jobs durável numa tabela do banco principal.
+
+    enqueue() só insere a linha (na transação de quem chama, então um job
+    de confirmação só existe se o pedido foi gravado). Os workers pegam
+    jobs com um UPDATE condicional (status='queued' -> 'running'), que só
+    um deles consegue para cada linha. Falhas voltam para a fila com
+    backoff exponencial até max_attempts; depois disso o job fica 'dead'
+    (dead-letter) para inspeção e requeue manual. Jobs 'running' há mais
+    de visibility_timeout (worker que morreu) voltam para a fila, ou para a
+    dead-letter se já usaram todas as tentativas.
+    """
+
+    def __init__(self, table, max_attempts=5, backoff_base=2, backoff_max=600, visibility_timeout=300, context=None):
+        self.table = table
+        self.context = context or nullcontext  # ex.: app.app_context, em volta de cada job
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.visibility_timeout = visibility_timeout
+        self.handlers = {}
+
+    def handler(self, name):
+        """Registrar a função que executa os jobs do tipo name: function(**payload)"""
+        def decorator(function):
+            self.handlers[name] = function
+            return function
+        return decorator
+
+    def enqueue(self, conn, name, payload=None, delay=0, dedupe_key=None, max_attempts=None):
+        """Inserir um job; com dedupe_key não duplica um job igual na fila ou em execução"""
+        if name not in self.handlers:
+            raise ValueError(f'Job desconhecido: {name}')
+        now = datetime.utcnow()
+        table = self.table
+        values = {
+            'name': name,
+            'payload': json.dumps(payload or {}),
+            'status': 'queued',
+            'attempts': 0,
+            'max_attempts': max_attempts or self.max_attempts,
+            'dedupe_key': dedupe_key,
+            'run_at': now + timedelta(seconds=delay),
+            'created_at': now
+        }
+        if dedupe_key is None:
+            return conn.execute(table.insert().values(**values)).inserted_primary_key[0]
+
+        active = select(func.min(table.c.id)).where(table.c.dedupe_key == dedupe_key, table.c.status.in_(ACTIVE_STATUSES))
+        existing = conn.execute(active).scalar()  # ix_jobs_dedupe_status
+        if existing is not None:
+            return existing
+        try:
+            # Savepoint: a violação não desfaz a transação de quem chamou
+            with conn.begin_nested():
+                return conn.execute(table.insert().values(**values)).inserted_primary_key[0]
+        except IntegrityError:
+            # Outro processo inseriu entre a leitura e o INSERT: uq_jobs_active_dedupe recusou este
+            return conn.execute(active).scalar()
+
+    def backoff(self, attempts):
+        """Espera antes da tentativa seguinte: exponencial com jitter, limitada a backoff_max"""
+        delay = min(self.backoff_base ** attempts, self.backoff_max)
+        return delay * random.uniform(0.5, 1.0)
+
+    def claim(self, engine, worker_id, limit=10, now=None):
+        """Reservar até limit jobs prontos para este worker; retorna as linhas reservadas"""
+        now = now or datetime.utcnow()
+        expired = now - timedelta(seconds=self.visibility_timeout)
+        table = self.table
+        abandoned = and_(table.c.status == 'running', table.c.locked_at < expired)
+        ready = or_(
+            and_(table.c.status == 'queued', table.c.run_at <= now),
+            and_(abandoned, table.c.attempts < table.c.max_attempts)
+        )
+        claimed = []
+        with engine.begin() as conn:
+            # Job que derruba o worker a cada tentativa não pode voltar para sempre
+            dead = conn.execute(
+                table.update()
+                .where(abandoned, table.c.attempts >= table.c.max_attempts)
+                .values(status='dead', finished_at=now, locked_by=None, locked_at=None,
+                        last_error='Tempo de execução esgotado (worker não concluiu o job)')
+            ).rowcount
+            if dead:
+                logger.error('%s job(s) foram para a dead-letter após esgotar as tentativas sem concluir', dead)
+            candidates = conn.execute(
+                select(table.c.id, table.c.status, table.c.attempts).where(ready).order_by(table.c.run_at).limit(limit)
+            ).all()
+            for candidate in candidates:
+                # attempts funciona como versão da linha: só um worker vê rowcount 1
+                result = conn.execute(
+                    table.update()
+                    .where(
+                        table.c.id == candidate.id,
+                        table.c.status == candidate.status,
+                        table.c.attempts == candidate.attempts
+                    )
+                    .values(status='running', locked_by=worker_id, locked_at=now, started_at=now, attempts=table.c.attempts + 1)
+                )
+                if result.rowcount == 1:
+                    claimed.append(candidate.id)
+            if not claimed:
+                return []
+            return conn.execute(select(table).where(table.c.id.in_(claimed)).order_by(table.c.run_at)).all()
+
+    def execute(self, engine, job, now=None):
+        """Rodar um job reservado e registrar o resultado; retorna o novo status"""
+        table = self.table
+        try:
+            with self.context():
+                self.handlers[job.name](**json.loads(job.payload))
+        except Exception as error:
+            finished = now or datetime.utcnow()
+            if job.attempts >= job.max_attempts:
+                status, values = 'dead', {'finished_at': finished}
+                logger.error('Job %s (%s) foi para a dead-letter após %s tentativas: %s', job.id, job.name, job.attempts, error)
+            else:
+                status, values = 'queued', {'run_at': finished + timedelta(seconds=self.backoff(job.attempts))}
+                logger.warning('Job %s (%s) falhou na tentativa %s: %s', job.id, job.name, job.attempts, error)
+            values.update(status=status, last_error=f'{type(error).__name__}: {error}'[:1000], locked_by=None, locked_at=None)
+        else:
+            status, values = 'done', {'status': 'done', 'finished_at': now or datetime.utcnow(), 'locked_by': None, 'locked_at': None}
+
+        with engine.begin() as conn:
+            # Se outro worker reassumiu o job (visibility_timeout), este resultado é descartado
+            conn.execute(table.update().where(table.c.id == job.id, table.c.attempts == job.attempts).values(**values))
+        return status
+
+    def work(self, engine, worker_id=None, batch=10, poll_interval=1.0, stop=lambda: False, tick=None):
+        """Laço do worker: reservar, executar e dormir quando a fila está vazia; tick() roda a cada volta"""
+        worker_id = worker_id or default_worker_id()
+        while not stop():
+            if tick is not None:
+                tick()
+            jobs = self.claim(engine, worker_id, limit=batch)
+            for job in jobs:
+                self.execute(engine, job)
+            if not jobs:
+                time.sleep(poll_interval)
+
+    def run_pending(self, engine, worker_id='inline', now=None):
+        """Executar tudo que está pronto agora (testes e comandos de manutenção)"""
+        counts = {}
+        while True:
+            jobs = self.claim(engine, worker_id, now=now)
+            if not jobs:
+                return counts
+            for job in jobs:
+                status = self.execute(engine, job, now=now)
+                counts[status] = counts.get(status, 0) + 1
+
+    def purge(self, engine, retention, now=None, batch=1000):
+        """Apagar os jobs concluídos há mais de retention segundos, em lotes; retorna quantos"""
+        cutoff = (now or datetime.utcnow()) - timedelta(seconds=retention)
+        table = self.table
+        finished = and_(table.c.status == 'done', table.c.finished_at < cutoff)  # ix_jobs_status_finished_at
+        purged = 0
+        while True:
+            # Lotes curtos: cada transação trava poucas linhas e não segura a fila
+            with engine.begin() as conn:
+                ids = conn.execute(select(table.c.id).where(finished).limit(batch)).scalars().all()
+                if ids:
+                    conn.execute(table.delete().where(table.c.id.in_(ids)))
+            purged += len(ids)
+            if len(ids) < batch:
+                return purged
+
+    def requeue_dead(self, engine, name=None):
+        """Devolver jobs da dead-letter para a fila, com as tentativas zeradas.
+
+        Voltam sem dedupe_key: são retentativas pedidas à mão e não podem
+        colidir no uq_jobs_active_dedupe com o job que o agendamento já criou.
+        """
+        table = self.table
+        query = table.update().where(table.c.status == 'dead')
+        if name is not None:
+            query = query.where(table.c.name == name)
+        with engine.begin() as conn:
+            return conn.execute(
+                query.values(status='queued', attempts=0, run_at=datetime.utcnow(), finished_at=None, dedupe_key=None)
+            ).rowcount
+
+    def stats(self, conn, window=3600, now=None):
+        """Profundidade da fila por tipo e status, idade do job mais antigo e latência recente"""
+        now = now or datetime.utcnow()
+        table = self.table
+        depth = {}
+        for name, status, count in conn.execute(
+            select(table.c.name, table.c.status, func.count())
+            .where(table.c.status.in_(('queued', 'running', 'dead')))
+            .group_by(table.c.name, table.c.status)
+        ).all():
+            depth.setdefault(name, {})[status] = count
+
+        oldest = conn.execute(select(func.min(table.c.run_at)).where(table.c.status == 'queued', table.c.run_at <= now)).scalar()
+
+        # Espera na fila (criação -> início) e duração (início -> fim) dos jobs concluídos na janela,
+        # agregadas no banco (ix_jobs_status_finished_at): nenhuma linha de job vem para o processo
+        wait = seconds_between(table.c.created_at, table.c.started_at)
+        run = seconds_between(table.c.started_at, table.c.finished_at)
+        latency = {
+            name: {
+                'count': count,
+                'avg_wait_seconds': float(avg_wait),
+                'max_wait_seconds': float(max_wait),
+                'avg_run_seconds': float(avg_run),
+                'max_run_seconds': float(max_run)
+            }
+            for name, count, avg_wait, max_wait, avg_run, max_run in conn.execute(
+                select(table.c.name, func.count(), func.avg(wait), func.max(wait), func.avg(run), func.max(run))
+                .where(table.c.status == 'done', table.c.finished_at >= now - timedelta(seconds=window))
+                .group_by(table.c.name)
+            ).all()
+        }
+
+        return {
+            'depth': depth,
+            'oldest_ready_seconds': (now - oldest).total_seconds() if oldest else 0,
+            'window_seconds': window,
+            'latency': latency
+        }
+
+
+def default_worker_id():
+    return f'{socket.gethostname()}:{os.getpid()}'
@@ -0,0 +1,53 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # dependência opcional: sem ela usa o json da biblioteca padrão
+    orjson = None
+
+
+def json_default(obj):
+    # Numeric do banco vira número no JSON, datas viram ISO 8601
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f'Objeto do tipo {type(obj).__name__} não é serializável em JSON')
+
+
+class FastJSONProvider(JSONProvider):
+    """Provider JSON com orjson (quando instalado) que entende Decimal e datetime.
+
+    Assim os to_dict() devolvem os valores do banco como estão, sem float()
+    e isoformat() campo a campo.
+    """
+
+    sort_keys = True
+    mimetype = 'application/json'
+
+    def _dumps_bytes(self, obj):
+        if orjson is not None:
+            return orjson.dumps(obj, default=json_default, option=orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+        return self.dumps(obj).encode()
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return self._dumps_bytes(obj).decode()
+        kwargs.setdefault('default', json_default)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        kwargs.setdefault('ensure_ascii', False)
+        kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dumps_bytes(obj), mimetype=self.mimetype)
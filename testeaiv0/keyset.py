@@ -0,0 +1,78 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import and_, or_
+
+
+class InvalidCursor(ValueError):
+    """Cursor malformado ou gerado para outra ordenação"""
+
+
+def _dump(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _load(value, column):
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is Decimal:
+        return Decimal(value)
+    return python_type(value)
+
+
+def encode_cursor(sort, values):
+    payload = json.dumps([sort] + [_dump(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, sort, columns):
+    """Valores da última linha da página anterior, convertidos para o tipo de cada coluna"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        cursor_sort, *values = payload
+        if cursor_sort != sort or len(values) != len(columns):
+            raise InvalidCursor('Cursor não corresponde à ordenação pedida')
+        return [_load(value, column) for value, column in zip(values, columns)]
+    except InvalidCursor:
+        raise
+    except Exception:
+        raise InvalidCursor('Cursor inválido')
+
+
+def keyset_page(query, sort, columns, cursor=None, limit=12, descending=False):
+    """Buscar uma página a partir do cursor com predicado de intervalo (sem OFFSET nem COUNT).
+
+    columns é a chave de ordenação, terminando numa coluna única (o id) para
+    desempatar. Retorna (itens, next_cursor); next_cursor é None na última página.
+    """
+    if limit < 1:
+        raise ValueError('limit deve ser pelo menos 1')
+    if cursor:
+        values = decode_cursor(cursor, sort, columns)
+        # (a, b) > (x, y)  ==  a > x OR (a = x AND b > y)
+        clauses = []
+        for position, column in enumerate(columns):
+            equal = [columns[i] == values[i] for i in range(position)]
+            beyond = column < values[position] if descending else column > values[position]
+            clauses.append(and_(*equal, beyond))
+        # Limite redundante na primeira coluna: o banco busca direto no índice em vez de filtrar desde o início
+        leading = columns[0] <= values[0] if descending else columns[0] >= values[0]
+        query = query.filter(leading, or_(*clauses))
+
+    ordering = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.order_by(None).order_by(*ordering).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, [getattr(last, column.key) for column in columns])
+    return rows, next_cursor
@@ -0,0 +1,60 @@
+import logging
+import smtplib
+from email.message import EmailMessage
+
+logger = logging.getLogger(__name__)
+
+
+class ConsoleMailer:
+    """Só registra o email no log (desenvolvimento e testes); sent guarda as últimas mensagens"""
+
+    def __init__(self, sender, keep=100):
+        self.sender = sender
+        self.keep = keep
+        self.sent = []
+
+    def send(self, to, subject, body, reply_to=None):
+        logger.info('Email para %s: %s', to, subject)
+        self.sent = (self.sent + [{'to': to, 'subject': subject, 'body': body, 'reply_to': reply_to}])[-self.keep:]
+
+
+class SmtpMailer:
+    """Envio por SMTP; erros sobem para o job ser tentado de novo"""
+
+    def __init__(self, sender, host, port=587, username=None, password=None, use_tls=True, timeout=10):
+        self.sender = sender
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+
+    def send(self, to, subject, body, reply_to=None):
+        message = EmailMessage()
+        message['From'] = self.sender
+        message['To'] = to
+        message['Subject'] = subject
+        if reply_to:
+            message['Reply-To'] = reply_to
+        message.set_content(body)
+
+        with smtplib.SMTP(self.host, self.port, timeout=self.timeout) as smtp:
+            if self.use_tls:
+                smtp.starttls()
+            if self.username:
+                smtp.login(self.username, self.password)
+            smtp.send_message(message)
+
+
+def mailer_from_config(config):
+    backend = config.get('MAIL_BACKEND', 'console')
+    if backend == 'console':
+        return ConsoleMailer(config['MAIL_SENDER'])
+    if backend == 'smtp':
+        return SmtpMailer(
+            config['MAIL_SENDER'], config['MAIL_SERVER'], port=config.get('MAIL_PORT', 587),
+            username=config.get('MAIL_USERNAME'), password=config.get('MAIL_PASSWORD'),
+            use_tls=config.get('MAIL_USE_TLS', True)
+        )
+    raise ValueError(f'MAIL_BACKEND desconhecido: {backend}')
@@ -0,0 +1,170 @@
+import logging
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Limites dos histogramas (latência em segundos, tamanho em bytes, consultas por requisição)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[next((i for i, limit in enumerate(self.buckets) if value <= limit), len(self.buckets))] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for limit, count in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += count
+            yield f'{name}_bucket{_labels(dict(labels, le=limit))} {cumulative}'
+        yield f'{name}_sum{_labels(labels)} {self.sum:.6f}'
+        yield f'{name}_count{_labels(labels)} {self.count}'
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in labels.values())
+    return '{' + ','.join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + '}'
+
+
+class RequestMetrics:
+    """Latência, status, tamanho da resposta e SQL por endpoint, no formato texto do Prometheus.
+
+    O SQL é medido pelos eventos de cursor de todos os engines e somado na
+    requisição da thread atual (flask.g); consultas fora de requisição
+    (workers, threads auxiliares) não entram. Com slow_request_ms, as
+    requisições mais lentas que o limite vão para o log com os statements.
+    """
+
+    def __init__(self, prefix='sneakerhub', slow_request_ms=0, slow_statements=50):
+        self.prefix = prefix
+        self.slow_request_ms = slow_request_ms
+        self.slow_statements = slow_statements
+        self.collectors = []
+        self._lock = threading.Lock()
+        self._requests = {}   # (endpoint, method, status) -> contagem
+        self._series = {}     # (endpoint, method) -> histogramas
+        self.slow_requests = 0
+
+    def collector(self, function):
+        """Registrar uma função que retorna [(nome, tipo, [(labels, valor)])] a cada coleta"""
+        self.collectors.append(function)
+        return function
+
+    def init_app(self, app):
+        from flask import g, has_request_context, request
+
+        # O início fica no contexto de execução do statement, não na conexão: um
+        # statement que falha não deixa nada para trás na conexão devolvida ao pool
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            context.metrics_started = time.perf_counter()
+
+        def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            started = getattr(context, 'metrics_started', None)
+            if started is None:
+                return
+            if has_request_context() and 'metrics_sql' in g:
+                sql = g.metrics_sql
+                sql['count'] += 1
+                sql['seconds'] += time.perf_counter() - started
+                if self.slow_request_ms and len(sql['statements']) < self.slow_statements:
+                    sql['statements'].append((round((time.perf_counter() - started) * 1000, 3), statement))
+
+        if not event.contains(Engine, 'before_cursor_execute', before_cursor_execute):
+            event.listen(Engine, 'before_cursor_execute', before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', after_cursor_execute)
+
+        @app.before_request
+        def start_request_metrics():
+            g.metrics_started = time.perf_counter()
+            g.metrics_sql = {'count': 0, 'seconds': 0.0, 'statements': []}
+
+        @app.after_request
+        def record_request_metrics(response):
+            if 'metrics_started' not in g:
+                return response
+            elapsed = time.perf_counter() - g.metrics_started
+            # Corpo em streaming não tem tamanho conhecido aqui
+            size = None if response.is_streamed else response.calculate_content_length()
+            self.observe(request.endpoint or 'nao_encontrado', request.method, response.status_code, elapsed, size, g.metrics_sql)
+            if self.slow_request_ms and elapsed * 1000 >= self.slow_request_ms:
+                self.log_slow(request.method, request.full_path.rstrip('?'), response.status_code, elapsed, g.metrics_sql)
+            return response
+
+    def observe(self, endpoint, method, status, seconds, size, sql):
+        with self._lock:
+            key = (endpoint, method, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            series = self._series.get((endpoint, method))
+            if series is None:
+                series = self._series[(endpoint, method)] = {
+                    'latency': Histogram(LATENCY_BUCKETS),
+                    'size': Histogram(SIZE_BUCKETS),
+                    'queries': Histogram(QUERY_BUCKETS),
+                    'sql_seconds': 0.0
+                }
+            series['latency'].observe(seconds)
+            if size is not None:
+                series['size'].observe(size)
+            series['queries'].observe(sql['count'])
+            series['sql_seconds'] += sql['seconds']
+
+    def log_slow(self, method, path, status, seconds, sql):
+        with self._lock:
+            self.slow_requests += 1
+        statements = '\n'.join(f'  [{ms} ms] {" ".join(statement.split())}' for ms, statement in sql['statements'])
+        logger.warning(
+            'Requisição lenta: %s %s -> %s em %.1f ms (%s consultas, %.1f ms de SQL)\n%s',
+            method, path, status, seconds * 1000, sql['count'], sql['seconds'] * 1000, statements
+        )
+
+    def render(self):
+        """Texto no formato de exposição do Prometheus"""
+        p = self.prefix
+        lines = []
+        with self._lock:
+            lines += [f'# HELP {p}_http_requests_total Requisições por endpoint, método e status', f'# TYPE {p}_http_requests_total counter']
+            for (endpoint, method, status), count in sorted(self._requests.items()):
+                lines.append(f'{p}_http_requests_total{_labels({"endpoint": endpoint, "method": method, "status": status})} {count}')
+
+            for name, kind, description in (
+                ('http_request_duration_seconds', 'latency', 'Latência das requisições'),
+                ('http_response_size_bytes', 'size', 'Tamanho do corpo da resposta'),
+                ('http_request_sql_queries', 'queries', 'Consultas SQL por requisição'),
+            ):
+                lines += [f'# HELP {p}_{name} {description}', f'# TYPE {p}_{name} histogram']
+                for (endpoint, method), series in sorted(self._series.items()):
+                    lines += series[kind].lines(f'{p}_{name}', {'endpoint': endpoint, 'method': method})
+
+            lines += [f'# HELP {p}_http_request_sql_seconds_total Tempo gasto em SQL', f'# TYPE {p}_http_request_sql_seconds_total counter']
+            for (endpoint, method), series in sorted(self._series.items()):
+                lines.append(f'{p}_http_request_sql_seconds_total{_labels({"endpoint": endpoint, "method": method})} {series["sql_seconds"]:.6f}')
+
+            lines += [f'# HELP {p}_slow_requests_total Requisições acima do limite de lentidão', f'# TYPE {p}_slow_requests_total counter',
+                      f'{p}_slow_requests_total {self.slow_requests}']
+
+        for collect in self.collectors:
+            try:
+                families = collect()
+            except Exception as error:  # uma fonte fora do ar não derruba a coleta inteira
+                logger.warning('Falha ao coletar métricas de %s: %s', collect.__name__, error)
+                continue
+            for name, kind, samples in families:
+                lines.append(f'# TYPE {p}_{name} {kind}')
+                lines += [f'{p}_{name}{_labels(labels)} {value}' for labels, value in samples]
+
+        return '\n'.join(lines) + '\n'
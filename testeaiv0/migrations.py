@@ -0,0 +1,384 @@
+import json
+import warnings
+from datetime import datetime
+
+from sqlalchemy import (Column, Date, DateTime, ForeignKey, Index, Integer, MetaData, Numeric, String, Table,
+                        Text, UniqueConstraint, cast, func, inspect, literal, select, text)
+from sqlalchemy.exc import IntegrityError
+
+from dashboard import DashboardAggregates
+from jobqueue import ACTIVE_STATUSES, active_dedupe_key
+
+# Versão aplicada de cada migração (fora do db.metadata: o create_all não a recria)
+version_metadata = MetaData()
+schema_migrations = Table(
+    'schema_migrations', version_metadata,
+    Column('version', Integer, primary_key=True),
+    Column('description', String(200), nullable=False),
+    Column('applied_at', DateTime, nullable=False, default=datetime.utcnow)
+)
+
+
+class Migration:
+    """Passo versionado do schema: upgrade(conn) aplica, downgrade(conn) desfaz.
+
+    Os passos usam só SQLAlchemy Core com as tabelas refletidas do banco, não
+    os modelos do app, e são idempotentes: num banco novo o create_all já
+    criou o que eles criariam e a migração só registra a versão.
+    """
+
+    def __init__(self, version, description, upgrade, downgrade):
+        self.version = version
+        self.description = description
+        self.upgrade = upgrade
+        self.downgrade = downgrade
+
+
+def _reflect(conn, name):
+    with warnings.catch_warnings():
+        # Os passos só usam as colunas; o SQLite não reflete índices de expressão (uq_cart_items_line)
+        warnings.filterwarnings('ignore', 'Skipped unsupported reflection of expression-based index')
+        return Table(name, MetaData(), autoload_with=conn)
+
+
+def _index_names(conn, table):
+    if conn.dialect.name == 'sqlite':
+        # O inspector do SQLite omite os índices de expressão (uq_cart_items_line)
+        return set(conn.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"), {'table': table}
+        ).scalars())
+    return {index['name'] for index in inspect(conn).get_indexes(table)}
+
+
+def expression_index_migration(version, description, name, table, expressions, unique=False, before=None):
+    """Migração que cria (e no downgrade remove) um índice sobre expressions(tabela refletida); before(conn) prepara os dados"""
+
+    def upgrade(conn):
+        if before is not None:
+            before(conn)
+        if name not in _index_names(conn, table):
+            Index(name, *expressions(_reflect(conn, table)), unique=unique).create(conn)
+
+    def downgrade(conn):
+        if name in _index_names(conn, table):
+            Index(name, *expressions(_reflect(conn, table))).drop(conn)
+
+    return Migration(version, description, upgrade, downgrade)
+
+
+def index_migration(version, name, table, *columns, unique=False, before=None):
+    """Migração que cria (e no downgrade remove) um índice; before(conn) prepara os dados"""
+    kind = 'único' if unique else 'índice'
+    return expression_index_migration(
+        version, f'{kind} {name} em {table}({", ".join(columns)})', name, table,
+        lambda reflected: [reflected.c[column] for column in columns], unique=unique, before=before
+    )
+
+
+def drop_index_migration(version, name, table, *columns, unique=False):
+    """Migração que remove um índice substituído (e no downgrade o recria)"""
+    created = index_migration(version, name, table, *columns, unique=unique)
+    return Migration(version, f'remove {name} de {table}', created.downgrade, created.upgrade)
+
+
+def data_migration(version, description, upgrade):
+    """Migração só de dados: o downgrade não desfaz nada (a tabela, se for o caso, sai na migração que a criou)"""
+    return Migration(version, description, upgrade, lambda conn: None)
+
+
+def table_migration(version, description, name, columns, references=(), after=None):
+    """Migração que cria (e no downgrade remove) uma tabela; columns() devolve colunas e constraints"""
+
+    def upgrade(conn):
+        if not inspect(conn).has_table(name):
+            metadata = MetaData()
+            for referenced in references:  # alvos das chaves estrangeiras
+                Table(referenced, metadata, autoload_with=conn)
+            Table(name, metadata, *columns()).create(conn)
+        if after is not None:
+            after(conn)
+
+    def downgrade(conn):
+        if inspect(conn).has_table(name):
+            _reflect(conn, name).drop(conn)
+
+    return Migration(version, description, upgrade, downgrade)
+
+
+def column_migration(version, table, column, ddl_type, default=None, after=None):
+    """Migração que adiciona (e no downgrade remove) uma coluna: NOT NULL com valor padrão, ou anulável sem default"""
+
+    def upgrade(conn):
+        if column not in {existing['name'] for existing in inspect(conn).get_columns(table)}:
+            constraint = ' NULL' if default is None else f' NOT NULL DEFAULT {default}'
+            conn.exec_driver_sql(f'ALTER TABLE {table} ADD COLUMN {column} {ddl_type}{constraint}')
+        if after is not None:
+            after(conn)
+
+    def downgrade(conn):
+        if column in {existing['name'] for existing in inspect(conn).get_columns(table)}:
+            conn.exec_driver_sql(f'ALTER TABLE {table} DROP COLUMN {column}')
+
+    return Migration(version, f'coluna {table}.{column}', upgrade, downgrade)
+
+
+def _product_variants_columns():
+    return (
+        Column('id', Integer, primary_key=True),
+        Column('product_id', Integer, ForeignKey('products.id'), nullable=False),
+        Column('size', String(10), nullable=False),
+        Column('stock_quantity', Integer, nullable=False, default=0),
+        UniqueConstraint('product_id', 'size', name='uq_product_variants_product_size'),
+        Index('ix_product_variants_size_stock', 'size', 'stock_quantity', 'product_id')
+    )
+
+
+def _dashboard_counters_columns():
+    return (
+        Column('name', String(50), primary_key=True),
+        Column('shard', Integer, primary_key=True, autoincrement=False),
+        Column('value', Numeric(14, 2), nullable=False, default=0)
+    )
+
+
+def _product_sales_columns():
+    return (
+        Column('product_id', Integer, ForeignKey('products.id'), primary_key=True, autoincrement=False),
+        Column('units_sold', Integer, nullable=False, default=0),
+        Column('revenue', Numeric(14, 2), nullable=False, default=0),
+        Index('ix_product_sales_units', 'units_sold')
+    )
+
+
+def _sales_daily_columns():
+    return (
+        Column('day', Date, primary_key=True),
+        Column('order_count', Integer, nullable=False, default=0),
+        Column('total', Numeric(14, 2), nullable=False, default=0)
+    )
+
+
+def _sales_daily_category_columns():
+    return (
+        Column('day', Date, primary_key=True),
+        Column('category_id', Integer, ForeignKey('categories.id'), primary_key=True, autoincrement=False),
+        Column('units', Integer, nullable=False, default=0),
+        Column('total', Numeric(14, 2), nullable=False, default=0)
+    )
+
+
+def _job_watermarks_columns():
+    return (
+        Column('name', String(50), primary_key=True),
+        Column('last_id', Integer, nullable=False, default=0),
+        Column('updated_at', DateTime)
+    )
+
+
+def _jobs_columns():
+    return (
+        Column('id', Integer, primary_key=True),
+        Column('name', String(50), nullable=False),
+        Column('payload', Text, nullable=False),
+        Column('status', String(20), nullable=False, default='queued'),
+        Column('attempts', Integer, nullable=False, default=0),
+        Column('max_attempts', Integer, nullable=False, default=5),
+        Column('dedupe_key', String(100)),
+        Column('run_at', DateTime, nullable=False),
+        Column('locked_by', String(100)),
+        Column('locked_at', DateTime),
+        Column('started_at', DateTime),
+        Column('finished_at', DateTime),
+        Column('last_error', Text),
+        Column('created_at', DateTime),
+        Index('ix_jobs_status_run_at', 'status', 'run_at'),
+        Index('ix_jobs_status_finished_at', 'status', 'finished_at'),
+        Index('ix_jobs_dedupe_key', 'dedupe_key')
+    )
+
+
+def _mark_seed_admin(conn):
+    # O administrador criado pelo init_database passa a ter o papel explícito
+    users = _reflect(conn, 'users')
+    conn.execute(users.update().where(users.c.email == 'admin@sneakerhub.com').values(is_admin=True))
+
+
+def _fill_product_skus(conn):
+    # Produtos cadastrados antes do SKU ganham um código derivado do id (PROD-<id>)
+    products = _reflect(conn, 'products')
+    conn.execute(products.update().where(products.c.sku.is_(None)).values(sku=literal('PROD-') + cast(products.c.id, String)))
+
+
+def _fill_dashboard(conn):
+    # Bancos com histórico: os totais começam recalculados a partir das tabelas
+    aggregates = DashboardAggregates(_reflect(conn, 'dashboard_counters'), _reflect(conn, 'product_sales'))
+    aggregates.rebuild(conn, *(_reflect(conn, name) for name in ('users', 'products', 'orders', 'order_items')))
+
+
+def _release_duplicate_dedupe_keys(conn):
+    # Jobs ativos com a mesma dedupe_key (a checagem antiga só olhava a fila) seguem
+    # na fila, mas só o mais antigo mantém a chave
+    jobs = _reflect(conn, 'jobs')
+    active = jobs.c.status.in_(ACTIVE_STATUSES)
+    for dedupe_key, keep_id in conn.execute(
+        select(jobs.c.dedupe_key, func.min(jobs.c.id))
+        .where(active, jobs.c.dedupe_key.isnot(None))
+        .group_by(jobs.c.dedupe_key)
+        .having(func.count() > 1)
+    ).all():
+        conn.execute(jobs.update().where(active, jobs.c.dedupe_key == dedupe_key, jobs.c.id != keep_id).values(dedupe_key=None))
+
+
+def parse_sizes(size_available):
+    """Tamanhos do size_available (JSON, ou separados por vírgula nos cadastros antigos)"""
+    if not size_available:
+        return []
+    try:
+        sizes = json.loads(size_available)
+    except ValueError:
+        sizes = size_available.split(',')
+    if not isinstance(sizes, list):
+        sizes = [sizes]
+    # Sem repetidos, na ordem do cadastro
+    return list(dict.fromkeys(str(size).strip() for size in sizes if str(size).strip()))
+
+
+def split_stock(total, count):
+    """Dividir o estoque total igualmente entre os tamanhos (a sobra vai para os primeiros)"""
+    base, extra = divmod(total or 0, count)
+    return [base + (1 if index < extra else 0) for index in range(count)]
+
+
+def fill_product_variants(conn, batch_size=1000):
+    """Criar as variantes (produto, tamanho, estoque) a partir do size_available.
+
+    Só mexe em produtos que ainda não têm variantes, então pode rodar de novo
+    sem duplicar nada. A soma do estoque dos tamanhos fica igual ao
+    stock_quantity do produto. Retorna quantos produtos ganharam variantes.
+    """
+    products, variants = _reflect(conn, 'products'), _reflect(conn, 'product_variants')
+    pending = conn.execute(
+        select(products.c.id, products.c.size_available, products.c.stock_quantity)
+        .where(~select(variants.c.id).where(variants.c.product_id == products.c.id).exists())
+    ).all()
+
+    migrated, rows = 0, []
+    for product_id, size_available, stock_quantity in pending:
+        sizes = parse_sizes(size_available)
+        if not sizes:
+            continue
+        rows.extend(
+            {'product_id': product_id, 'size': size, 'stock_quantity': stock}
+            for size, stock in zip(sizes, split_stock(stock_quantity, len(sizes)))
+        )
+        migrated += 1
+        if len(rows) >= batch_size:
+            conn.execute(variants.insert(), rows)
+            rows = []
+    if rows:
+        conn.execute(variants.insert(), rows)
+    return migrated
+
+
+def _cart_line_key(cart_items):
+    # Sem tamanho conta como um tamanho só: NULL nunca repete num índice único
+    return [cart_items.c.user_id, cart_items.c.product_id, func.coalesce(cart_items.c.size, '')]
+
+
+def _merge_duplicate_cart_lines(conn):
+    # Linhas repetidas (mesmo usuário, produto e tamanho) viram uma só, somando as quantidades
+    cart_items = _reflect(conn, 'cart_items')
+    key = (cart_items.c.user_id, cart_items.c.product_id, cart_items.c.size)
+    duplicates = conn.execute(
+        select(*key, func.min(cart_items.c.id), func.sum(cart_items.c.quantity))
+        .group_by(*key)
+        .having(func.count() > 1)
+    ).all()
+    for user_id, product_id, size, keep_id, quantity in duplicates:
+        same_line = (cart_items.c.user_id == user_id) & (cart_items.c.product_id == product_id) & (cart_items.c.size == size)
+        conn.execute(cart_items.delete().where(same_line, cart_items.c.id != keep_id))
+        conn.execute(cart_items.update().where(cart_items.c.id == keep_id).values(quantity=quantity))
+
+
+MIGRATIONS = [
+    table_migration(1, 'tabela product_variants (estoque por tamanho)', 'product_variants',
+                    _product_variants_columns, references=('products',)),
+    index_migration(2, 'ix_products_active_category_price', 'products', 'is_active', 'category_id', 'price'),
+    index_migration(3, 'uq_cart_items_user_product_size', 'cart_items', 'user_id', 'product_id', 'size',
+                    unique=True, before=_merge_duplicate_cart_lines),
+    index_migration(4, 'ix_orders_user_created', 'orders', 'user_id', 'created_at'),
+    index_migration(5, 'ix_order_items_order', 'order_items', 'order_id'),
+    index_migration(6, 'ix_products_updated_at', 'products', 'updated_at'),
+    column_migration(7, 'users', 'is_admin', 'BOOLEAN', 0, after=_mark_seed_admin),
+    table_migration(8, 'tabela dashboard_counters (totais do painel)', 'dashboard_counters', _dashboard_counters_columns),
+    table_migration(9, 'tabela product_sales (vendas por produto)', 'product_sales',
+                    _product_sales_columns, references=('products',), after=_fill_dashboard),
+    index_migration(10, 'ix_products_active_stock', 'products', 'is_active', 'stock_quantity'),
+    table_migration(11, 'tabela sales_daily (vendas por dia)', 'sales_daily', _sales_daily_columns),
+    table_migration(12, 'tabela sales_daily_category (vendas por dia e categoria)', 'sales_daily_category',
+                    _sales_daily_category_columns, references=('categories',)),
+    table_migration(13, 'tabela job_watermarks (marcas d\'água dos jobs)', 'job_watermarks', _job_watermarks_columns),
+    table_migration(14, 'tabela jobs (fila de jobs)', 'jobs', _jobs_columns),
+    column_migration(15, 'products', 'sku', 'VARCHAR(64)', after=_fill_product_skus),
+    index_migration(16, 'uq_products_sku', 'products', 'sku', unique=True),
+    index_migration(17, 'ix_orders_created', 'orders', 'created_at', 'id'),
+    index_migration(18, 'ix_products_active_id', 'products', 'is_active', 'id'),
+    index_migration(19, 'ix_products_active_price', 'products', 'is_active', 'price', 'id'),
+    index_migration(20, 'ix_products_active_created', 'products', 'is_active', 'created_at', 'id'),
+    index_migration(21, 'ix_product_sales_units_product', 'product_sales', 'units_sold', 'product_id'),
+    drop_index_migration(22, 'ix_product_sales_units', 'product_sales', 'units_sold'),
+    index_migration(23, 'ix_jobs_dedupe_status', 'jobs', 'dedupe_key', 'status'),
+    drop_index_migration(24, 'ix_jobs_dedupe_key', 'jobs', 'dedupe_key'),
+    drop_index_migration(25, 'ix_products_updated_at', 'products', 'updated_at'),  # a busca segue as invalidações do catálogo
+    data_migration(26, 'variantes a partir de products.size_available', fill_product_variants),
+    expression_index_migration(27, 'único uq_cart_items_line em cart_items(user_id, product_id, COALESCE(size, \'\'))',
+                               'uq_cart_items_line', 'cart_items', _cart_line_key, unique=True,
+                               before=_merge_duplicate_cart_lines),
+    drop_index_migration(28, 'uq_cart_items_user_product_size', 'cart_items', 'user_id', 'product_id', 'size', unique=True),
+    expression_index_migration(29, 'único uq_jobs_active_dedupe em jobs(dedupe_key dos jobs ativos)',
+                               'uq_jobs_active_dedupe', 'jobs', lambda jobs: [active_dedupe_key(jobs.c.status, jobs.c.dedupe_key)],
+                               unique=True, before=_release_duplicate_dedupe_keys),
+]
+
+
+def current_version(engine):
+    with engine.begin() as conn:
+        schema_migrations.create(conn, checkfirst=True)
+        return conn.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+
+
+def upgrade(engine, target=None, migrations=MIGRATIONS):
+    """Aplicar as migrações pendentes até target (todas se None); retorna as versões aplicadas"""
+    applied = []
+    version = current_version(engine)
+    for migration in migrations:
+        if migration.version <= version or (target is not None and migration.version > target):
+            continue
+        # Uma transação por passo (no MySQL o DDL faz commit implícito de qualquer forma)
+        try:
+            with engine.begin() as conn:
+                migration.upgrade(conn)
+                conn.execute(schema_migrations.insert().values(
+                    version=migration.version, description=migration.description, applied_at=datetime.utcnow()
+                ))
+        except IntegrityError:
+            # Outro processo registrou a mesma versão no meio (os passos são idempotentes)
+            if current_version(engine) < migration.version:
+                raise
+            continue
+        applied.append(migration.version)
+    return applied
+
+
+def downgrade(engine, target, migrations=MIGRATIONS):
+    """Desfazer as migrações acima de target, da mais nova para a mais antiga"""
+    reverted = []
+    version = current_version(engine)
+    for migration in reversed(migrations):
+        if migration.version > version or migration.version <= target:
+            continue
+        with engine.begin() as conn:
+            migration.downgrade(conn)
+            conn.execute(schema_migrations.delete().where(schema_migrations.c.version == migration.version))
+        reverted.append(migration.version)
+    return reverted
@@ -0,0 +1,88 @@
+import os
+import time
+
+# Banco SQLite em memória, isolado do MySQL de desenvolvimento
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+import json
+from flask.json.provider import DefaultJSONProvider
+from app import app, db, Product, Category, PRODUCT_LOAD, catalog_cache
+from databaseutils import init_database
+from jsonprovider import FastJSONProvider
+
+ROUNDS = 200
+
+def legacy_to_dict(product):
+    """Product.to_dict() como era antes: float() e isoformat() campo a campo"""
+    return {
+        'id': product.id,
+        'sku': product.sku,
+        'name': product.name,
+        'description': product.description,
+        'price': float(product.price),
+        'image_url': product.image_url,
+        'stock_quantity': product.stock_quantity,
+        'category': product.category.to_dict() if product.category else None,
+        'brand': product.brand,
+        'size_available': product.size_available,
+        'color': product.color,
+        'is_active': product.is_active,
+        'created_at': product.created_at.isoformat(),
+        'updated_at': product.updated_at.isoformat()
+    }
+
+def seed(count=100):
+    init_database()
+    with app.app_context():
+        category = Category.query.first()
+        for i in range(count):
+            db.session.add(Product(
+                name=f'Tênis Benchmark {i}', price=199.9 + i, stock_quantity=50, category_id=category.id,
+                brand='Marca', color='Preto/Branco', size_available='["38", "39", "40", "41", "42"]',
+                description='Tênis de corrida com amortecimento responsivo, cabedal em mesh respirável e solado de borracha. ' * 3
+            ))
+        db.session.commit()
+
+def timed(function):
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        function()
+    return (time.perf_counter() - started) / ROUNDS * 1000
+
+def bench_serialization():
+    """Tempo para transformar uma página de 100 produtos em bytes JSON"""
+    with app.app_context():
+        products = Product.query.options(*PRODUCT_LOAD).limit(100).all()
+        default_provider = DefaultJSONProvider(app)
+        fast_provider = FastJSONProvider(app)
+
+        before = lambda: default_provider.dumps({'products': [legacy_to_dict(p) for p in products]}).encode()
+        after = lambda: fast_provider._dumps_bytes({'products': [p.to_dict() for p in products]})
+
+        assert json.loads(before()) == json.loads(after())
+        return timed(before), timed(after), len(before()), len(after())
+
+def bench_wire():
+    """Bytes trafegados pela rota real conforme o Accept-Encoding"""
+    catalog_cache.enabled = False
+    client = app.test_client()
+    sizes = {}
+    for encoding in ('identity', 'gzip', 'br'):
+        response = client.get('/api/products?per_page=100', headers={'Accept-Encoding': encoding})
+        assert response.status_code == 200
+        sizes[encoding] = (response.headers.get('Content-Encoding', 'identity'), len(response.get_data()))
+    return sizes
+
+def run_benchmark():
+    print("=== BENCHMARK: JSON E COMPRESSÃO (página de 100 produtos) ===\n")
+    seed()
+
+    before, after, before_size, after_size = bench_serialization()
+    print(f"Serialização antes (float/isoformat + json padrão): {before:.2f} ms, {before_size} bytes")
+    print(f"Serialização depois (FastJSONProvider):            {after:.2f} ms, {after_size} bytes  ({before / after:.1f}x)")
+    print()
+    for requested, (encoding, size) in bench_wire().items():
+        print(f"Accept-Encoding {requested:8} -> {encoding:8} {size:7d} bytes")
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,113 @@
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from datetime import datetime
+
+import loadtest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+MODES = ('threaded', 'gevent')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(base_url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'Servidor saiu com código {process.returncode}')
+        try:
+            with urllib.request.urlopen(f'{base_url}/api/health', timeout=1) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Servidor não respondeu em {timeout}s')
+
+
+def start_server(mode, args, env):
+    """serve.py num processo próprio: o monkey patch do gevent não vaza para este processo"""
+    port = free_port()
+    command = [
+        sys.executable, os.path.join(ROOT, 'serve.py'), '--mode', mode, '--host', '127.0.0.1', '--port', str(port),
+        '--threads', str(args.threads), '--connections', str(args.connections), '--db-latency', str(args.db_latency)
+    ]
+    process = subprocess.Popen(command, env=env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        wait_ready(base_url, process)
+    except RuntimeError:
+        process.kill()
+        print(process.stderr.read().decode(errors='replace')[-2000:])
+        raise
+    return process, base_url
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Vazão por processo: servidor com threads x gevent, mesma carga e mesmo banco')
+    parser.add_argument('--database-url', help='banco dos servidores (padrão: SQLite temporário com seed)')
+    parser.add_argument('--products', type=int, default=200, help='produtos de carga no seed')
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=20, help='segundos de carga por modo')
+    parser.add_argument('--workload', choices=loadtest.WORKLOADS, default='full', help='mistura de operações')
+    parser.add_argument('--threads', type=int, default=8, help='threads do modo threaded')
+    parser.add_argument('--connections', type=int, default=1000, help='greenlets do modo gevent')
+    parser.add_argument('--db-latency', type=float, default=20, help='ms por consulta simulando um banco remoto (0 desliga)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save', help='gravar os resultados em JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = args.database_url or f"sqlite:///{os.path.join(directory, 'benchserve.db')}"
+        env = dict(os.environ, DATABASE_URL=database_url, PYTHONPATH=os.pathsep.join([ROOT, HERE]))
+        # Com o cache do catálogo quase nada iria ao banco: aqui se compara a espera de I/O, não o cache
+        env.setdefault('CATALOG_CACHE_MAXSIZE', '1')
+        subprocess.run([sys.executable, '-c', f'import loadtest; loadtest.seed({args.products})'],
+                       env=env, cwd=HERE, check=True, stdout=subprocess.DEVNULL)
+
+        print(f"=== VAZÃO POR PROCESSO: {args.clients} clientes, {args.duration:g}s, carga {args.workload}, "
+              f"latência do banco {args.db_latency:g} ms ===\n")
+        results = {}
+        for mode in MODES:
+            process, base_url = start_server(mode, args, env)
+            try:
+                results[mode] = loadtest.run(base_url, args.clients, args.duration, args.seed, loadtest.WORKLOADS[args.workload])
+            finally:
+                process.terminate()
+                process.wait(timeout=10)
+            label = f'{args.threads} threads' if mode == 'threaded' else f'gevent, {args.connections} conexões'
+            print(f"--- {mode} ({label}) ---")
+            loadtest.print_report(results[mode])
+            print()
+
+    threaded, cooperative = (results[mode]['total']['rps'] for mode in MODES)
+    speedup = cooperative / threaded if threaded else float('inf')
+    print(f"gevent: {cooperative} req/s x threaded: {threaded} req/s ({speedup:.2f}x)")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump({
+                'results': results, 'speedup': round(speedup, 2),
+                'config': dict(vars(args), recorded_at=datetime.utcnow().isoformat())
+            }, file, indent=2, ensure_ascii=False)
+        print(f"Resultados gravados em {args.save}")
+    return 0 if speedup > 1 else 1
+
+
+if __name__ == '__main__':
+    # python benchserve.py [--clients 100] [--duration 20] [--threads 8] [--db-latency 20] [--database-url mysql+pymysql://...]
+    sys.exit(main())
@@ -1,12 +1,19 @@
-from app import app, db, User, Category, Product, CartItem, Order, OrderItem
+from app import app, db, dashboard, dashboard_tables, export_catalog, export_orders, import_catalog, sales_rollup, sales_rollup_tables, User, Category, Product, ProductVariant, CartItem, Order, OrderItem
 from werkzeug.security import generate_password_hash
+from migrations import MIGRATIONS, current_version, downgrade, fill_product_variants, parse_sizes, schema_migrations, upgrade
+from catalogio import detect_format
+from orderexport import parse_order_filters
+from syntheticdata import SyntheticCatalog
 import json
+import sys
+import time
 
 def init_database():
     """Inicializar o banco de dados com dados básicos"""
     with app.app_context():
-        # Criar todas as tabelas
+        # Criar todas as tabelas e aplicar as migrações pendentes
         db.create_all()
+        upgrade(db.engine)
         
         # Verificar se já existem dados
         if Category.query.count() > 0:
@@ -34,6 +41,7 @@ def init_database():
         # Criar produtos
         products_data = [
             {
+                'sku': 'NK-AIRMAX-REV',
                 'name': 'Air Max Revolution',
                 'description': 'Tênis de corrida com tecnologia de amortecimento avançada. Ideal para longas distâncias com máximo conforto.',
                 'price': 299.99,
@@ -45,6 +53,7 @@ def init_database():
                 'color': 'Azul/Branco'
             },
             {
+                'sku': 'AD-URBAN-CLS',
                 'name': 'Urban Classic',
                 'description': 'Tênis casual urbano com design minimalista. Perfeito para o dia a dia com estilo e conforto.',
                 'price': 199.99,
@@ -56,6 +65,7 @@ def init_database():
                 'color': 'Branco'
             },
             {
+                'sku': 'PM-SPORT-ELT',
                 'name': 'Sport Pro Elite',
                 'description': 'Tênis esportivo profissional para alta performance. Desenvolvido para atletas exigentes.',
                 'price': 399.99,
@@ -67,6 +77,7 @@ def init_database():
                 'color': 'Preto/Vermelho'
             },
             {
+                'sku': 'AS-RUNNER-CHC',
                 'name': 'Runner\'s Choice',
                 'description': 'Tênis de corrida leve com mesh respirável. Tecnologia de ventilação superior.',
                 'price': 249.99,
@@ -78,6 +89,7 @@ def init_database():
                 'color': 'Cinza/Verde'
             },
             {
+                'sku': 'VN-STREET-STY',
                 'name': 'Street Style',
                 'description': 'Tênis casual com design street wear moderno. Para quem busca estilo urbano.',
                 'price': 179.99,
@@ -89,6 +101,7 @@ def init_database():
                 'color': 'Preto'
             },
             {
+                'sku': 'RB-ATHL-FRC',
                 'name': 'Athletic Force',
                 'description': 'Tênis para treino atlético e cross training. Estabilidade e resistência garantidas.',
                 'price': 349.99,
@@ -110,20 +123,158 @@ def init_database():
             name='Administrador',
             email='admin@sneakerhub.com',
             phone='(11) 99999-9999',
-            address='Rua das Sneakers, 123 - São Paulo, SP'
+            address='Rua das Sneakers, 123 - São Paulo, SP',
+            is_admin=True
         )
         admin_user.set_password('admin123')
         db.session.add(admin_user)
         
         db.session.commit()
+        migrate_product_variants()
         print("Banco de dados inicializado com sucesso!")
 
+def migrate_product_variants():
+    """Criar as variantes dos produtos cadastrados sem elas (a migração 26 faz o mesmo nos bancos existentes)"""
+    with app.app_context():
+        with db.engine.begin() as conn:
+            migrated = fill_product_variants(conn)
+        print(f"Variantes criadas para {migrated} produto(s)")
+
 def reset_database():
     """Resetar o banco de dados"""
     with app.app_context():
         db.drop_all()
+        schema_migrations.drop(db.engine, checkfirst=True)
         db.create_all()
+        upgrade(db.engine)
         print("Banco de dados resetado!")
 
+def migrate(target=None):
+    """Aplicar as migrações pendentes (até a versão target, se informada)"""
+    with app.app_context():
+        applied = upgrade(db.engine, target)
+        for version in applied:
+            print(f"Migração {version} aplicada")
+        print(f"Schema na versão {current_version(db.engine)}")
+
+def rollback(target):
+    """Desfazer as migrações acima da versão target"""
+    with app.app_context():
+        for version in downgrade(db.engine, target):
+            print(f"Migração {version} desfeita")
+        print(f"Schema na versão {current_version(db.engine)}")
+
+def rebuild_dashboard():
+    """Recalcular do zero os totais do painel e conferir o resultado"""
+    with app.app_context():
+        with db.engine.begin() as conn:
+            counters = dashboard.rebuild(conn, *dashboard_tables())
+        print(f"Totais recalculados: {counters}")
+        
+        with db.engine.connect() as conn:
+            differences = dashboard.verify(conn, *dashboard_tables())
+        for key, stored, expected in differences:
+            print(f"❌ {key}: mantido {stored}, esperado {expected}")
+        if not differences:
+            print("✅ Totais do painel conferem com as tabelas")
+        return not differences
+
+def rollup_sales(interval=None):
+    """Agregar os pedidos novos nos rollups de vendas (em loop a cada interval segundos, se informado)"""
+    with app.app_context():
+        while True:
+            processed = sales_rollup.run(db.engine, *sales_rollup_tables())
+            print(f"Rollup de vendas: {processed} pedido(s) agregados")
+            if interval is None:
+                return processed
+            time.sleep(interval)
+
+def rebuild_sales():
+    """Refazer os rollups de vendas a partir de todo o histórico de pedidos"""
+    with app.app_context():
+        processed = sales_rollup.rebuild(db.engine, *sales_rollup_tables())
+        print(f"Rollups de vendas refeitos: {processed} pedido(s)")
+        return processed
+
+def generate_data(users=1000, products=500, orders=5000, seed=42):
+    """Gerar usuários, produtos e pedidos sintéticos em volume (determinístico pela semente).
+
+    Senha de todos os usuários gerados: sintetico123. Os totais do painel
+    são recalculados no fim; o rollup de vendas fica para o rollup-sales.
+    """
+    with app.app_context():
+        db.create_all()
+        upgrade(db.engine)
+        tables = {model.__tablename__: model.__table__ for model in (User, Category, Product, ProductVariant, Order, OrderItem)}
+        generator = SyntheticCatalog(
+            tables, seed=seed,
+            password_hash=generate_password_hash('sintetico123', app.config['PASSWORD_HASH_METHOD'])
+        )
+        counts = generator.generate(db.engine, users=users, products=products, orders=orders)
+    rebuild_dashboard()
+    return counts
+
+def import_catalog_file(path, fmt=None):
+    """Importar produtos de um CSV/NDJSON (upsert por SKU, em blocos)"""
+    with app.app_context(), open(path, 'rb') as file:
+        report = import_catalog(file, fmt or detect_format(path))
+    print(f"Linhas: {report['rows']} | criados: {report['created']} | atualizados: {report['updated']} | com erro: {report['failed']}")
+    for error in report['errors']:
+        print(f"❌ linha {error['line']} ({error['sku'] or 'sem SKU'}): {error['error']}")
+    return report
+
+def export_catalog_file(path, fmt=None):
+    """Exportar o catálogo para CSV/NDJSON sem carregar a tabela inteira"""
+    with app.app_context(), open(path, 'w', encoding='utf-8', newline='') as file:
+        for chunk in export_catalog(fmt or detect_format(path)):
+            file.write(chunk)
+    print(f"Catálogo exportado para {path}")
+
+def export_orders_file(path, start=None, end=None, status=None, fmt=None):
+    """Exportar os pedidos com itens para CSV/NDJSON, em lotes, com filtro de período e status"""
+    filters = parse_order_filters(start, end, status)
+    with app.app_context(), open(path, 'w', encoding='utf-8', newline='') as file:
+        for chunk in export_orders(fmt or detect_format(path), **filters):
+            file.write(chunk)
+    print(f"Pedidos exportados para {path}")
+
+def migration_status():
+    with app.app_context():
+        version = current_version(db.engine)
+        for migration in MIGRATIONS:
+            mark = 'x' if migration.version <= version else ' '
+            print(f"[{mark}] {migration.version}: {migration.description}")
+
 if __name__ == '__main__':
-    init_database()
+    # python databaseutils.py [init | migrate [versão] | downgrade <versão> | status | reset | rebuild-dashboard
+    #                        | rollup-sales [intervalo] | rebuild-sales | import-catalog <arquivo> [formato]
+    #                        | export-catalog <arquivo> [formato] | generate [usuários] [produtos] [pedidos] [semente]
+    #                        | export-orders <arquivo> [início] [fim] [status,...]]  ('-' deixa o filtro em branco)
+    command = sys.argv[1] if len(sys.argv) > 1 else 'init'
+    if command == 'migrate':
+        migrate(int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    elif command == 'downgrade':
+        rollback(int(sys.argv[2]))
+    elif command == 'status':
+        migration_status()
+    elif command == 'reset':
+        reset_database()
+    elif command == 'rebuild-dashboard':
+        sys.exit(0 if rebuild_dashboard() else 1)
+    elif command == 'rollup-sales':
+        rollup_sales(int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    elif command == 'rebuild-sales':
+        rebuild_sales()
+    elif command == 'import-catalog':
+        report = import_catalog_file(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+        sys.exit(1 if report['failed'] else 0)
+    elif command == 'generate':
+        volumes = [int(value) for value in sys.argv[2:6]]
+        init_database()
+        generate_data(*volumes)
+    elif command == 'export-catalog':
+        export_catalog_file(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else None)
+    elif command == 'export-orders':
+        export_orders_file(sys.argv[2], *[None if value == '-' else value for value in sys.argv[3:6]])
+    else:
+        init_database()
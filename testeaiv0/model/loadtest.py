@@ -0,0 +1,300 @@
+import argparse
+import http.client
+import json
+import logging
+import math
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+# Mistura de operações de um cliente da loja: {operação: peso}
+WORKLOAD = {
+    'products_list': 30,
+    'product_detail': 25,
+    'categories': 5,
+    'search': 20,
+    'cart_add': 15,
+    'checkout': 5,
+}
+# Só navegação no catálogo, sem escritas
+BROWSE_WORKLOAD = {operation: weight for operation, weight in WORKLOAD.items() if operation not in ('cart_add', 'checkout')}
+WORKLOADS = {'full': WORKLOAD, 'browse': BROWSE_WORKLOAD}
+SEARCH_TERMS = ('carga', 'corrida', 'nike', 'casual', 'preto', 'runner')
+SEED_STOCK = 1_000_000  # estoque alto: o checkout mede o caminho feliz, não a falta de estoque
+
+
+def percentile(values, p):
+    """Percentil pelo método do posto mais próximo (values já ordenado)"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(math.ceil(p / 100 * len(values)) - 1, 0))]
+
+
+def seed(products):
+    """Banco local com o catálogo base mais produtos de carga e estoque de sobra"""
+    from app import app, db, Category, Product, ProductVariant
+    from databaseutils import init_database, migrate_product_variants
+
+    init_database()
+    with app.app_context():
+        existing = Product.query.filter(Product.name.like('Tênis Carga %')).count()
+        categories = Category.query.order_by(Category.id).all()
+        for i in range(existing, products):
+            db.session.add(Product(
+                name=f'Tênis Carga {i}', price=149.9 + i % 300, stock_quantity=SEED_STOCK,
+                category_id=categories[i % len(categories)].id, brand=('Nike', 'Adidas', 'Puma', 'Asics')[i % 4],
+                color=('Preto', 'Branco', 'Azul')[i % 3], size_available='["38", "39", "40", "41", "42"]',
+                description=f'Tênis de {categories[i % len(categories)].name.lower()} para teste de carga, modelo {i}.'
+            ))
+        db.session.commit()
+        migrate_product_variants()
+        ProductVariant.query.update({'stock_quantity': SEED_STOCK})
+        Product.query.update({'stock_quantity': SEED_STOCK})
+        db.session.commit()
+
+
+def start_server(args):
+    """Subir o app num servidor WSGI com threads, numa porta livre"""
+    os.environ['DATABASE_URL'] = args.database_url
+    from werkzeug.serving import make_server
+    from app import app
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # sem uma linha de log por requisição
+
+    if not args.no_seed:
+        seed(args.products)
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+class Client:
+    """Um cliente da loja com conexão própria (keep-alive quando o servidor permite)"""
+
+    def __init__(self, base_url, timeout=30):
+        url = urlsplit(base_url)
+        self.prefix = url.path.rstrip('/')
+        connection = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+        self.connection = connection(url.hostname, url.port, timeout=timeout)
+        self.headers = {'Content-Type': 'application/json', 'Accept-Encoding': 'gzip, br'}
+
+    def request(self, method, path, body=None):
+        """Retorna (status, json ou None, segundos)"""
+        started = time.perf_counter()
+        try:
+            self.connection.request(method, self.prefix + path, body=json.dumps(body) if body is not None else None,
+                                    headers=self.headers)
+            response = self.connection.getresponse()
+            data = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            return 0, None, time.perf_counter() - started
+        elapsed = time.perf_counter() - started
+        if response.getheader('Content-Encoding'):
+            return status, None, elapsed  # corpo comprimido: o cliente mede, não lê
+        try:
+            return status, json.loads(data) if data else None, elapsed
+        except ValueError:
+            return status, None, elapsed
+
+
+def catalog(base_url):
+    """Ids e tamanhos dos produtos ativos (fora da medição)"""
+    client = Client(base_url)
+    client.headers.pop('Accept-Encoding')
+    products, page = [], 1
+    while True:
+        status, data, _ = client.request('GET', f'/api/products?page={page}&per_page=100')
+        if status != 200:
+            raise RuntimeError(f'Catálogo indisponível: HTTP {status}')
+        products += [(product['id'], json.loads(product['size_available'] or '[]')) for product in data['products']]
+        if page >= data['pages']:
+            return [(product_id, sizes) for product_id, sizes in products if sizes]
+        page += 1
+
+
+def virtual_user(index, base_url, products, window, results, seed_value, run_id, workload=WORKLOAD):
+    rng = random.Random(seed_value * 1000 + index)
+    client = Client(base_url)
+    client.headers.pop('Accept-Encoding')
+    for attempt in range(60):
+        status, data, _ = client.request('POST', '/api/auth/register', {
+            'name': f'Carga {index}', 'email': f'carga-{run_id}-{index}@teste.com', 'password': 'carga123'
+        })
+        if status != 503:
+            break
+        time.sleep(1)  # fila do hash de senhas cheia (Retry-After): muitos clientes se cadastrando juntos
+    window['start'].wait()  # todos começam juntos, já logados; o prazo é definido na barreira
+    if status != 201:
+        results.append(('register', status, 0.0))
+        return
+    client.headers['Authorization'] = f"Bearer {data['access_token']}"
+    client.headers['Accept-Encoding'] = 'gzip, br'
+
+    operations, weights = zip(*workload.items())
+    pages = max(len(products) // 12, 1)
+    in_cart = 0
+    while time.perf_counter() < window['deadline']:
+        operation = rng.choices(operations, weights)[0]
+        if operation == 'checkout' and not in_cart:
+            operation = 'cart_add'
+        product_id, sizes = rng.choice(products)
+
+        if operation == 'products_list':
+            status, _, elapsed = client.request('GET', f'/api/products?page={rng.randint(1, pages)}')
+        elif operation == 'product_detail':
+            status, _, elapsed = client.request('GET', f'/api/products/{product_id}')
+        elif operation == 'categories':
+            status, _, elapsed = client.request('GET', '/api/categories')
+        elif operation == 'search':
+            status, _, elapsed = client.request('GET', f'/api/products?search={rng.choice(SEARCH_TERMS)}')
+        elif operation == 'cart_add':
+            status, _, elapsed = client.request('POST', '/api/cart/add', {
+                'product_id': product_id, 'quantity': 1, 'size': rng.choice(sizes)
+            })
+            in_cart += status == 201
+        else:
+            status, _, elapsed = client.request('POST', '/api/orders', {'shipping_address': 'Rua da Carga, 1'})
+            if status == 201:
+                in_cart = 0
+        results.append((operation, status, elapsed))
+
+
+def run(base_url, clients, duration, seed_value, workload=WORKLOAD):
+    """Rodar a carga e resumir por operação: latências em ms, req/s e erros"""
+    products = catalog(base_url)
+    run_id = datetime.utcnow().strftime('%Y%m%d%H%M%S%f')
+    window = {}
+
+    def open_window():
+        window['started'] = time.perf_counter()
+        window['deadline'] = window['started'] + duration
+
+    window['start'] = threading.Barrier(clients, action=open_window)
+    per_client = [[] for _ in range(clients)]
+    threads = [
+        threading.Thread(
+            target=virtual_user, args=(i, base_url, products, window, per_client[i], seed_value, run_id, workload), daemon=True
+        )
+        for i in range(clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - window['started']
+
+    samples = {}
+    for results in per_client:
+        for operation, status, seconds in results:
+            samples.setdefault(operation, []).append((status, seconds))
+
+    summary = {}
+    for operation, rows in sorted(samples.items()):
+        latencies = sorted(seconds * 1000 for status, seconds in rows)
+        errors = sum(1 for status, seconds in rows if not 200 <= status < 300)
+        summary[operation] = {
+            'requests': len(rows),
+            'errors': errors,
+            'error_rate': round(errors / len(rows), 4),
+            'rps': round(len(rows) / elapsed, 2),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'max_ms': round(latencies[-1], 2)
+        }
+    total = sum(row['requests'] for row in summary.values())
+    return {
+        'total': {'requests': total, 'rps': round(total / elapsed, 2), 'seconds': round(elapsed, 2)},
+        'operations': summary
+    }
+
+
+def compare(result, baseline, tolerance):
+    """Regressões em relação à baseline: p95 maior, req/s menor ou mais erros que a tolerância"""
+    regressions = []
+    for operation, before in baseline['operations'].items():
+        after = result['operations'].get(operation)
+        if after is None:
+            regressions.append(f'{operation}: ausente nesta execução')
+            continue
+        if after['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{operation}: p95 {before['p95_ms']} -> {after['p95_ms']} ms")
+        if after['rps'] < before['rps'] * (1 - tolerance):
+            regressions.append(f"{operation}: {before['rps']} -> {after['rps']} req/s")
+        if after['error_rate'] > before['error_rate'] + 0.01:
+            regressions.append(f"{operation}: erros {before['error_rate']:.2%} -> {after['error_rate']:.2%}")
+    return regressions
+
+
+def print_report(result):
+    print(f"{'operação':16} {'req':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'erros':>6}")
+    for operation, row in result['operations'].items():
+        print(f"{operation:16} {row['requests']:7d} {row['rps']:8.1f} {row['p50_ms']:8.1f} {row['p95_ms']:8.1f} "
+              f"{row['p99_ms']:8.1f} {row['errors']:6d}")
+    total = result['total']
+    print(f"\nTotal: {total['requests']} requisições em {total['seconds']}s ({total['rps']} req/s)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Teste de carga da API com clientes concorrentes')
+    parser.add_argument('--url', help='API já rodando (ex.: http://localhost:5000); sem isso o app sobe aqui')
+    parser.add_argument('--database-url', help='banco do app local (padrão: SQLite temporário)')
+    parser.add_argument('--products', type=int, default=200, help='produtos de carga no seed')
+    parser.add_argument('--no-seed', action='store_true', help='usar o banco como está')
+    parser.add_argument('--clients', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=30, help='segundos de carga')
+    parser.add_argument('--seed', type=int, default=42, help='semente da mistura de operações')
+    parser.add_argument('--workload', choices=WORKLOADS, default='full', help='mistura de operações')
+    parser.add_argument('--save', help='gravar o resultado como baseline JSON')
+    parser.add_argument('--baseline', help='comparar com uma baseline JSON e falhar se regredir')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='folga da comparação (0.2 = 20%%)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = None
+    with tempfile.TemporaryDirectory() as directory:
+        base_url = args.url
+        if base_url is None:
+            args.database_url = args.database_url or f"sqlite:///{os.path.join(directory, 'loadtest.db')}"
+            server, base_url = start_server(args)
+
+        print(f"=== TESTE DE CARGA: {args.clients} clientes, {args.duration:g}s contra {base_url} ===\n")
+        try:
+            result = run(base_url, args.clients, args.duration, args.seed, WORKLOADS[args.workload])
+        finally:
+            if server is not None:
+                server.shutdown()
+    result['config'] = {
+        'clients': args.clients, 'duration': args.duration, 'seed': args.seed, 'workload': WORKLOADS[args.workload],
+        'target': args.url or urlsplit(args.database_url).scheme, 'recorded_at': datetime.utcnow().isoformat()
+    }
+    print_report(result)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump(result, file, indent=2, ensure_ascii=False)
+        print(f"Baseline gravada em {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            regressions = compare(result, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"❌ {regression}")
+        if regressions:
+            return 1
+        print(f"✅ Sem regressões acima de {args.tolerance:.0%} em relação a {args.baseline}")
+    return 0
+
+
+if __name__ == '__main__':
+    # python loadtest.py [--clients 20] [--duration 30] [--save base.json] [--baseline base.json] [--url http://...]
+    sys.exit(main())
@@ -0,0 +1,236 @@
+import itertools
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import func, select
+
+BRANDS = ('Nike', 'Adidas', 'Puma', 'Asics', 'Vans', 'Reebok', 'New Balance', 'Mizuno', 'Olympikus', 'Fila')
+MODELS = ('Air', 'Ultra', 'Gel', 'Classic', 'Street', 'Runner', 'Pro', 'Force', 'Wave', 'Boost', 'Zoom', 'Flex')
+SUFFIXES = ('Revolution', 'Elite', 'Lite', 'Max', 'Prime', 'Trail', 'Court', 'Retro', 'Evo', 'Knit')
+COLORS = ('Preto', 'Branco', 'Azul', 'Cinza', 'Vermelho', 'Verde', 'Preto/Branco', 'Azul/Branco', 'Bege', 'Rosa')
+SIZES = tuple(str(size) for size in range(34, 47))
+FIRST_NAMES = ('Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Heitor', 'Isabela', 'João',
+               'Larissa', 'Mateus', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sofia', 'Thiago', 'Vitória', 'Yuri')
+LAST_NAMES = ('Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa', 'Rodrigues', 'Almeida', 'Nascimento')
+CITIES = ('São Paulo, SP', 'Rio de Janeiro, RJ', 'Belo Horizonte, MG', 'Curitiba, PR', 'Porto Alegre, RS',
+          'Salvador, BA', 'Recife, PE', 'Fortaleza, CE', 'Goiânia, GO', 'Campinas, SP')
+
+# Distribuições dos pedidos: itens por pedido e quantidade por item ({valor: peso})
+ITEMS_PER_ORDER = {1: 55, 2: 25, 3: 12, 4: 5, 5: 3}
+QUANTITY = {1: 85, 2: 12, 3: 3}
+PAYMENT_METHODS = {'credit_card': 60, 'pix': 30, 'boleto': 10}
+CENTS = Decimal('0.01')
+
+
+def zipf_weights(count, exponent):
+    """Pesos acumulados de uma Zipf: o item de posição k pesa 1/k^exponent"""
+    return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+def batched(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class SyntheticCatalog:
+    """Gerador determinístico de usuários, produtos e pedidos em volume de produção.
+
+    Tudo sai de random.Random(seed): a mesma semente e os mesmos volumes
+    geram os mesmos dados. Popularidade é enviesada (Zipf): poucos produtos
+    e clientes concentram a maior parte dos pedidos, como numa loja real.
+    Os pedidos saem em ordem de created_at, então o id cresce com o tempo
+    (o rollup de vendas depende disso). As linhas são gravadas com INSERT
+    em massa (executemany), um commit por lote de batch_size.
+    """
+
+    def __init__(self, tables, seed=42, batch_size=10000, until=datetime(2026, 1, 1), days=365,
+                 product_skew=1.1, user_skew=0.8, password_hash=None, log=print):
+        self.tables = tables  # nome -> Table: users, categories, products, product_variants, orders, order_items
+        self.seed = seed
+        self.batch_size = batch_size
+        self.until = until
+        self.days = days
+        self.product_skew = product_skew
+        self.user_skew = user_skew
+        self.password_hash = password_hash
+        self.log = log
+
+    def _rng(self, name):
+        # Uma sequência por tabela: mudar o volume de uma não altera as outras
+        return random.Random(f'{self.seed}:{name}')
+
+    @staticmethod
+    def _next_id(conn, table):
+        return (conn.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+    def _insert(self, engine, name, rows, child=None):
+        """Gravar em lotes; com child, rows gera (linha, [linhas filhas]) e as filhas vão no mesmo commit"""
+        table = self.tables[name]
+        started, counts = time.perf_counter(), {name: 0}
+        if child is not None:
+            counts[child] = 0
+        for batch in batched(rows, self.batch_size):
+            with engine.begin() as conn:
+                if child is None:
+                    conn.execute(table.insert(), batch)
+                else:
+                    children = [row for parent, rows in batch for row in rows]
+                    conn.execute(table.insert(), [parent for parent, rows in batch])
+                    if children:
+                        conn.execute(self.tables[child].insert(), children)
+                    counts[child] += len(children)
+            counts[name] += len(batch)
+        elapsed = time.perf_counter() - started
+        total = sum(counts.values())
+        self.log(f"{' + '.join(counts)}: {' + '.join(map(str, counts.values()))} linha(s) em {elapsed:.1f}s "
+                 f"({total / elapsed if elapsed else 0:.0f}/s)")
+        return counts
+
+    def users(self, start_id, count):
+        rng = self._rng('users')
+        first = self.until - timedelta(days=self.days * 2)
+        for offset in range(count):
+            user_id = start_id + offset
+            name = f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+            yield {
+                'id': user_id,
+                'name': name,
+                'email': f'sintetico-{self.seed}-{offset}@teste.com',
+                'password_hash': self.password_hash,
+                'phone': f'(11) 9{rng.randrange(10 ** 7, 10 ** 8)}',
+                'address': f'Rua {rng.choice(LAST_NAMES)}, {rng.randint(1, 3000)} - {rng.choice(CITIES)}',
+                'is_admin': False,
+                # Cadastros espalhados no período anterior ao dos pedidos
+                'created_at': first + timedelta(seconds=self.days * 86400 * offset / count),
+            }
+
+    def products(self, start_id, count, category_ids):
+        rng = self._rng('products')
+        created = self.until - timedelta(days=self.days)
+        for offset in range(count):
+            product_id = start_id + offset
+            brand = rng.choice(BRANDS)
+            first_size = rng.randrange(0, 5)
+            sizes = SIZES[first_size:first_size + rng.randint(5, 9)]
+            # Preços log-normais: a maioria entre 150 e 500, com cauda de modelos caros
+            price = Decimal(str(min(max(rng.lognormvariate(5.6, 0.45), 59.9), 2999.9))).quantize(CENTS)
+            stock = {size: rng.randint(0, 60) for size in sizes}
+            yield {
+                'id': product_id,
+                'sku': f'SYN-{self.seed}-{offset:07d}',
+                'name': f'{brand} {rng.choice(MODELS)} {rng.choice(SUFFIXES)} {offset}',
+                'description': f'Tênis {brand} gerado para testes de escala, modelo {offset}.',
+                'price': price,
+                'image_url': '/placeholder.svg?height=200&width=200',
+                'stock_quantity': sum(stock.values()),
+                'category_id': rng.choice(category_ids),
+                'brand': brand,
+                'size_available': json.dumps(list(sizes)),
+                'color': rng.choice(COLORS),
+                'is_active': rng.random() > 0.03,
+                'created_at': created,
+                'updated_at': created,
+            }, stock
+
+    def orders(self, start_order_id, start_item_id, count, user_ids, products):
+        """Pedidos e itens; products é [(id, preço, tamanhos)] na ordem de popularidade sorteada"""
+        rng = self._rng('orders')
+        product_weights = zipf_weights(len(products), self.product_skew)
+        user_weights = zipf_weights(len(user_ids), self.user_skew)
+        shuffled_users = list(user_ids)
+        rng.shuffle(shuffled_users)
+        item_counts, item_weights = zip(*ITEMS_PER_ORDER.items())
+        quantities, quantity_weights = zip(*QUANTITY.items())
+        methods, method_weights = zip(*PAYMENT_METHODS.items())
+        first = self.until - timedelta(days=self.days)
+        span = self.days * 86400
+
+        item_id = start_item_id
+        for offset in range(count):
+            order_id = start_order_id + offset
+            # Tempo crescente com o id, com um pouco de ruído dentro do passo
+            created_at = first + timedelta(seconds=span * (offset + rng.random() * 0.99) / count)
+            age = (self.until - created_at).days
+            status = 'delivered' if age > 10 else rng.choice(('pending', 'confirmed', 'shipped', 'delivered'))
+            if rng.random() < 0.02:
+                status = 'cancelled'
+
+            chosen = {}
+            for index in rng.choices(range(len(products)), cum_weights=product_weights, k=rng.choices(item_counts, item_weights)[0]):
+                chosen.setdefault(index, rng.choices(quantities, quantity_weights)[0])
+            items = []
+            total = Decimal('0.00')
+            for index, quantity in chosen.items():
+                product_id, price, sizes = products[index]
+                items.append({
+                    'id': item_id, 'order_id': order_id, 'product_id': product_id,
+                    'quantity': quantity, 'price': price, 'size': rng.choice(sizes)
+                })
+                item_id += 1
+                total += price * quantity
+
+            user_id = shuffled_users[rng.choices(range(len(shuffled_users)), cum_weights=user_weights)[0]]
+            yield {
+                'id': order_id,
+                'user_id': user_id,
+                'total_amount': total,
+                'status': status,
+                'payment_method': rng.choices(methods, method_weights)[0],
+                'payment_status': 'refunded' if status == 'cancelled' else 'paid',
+                'shipping_address': f'Rua {rng.choice(LAST_NAMES)}, {rng.randint(1, 3000)} - {rng.choice(CITIES)}',
+                'created_at': created_at,
+                'updated_at': created_at,
+            }, items
+
+    def generate(self, engine, users=1000, products=500, orders=5000):
+        """Gravar os volumes pedidos; retorna {tabela: linhas inseridas}"""
+        tables = self.tables
+        with engine.connect() as conn:
+            category_ids = list(conn.execute(select(tables['categories'].c.id).order_by(tables['categories'].c.id)).scalars())
+            if not category_ids:
+                raise ValueError('Nenhuma categoria: rode o init antes de gerar dados')
+            exists = conn.execute(select(tables['users'].c.id).where(
+                tables['users'].c.email == f'sintetico-{self.seed}-0@teste.com')).first()
+            if exists is not None:
+                raise ValueError(f'Já existem dados gerados com a semente {self.seed}: use outra semente ou reset')
+            user_start = self._next_id(conn, tables['users'])
+            product_start = self._next_id(conn, tables['products'])
+            variant_start = self._next_id(conn, tables['product_variants'])
+            order_start = self._next_id(conn, tables['orders'])
+            item_start = self._next_id(conn, tables['order_items'])
+
+        if orders and not (users and products):
+            raise ValueError('Pedidos precisam de usuários e produtos gerados na mesma execução')
+
+        counts = self._insert(engine, 'users', self.users(user_start, users))
+
+        catalog = []
+
+        def product_rows():
+            variant_id = itertools.count(variant_start)
+            for row, stock in self.products(product_start, products, category_ids):
+                if row['is_active']:
+                    catalog.append((row['id'], row['price'], list(stock)))
+                yield row, [
+                    {'id': next(variant_id), 'product_id': row['id'], 'size': size, 'stock_quantity': quantity}
+                    for size, quantity in stock.items()
+                ]
+
+        counts.update(self._insert(engine, 'products', product_rows(), child='product_variants'))
+        if orders:
+            # Popularidade sorteada, não pela ordem do id
+            self._rng('popularity').shuffle(catalog)
+            counts.update(self._insert(
+                engine, 'orders', self.orders(order_start, item_start, orders, range(user_start, user_start + users), catalog),
+                child='order_items'
+            ))
+        return counts
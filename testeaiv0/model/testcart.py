@@ -0,0 +1,177 @@
+import os
+
+# Banco SQLite em memória, isolado do MySQL de desenvolvimento
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+import app as app_module
+from app import app, db
+from flask_jwt_extended import decode_token
+from cartstore import CartLine, KeyValueCartStore, MemoryKVBackend, SqlCartStore
+from databaseutils import init_database
+
+app.config['TESTING'] = True
+app.config['QUERY_BUDGET_ENFORCE'] = True
+
+def get_headers(client, email='carrinho@teste.com'):
+    response = client.post('/api/auth/register', json={
+        'name': 'Cliente Carrinho',
+        'email': email,
+        'password': '123456'
+    })
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+def test_batch_operations(client, headers, product_ids):
+    """Restaurar um carrinho salvo com uma requisição"""
+    response = client.post('/api/cart/batch', json={'operations': [
+        {'op': 'add', 'product_id': product_id, 'quantity': 2, 'size': '40'}
+        for product_id in product_ids
+    ] + [
+        {'op': 'add', 'product_id': product_ids[0], 'quantity': 1, 'size': '40'}
+    ]}, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    cart = response.get_json()
+    assert cart['count'] == len(product_ids)
+    assert cart['cart_items'][0]['quantity'] == 3
+
+    items = cart['cart_items']
+    response = client.post('/api/cart/batch', json={'operations': [
+        {'op': 'update', 'item_id': items[0]['id'], 'quantity': 1},
+        {'op': 'remove', 'item_id': items[1]['id']},
+        {'op': 'update', 'item_id': items[2]['id'], 'quantity': 0}
+    ]}, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    cart = response.get_json()
+    assert cart['count'] == len(product_ids) - 2
+    assert cart['cart_items'][0]['quantity'] == 1
+    assert cart == client.get('/api/cart', headers=headers).get_json()
+
+def test_batch_is_atomic(client, headers, product_ids):
+    """Uma operação inválida impede todas as outras"""
+    before = client.get('/api/cart', headers=headers).get_json()
+
+    response = client.post('/api/cart/batch', json={'operations': [
+        {'op': 'add', 'product_id': product_ids[0], 'quantity': 1, 'size': '40'},
+        {'op': 'add', 'product_id': 9999},
+        {'op': 'add', 'product_id': product_ids[1], 'quantity': 100000},
+        {'op': 'explode'}
+    ]}, headers=headers)
+    assert response.status_code == 400
+    assert [error['index'] for error in response.get_json()['operations']] == [1, 2, 3]
+    assert client.get('/api/cart', headers=headers).get_json() == before
+
+    # Tipos errados são erro da operação (400), não do servidor
+    item_id = before['cart_items'][0]['id']
+    response = client.post('/api/cart/batch', json={'operations': [
+        {'op': 'update', 'item_id': item_id, 'quantity': 'dois'},
+        {'op': 'update', 'item_id': item_id, 'quantity': 2.5},
+        {'op': 'add', 'product_id': [product_ids[0]]},
+        {'op': 'remove', 'item_id': {'id': item_id}}
+    ]}, headers=headers)
+    assert response.status_code == 400
+    assert [error['index'] for error in response.get_json()['operations']] == [0, 1, 2, 3]
+    assert client.post('/api/cart/add', json={'product_id': product_ids[0], 'quantity': '2'}, headers=headers).status_code == 400
+    assert client.put(f'/api/cart/update/{item_id}', json={'quantity': 'dois'}, headers=headers).status_code == 400
+    assert client.get('/api/cart', headers=headers).get_json() == before
+
+def test_single_operations(client, headers, product_ids):
+    """Rotas de um item por vez e fechamento do pedido"""
+    client.delete('/api/cart/clear', headers=headers)
+    assert client.post('/api/cart/add', json={'product_id': product_ids[0], 'quantity': 2, 'size': '41'}, headers=headers).status_code == 201
+    assert client.post('/api/cart/add', json={'product_id': product_ids[0], 'quantity': 1, 'size': '41'}, headers=headers).status_code == 201
+    assert client.post('/api/cart/add', json={'product_id': product_ids[1], 'quantity': 1, 'size': '41'}, headers=headers).status_code == 201
+
+    items = client.get('/api/cart', headers=headers).get_json()['cart_items']
+    assert [item['quantity'] for item in items] == [3, 1]
+    assert client.put(f"/api/cart/update/{items[0]['id']}", json={'quantity': 2}, headers=headers).status_code == 200
+    assert client.delete(f"/api/cart/remove/{items[1]['id']}", headers=headers).status_code == 200
+    assert client.delete('/api/cart/remove/9999', headers=headers).status_code == 404
+
+    cart = client.get('/api/cart', headers=headers).get_json()
+    assert cart['count'] == 1 and cart['cart_items'][0]['quantity'] == 2
+
+    response = client.post('/api/orders', json={'shipping_address': 'Rua Teste, 1'}, headers=headers)
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json()['order']['items'][0]['quantity'] == 2
+    empty = client.get('/api/cart', headers=headers).get_json()
+    assert empty['count'] == 0
+    assert isinstance(empty['total'], float) and isinstance(cart['total'], float)  # 0.0, como antes, não 0
+    return cart
+
+def snapshot(store, user_id):
+    # Cópia dos valores lidos (no SQL as linhas são objetos vivos da sessão)
+    return [CartLine(line.id, line.product_id, line.quantity, line.size, line.added_at) for line in store.lines(user_id)]
+
+def test_checkout_race(client, headers, product_ids):
+    """Fechamento leva só as linhas lidas e não roda duas vezes para o mesmo carrinho"""
+    store = app_module.cart_store
+    with app.app_context():
+        user_id = decode_token(headers['Authorization'].split()[1])['sub']
+        store.clear(user_id)
+        store.apply(user_id, adds=[(product_ids[0], 2, '40')])
+        db.session.commit()
+        ordered = snapshot(store, user_id)
+
+        # Depois da leitura o cliente soma mais um e põe outro produto
+        store.apply(user_id, adds=[(product_ids[0], 1, '40'), (product_ids[1], 1, '41')])
+        db.session.commit()
+        assert store.remove_ordered(user_id, ordered)
+        db.session.commit()
+        assert [(line.product_id, line.quantity) for line in store.lines(user_id)] == [(product_ids[0], 1), (product_ids[1], 1)]
+
+        if isinstance(store, SqlCartStore):
+            # Outro fechamento já levou as linhas: a segunda transação percebe e não gera pedido
+            ordered = snapshot(store, user_id)
+            assert store.remove_ordered(user_id, ordered)
+            db.session.commit()
+            assert not store.remove_ordered(user_id, ordered)
+            db.session.rollback()
+        else:
+            store.clear(user_id)
+
+    client.post('/api/cart/add', json={'product_id': product_ids[0], 'quantity': 1, 'size': '40'}, headers=headers)
+    with store.checkout_lock(user_id) as locked:
+        assert locked
+        response = client.post('/api/orders', json={'shipping_address': 'Rua Teste, 1'}, headers=headers)
+        # No SQL a própria transação serializa; fora dele a trava devolve 409
+        assert response.status_code == (201 if isinstance(store, SqlCartStore) else 409), response.get_json()
+    if not isinstance(store, SqlCartStore):
+        assert client.post('/api/orders', json={'shipping_address': 'Rua Teste, 1'}, headers=headers).status_code == 201
+    assert client.get('/api/cart', headers=headers).get_json()['count'] == 0
+
+def normalize(cart):
+    """Ignorar o que depende do armazenamento (ids e horários)"""
+    return [
+        (item['product']['id'], item['quantity'], item['size'], item['subtotal'])
+        for item in cart['cart_items']
+    ], cart['total'], cart['count']
+
+def run_backend_tests(client, product_ids, name):
+    headers = get_headers(client, email=f'carrinho-{name}@teste.com')
+    test_batch_operations(client, headers, product_ids)
+    test_batch_is_atomic(client, headers, product_ids)
+    cart = normalize(test_single_operations(client, headers, product_ids))
+    test_checkout_race(client, headers, product_ids)
+    return cart
+
+def run_cart_tests():
+    """Executar os testes do carrinho"""
+    print("=== TESTANDO CARRINHO ===\n")
+    init_database()
+    client = app.test_client()
+    product_ids = [p['id'] for p in client.get('/api/products').get_json()['products']]
+
+    assert isinstance(app_module.cart_store, SqlCartStore)
+    sql_cart = run_backend_tests(client, product_ids, 'sql')
+    print("✅ Carrinho no SQL OK!")
+
+    app_module.cart_store = KeyValueCartStore(MemoryKVBackend())
+    memory_cart = run_backend_tests(client, product_ids, 'memory')
+    print("✅ Carrinho em memória OK!")
+
+    assert sql_cart == memory_cart
+    print("✅ Mesmo contrato JSON nos dois armazenamentos!")
+
+    print("\n=== TESTES DO CARRINHO CONCLUÍDOS ===")
+
+if __name__ == '__main__':
+    run_cart_tests()
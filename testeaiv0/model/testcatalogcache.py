@@ -0,0 +1,158 @@
+import os
+
+# Banco SQLite em memória, isolado do MySQL de desenvolvimento
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from app import app, db, Category, Product, catalog_cache
+from catalogcache import LocalCacheBackend
+from databaseutils import init_database
+from querybudget import count_queries
+
+app.config['TESTING'] = True
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_lru_and_ttl():
+    """Despejo LRU e expiração por TTL do backend local"""
+    clock = FakeClock()
+    backend = LocalCacheBackend(maxsize=2, clock=clock)
+
+    backend.set('a', 1, ttl=10)
+    backend.set('b', 2, ttl=10)
+    assert backend.get('a') == 1  # 'a' passa a ser o mais recente
+    backend.set('c', 3, ttl=10)
+    assert backend.get('b') is None
+    assert backend.evictions == 1
+
+    clock.now = 11
+    assert backend.get('a') is None
+    assert backend.get('c') is None
+
+def test_read_through(client):
+    """Segunda leitura vem do cache"""
+    hits, misses = catalog_cache.hits, catalog_cache.misses
+
+    client.get('/api/products?search=Air')
+    client.get('/api/products?search= air ')
+
+    assert catalog_cache.misses == misses + 1
+    assert catalog_cache.hits == hits + 1
+    assert client.get('/api/cache/stats').get_json()['catalog']['hits'] >= 1
+
+def test_stock_decrement_invalidates(client):
+    """O pedido atualiza o estoque visto pelo catálogo"""
+    product = client.get('/api/products?search=Urban').get_json()['products'][0]
+    assert client.get(f"/api/products/{product['id']}").get_json()['product']['stock_quantity'] == product['stock_quantity']
+
+    response = client.post('/api/auth/register', json={
+        'name': 'Cliente Cache',
+        'email': 'cache@teste.com',
+        'password': '123456'
+    })
+    headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    client.post('/api/cart/add', json={'product_id': product['id'], 'quantity': 3, 'size': '40'}, headers=headers)
+    assert client.post('/api/orders', json={'shipping_address': 'Rua Teste, 1'}, headers=headers).status_code == 201
+
+    expected = product['stock_quantity'] - 3
+    assert client.get(f"/api/products/{product['id']}").get_json()['product']['stock_quantity'] == expected
+    assert client.get('/api/products?search=Urban').get_json()['products'][0]['stock_quantity'] == expected
+
+def test_fill_races_invalidation(client):
+    """Uma carga que leu a linha antes de uma escrita não deixa o valor antigo no cache"""
+    with app.app_context():
+        product = Product.query.filter_by(is_active=True).first()
+        product_id, price = product.id, float(product.price)
+
+    def stale_load():
+        row = {'id': product_id, 'price': price}
+        # A escrita é confirmada entre a leitura e a gravação no cache
+        with app.app_context():
+            db.session.get(Product, product_id).price = price + 10
+            db.session.commit()
+        return row
+
+    assert catalog_cache.get_product(product_id, stale_load)['price'] == price
+    assert client.get(f'/api/products/{product_id}').get_json()['product']['price'] == price + 10
+
+def test_category_write_invalidates(client):
+    """Alterar uma categoria invalida categorias e produtos que a embutem"""
+    client.get('/api/categories')
+    client.get('/api/products?category=casual')
+
+    with app.app_context():
+        category = Category.query.filter_by(slug='casual').first()
+        category.name = 'Casual Atualizada'
+        db.session.commit()
+
+    names = [c['name'] for c in client.get('/api/categories').get_json()['categories']]
+    assert 'Casual Atualizada' in names
+    product = client.get('/api/products?category=casual').get_json()['products'][0]
+    assert product['category']['name'] == 'Casual Atualizada'
+
+def test_conditional_get(client):
+    """If-None-Match igual responde 304 sem ir ao banco; uma escrita muda o ETag"""
+    response = client.get('/api/products?category=running')
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'] == app.config['CACHE_CONTROL']['get_products']
+    assert response.headers['Last-Modified']
+
+    with app.app_context():
+        with count_queries(db.engine) as counter:
+            response = client.get('/api/products?category=running', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.headers['ETag'] == etag
+    assert counter.count == 0
+
+    # Outra query string, outro ETag
+    assert client.get('/api/products?category=casual').headers['ETag'] != etag
+
+    with app.app_context():
+        Category.query.filter_by(slug='running').first().description = 'Nova descrição'
+        db.session.commit()
+
+    response = client.get('/api/products?category=running', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_zero_ttl(client):
+    """CATALOG_CACHE_TTL=0 desliga o reaproveitamento, mas as rotas seguem respondendo com ETag"""
+    ttl, catalog_cache.ttl = catalog_cache.ttl, 0
+    try:
+        for path in ('/api/products', '/api/products/1', '/api/categories'):
+            response = client.get(path)
+            assert response.status_code == 200, (path, response.get_json())
+            assert response.headers['ETag'] and response.headers['Last-Modified']
+    finally:
+        catalog_cache.ttl = ttl
+
+def run_cache_tests():
+    """Executar os testes do cache do catálogo"""
+    print("=== TESTANDO CACHE DO CATÁLOGO ===\n")
+    init_database()
+    client = app.test_client()
+
+    test_lru_and_ttl()
+    print("✅ LRU e TTL OK!")
+    test_read_through(client)
+    print("✅ Read-through OK!")
+    test_stock_decrement_invalidates(client)
+    print("✅ Invalidação por pedido OK!")
+    test_fill_races_invalidation(client)
+    print("✅ Carga concorrente com invalidação OK!")
+    test_category_write_invalidates(client)
+    print("✅ Invalidação por categoria OK!")
+    test_conditional_get(client)
+    print("✅ GET condicional OK!")
+    test_zero_ttl(client)
+    print("✅ TTL zero OK!")
+
+    print("\n=== TESTES DO CACHE CONCLUÍDOS ===")
+
+if __name__ == '__main__':
+    run_cache_tests()
@@ -0,0 +1,135 @@
+import os
+
+# Banco SQLite em memória, isolado do MySQL de desenvolvimento
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+import csv
+import io
+import json
+from app import app, db, dashboard, dashboard_tables, export_catalog, Product, ProductVariant
+from databaseutils import init_database
+
+app.config['TESTING'] = True
+app.config['CATALOG_IMPORT_CHUNK'] = 2  # vários blocos mesmo com poucas linhas
+
+SUPPLIER_CSV = '''sku,name,price,category,brand,color,sizes,is_active
+FORN-001,Tênis Fornecedor Um,199.90,running,Marca A,Preto,38:5;39:5;40:2,true
+FORN-002,Tênis Fornecedor Dois,"249,50",casual,Marca B,Branco,40:10,sim
+FORN-003,Tênis Sem Preço,,running,Marca A,Azul,40:1,true
+FORN-004,Tênis Categoria Errada,99.90,basquete,Marca C,Azul,40:1,true
+FORN-005,Tênis Fornecedor Cinco,149.90,sport,Marca C,Verde,41:3,false
+FORN-001,Tênis Fornecedor Um,189.90,running,Marca A,Preto,38:5;39:5;40:2,true
+'''
+
+def login(client, email, password):
+    response = client.post('/api/auth/login', json={'email': email, 'password': password})
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+def variants(sku):
+    with app.app_context():
+        product = Product.query.filter_by(sku=sku).one()
+        return product, {variant.size: variant.stock_quantity for variant in ProductVariant.query.filter_by(product_id=product.id)}
+
+def test_admin_only(client):
+    """Importar e exportar são rotas de administrador"""
+    response = client.post('/api/auth/register', json={'name': 'Cliente', 'email': 'cliente@teste.com', 'password': '123456'})
+    customer = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    assert client.post('/api/admin/products/import', data=SUPPLIER_CSV, headers=customer).status_code == 403
+    assert client.get('/api/admin/products/export', headers=customer).status_code == 403
+
+def test_csv_import(client, admin):
+    """Linhas ruins entram no relatório sem derrubar as boas; SKU repetido vale a última linha"""
+    products_before = client.get('/api/products?search=fornecedor').get_json()['total']
+    response = client.post('/api/admin/products/import', data=SUPPLIER_CSV, content_type='text/csv', headers=admin)
+    assert response.status_code == 200, response.get_json()
+    report = response.get_json()
+    # FORN-001 repetido cai em outro bloco: conta como atualização
+    assert (report['rows'], report['created'], report['updated'], report['failed']) == (6, 3, 1, 2)
+    assert [(error['line'], error['sku']) for error in report['errors']] == [(4, 'FORN-003'), (5, 'FORN-004')]
+    assert 'categoria desconhecida' in report['errors'][1]['error']
+
+    product, sizes = variants('FORN-001')
+    assert str(product.price) == '189.90' and product.stock_quantity == 12
+    assert sizes == {'38': 5, '39': 5, '40': 2} and json.loads(product.size_available) == ['38', '39', '40']
+    assert str(variants('FORN-002')[0].price) == '249.50'
+    assert variants('FORN-005')[0].is_active is False
+
+    # Caches, busca e painel enxergam a importação
+    assert client.get('/api/products?search=fornecedor').get_json()['total'] == products_before + 2
+    with app.app_context():
+        with db.engine.connect() as conn:
+            assert dashboard.verify(conn, *dashboard_tables()) == []
+
+def test_ndjson_upload(client, admin):
+    """Upload multipart em NDJSON atualiza por SKU e substitui o estoque por tamanho"""
+    product_id = variants('FORN-001')[0].id
+    assert client.get(f'/api/products/{product_id}').get_json()['product']['price'] == 189.9
+    lines = [
+        json.dumps({'sku': 'FORN-001', 'name': 'Tênis Fornecedor Um', 'price': 179.9, 'category': 'running', 'sizes': {'39': 7, '41': 1}}),
+        '{"sku": "FORN-006", quebrado',
+        json.dumps({'sku': 'FORN-006', 'name': 'Tênis Fornecedor Seis', 'price': '99.90', 'category': 'casual', 'stock_quantity': 4}),
+    ]
+    response = client.post('/api/admin/products/import', headers=admin, data={
+        'file': (io.BytesIO('\n'.join(lines).encode()), 'catalogo.ndjson')
+    })
+    report = response.get_json()
+    assert (report['created'], report['updated'], report['failed']) == (1, 1, 1), report
+    assert report['errors'][0]['line'] == 2 and 'JSON inválido' in report['errors'][0]['error']
+
+    product, sizes = variants('FORN-001')
+    assert sizes == {'38': 0, '39': 7, '40': 0, '41': 1} and product.stock_quantity == 8
+    assert client.get(f'/api/products/{product_id}').get_json()['product']['price'] == 179.9
+    assert variants('FORN-006')[0].stock_quantity == 4
+
+def test_export_round_trip(client, admin):
+    """A exportação sai em pedaços e volta pela importação sem mudar nada"""
+    with app.app_context():
+        total = Product.query.count()
+        without_sku = Product.query.filter(Product.sku.is_(None)).count()
+        chunks = list(export_catalog('csv'))
+    assert len(chunks) > 2  # cabeçalho + um pedaço por bloco de produtos
+
+    response = client.get('/api/admin/products/export?format=csv', headers=admin)
+    assert response.status_code == 200 and response.is_streamed
+    assert response.headers['Content-Disposition'] == 'attachment; filename=catalogo.csv'
+    body = response.get_data(as_text=True)
+    rows = list(csv.DictReader(io.StringIO(body)))
+    assert len(rows) == total
+    assert next(row for row in rows if row['sku'] == 'FORN-001')['sizes'] == '38:0;39:7;40:0;41:1'
+
+    ndjson = client.get('/api/admin/products/export?format=ndjson', headers=admin).get_data(as_text=True)
+    records = [json.loads(line) for line in ndjson.splitlines()]
+    assert len(records) == total and next(r for r in records if r['sku'] == 'FORN-001')['sizes'] == {'38': 0, '39': 7, '40': 0, '41': 1}
+
+    before = {row['sku']: row for row in rows if row['sku']}
+    report = client.post('/api/admin/products/import', data=body, content_type='text/csv', headers=admin).get_json()
+    assert (report['created'], report['updated'], report['failed']) == (0, len(before), without_sku)
+    again = {row['sku']: row for row in csv.DictReader(io.StringIO(
+        client.get('/api/admin/products/export', headers=admin).get_data(as_text=True))) if row['sku']}
+    assert again == before
+
+    assert client.get('/api/admin/products/export?format=xml', headers=admin).status_code == 400
+
+def run_catalog_io_tests():
+    """Executar os testes de importação e exportação do catálogo"""
+    print("=== TESTANDO IMPORTAÇÃO/EXPORTAÇÃO DO CATÁLOGO ===\n")
+    init_database()
+    client = app.test_client()
+    admin = login(client, 'admin@sneakerhub.com', 'admin123')
+
+    test_admin_only(client)
+    print("✅ Acesso restrito OK!")
+
+    test_csv_import(client, admin)
+    print("✅ Importação CSV com erros por linha OK!")
+
+    test_ndjson_upload(client, admin)
+    print("✅ Upload NDJSON e estoque por tamanho OK!")
+
+    test_export_round_trip(client, admin)
+    print("✅ Exportação em streaming e ida e volta OK!")
+
+    print("\n=== TESTES DE IMPORTAÇÃO/EXPORTAÇÃO CONCLUÍDOS ===")
+
+if __name__ == '__main__':
+    run_catalog_io_tests()
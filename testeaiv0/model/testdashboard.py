@@ -0,0 +1,129 @@
+import json
+import os
+
+# Banco SQLite em memória, isolado do MySQL de desenvolvimento
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from decimal import Decimal
+from app import app, db, dashboard, dashboard_tables, DashboardCounter, Product, ProductSales
+from databaseutils import init_database, rebuild_dashboard
+from querybudget import count_queries
+
+app.config['TESTING'] = True
+app.config['QUERY_BUDGET_ENFORCE'] = True
+
+def login(client, email, password):
+    response = client.post('/api/auth/login', json={'email': email, 'password': password})
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+def register(client, email):
+    response = client.post('/api/auth/register', json={'name': 'Cliente Painel', 'email': email, 'password': '123456'})
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+def buy(client, headers, product_id, quantity, size='40'):
+    client.post('/api/cart/add', json={'product_id': product_id, 'quantity': quantity, 'size': size}, headers=headers)
+    response = client.post('/api/orders', json={'shipping_address': 'Rua Teste, 1'}, headers=headers)
+    assert response.status_code == 201, response.get_json()
+    return Decimal(str(response.get_json()['order']['total_amount']))
+
+def verify():
+    with app.app_context():
+        with db.engine.connect() as conn:
+            return dashboard.verify(conn, *dashboard_tables())
+
+def test_admin_only(client, admin, customer):
+    """Só administradores acessam o painel"""
+    assert client.get('/api/admin/dashboard').status_code == 401
+    assert client.get('/api/admin/dashboard', headers=customer).status_code == 403
+    assert client.get('/api/admin/dashboard', headers=admin).status_code == 200
+
+def test_counters_follow_writes(client, admin, customer):
+    """Cadastro e pedidos atualizam os totais na mesma transação"""
+    before = client.get('/api/admin/dashboard', headers=admin).get_json()['stats']
+    products = client.get('/api/products').get_json()['products']
+
+    register(client, 'segundo@teste.com')
+    revenue = buy(client, customer, products[0]['id'], 3)
+    revenue += buy(client, customer, products[1]['id'], 1)
+
+    data = client.get('/api/admin/dashboard', headers=admin).get_json()
+    stats = data['stats']
+    assert stats['total_users'] == before['total_users'] + 1
+    assert stats['total_orders'] == before['total_orders'] + 2
+    assert Decimal(str(stats['total_revenue'])) == Decimal(str(before['total_revenue'])) + revenue
+    assert [(p['id'], p['total_sold']) for p in data['top_products']] == [(products[0]['id'], 3), (products[1]['id'], 1)]
+
+    # Pedido recusado por falta de estoque não conta
+    client.post('/api/cart/add', json={'product_id': products[2]['id'], 'quantity': 1, 'size': '40'}, headers=customer)
+    with app.app_context():
+        db.session.get(Product, products[2]['id']).stock_quantity = 0
+        db.session.commit()
+    assert client.post('/api/orders', json={'shipping_address': 'Rua Teste, 1'}, headers=customer).status_code == 400
+
+    data = client.get('/api/admin/dashboard', headers=admin).get_json()
+    assert data['stats']['total_orders'] == stats['total_orders']
+    assert products[2]['id'] in [product['id'] for product in data['low_stock_products']]
+    assert verify() == []
+
+def test_stock_edits(client, admin, customer):
+    """Edição de estoque pelo admin aparece no painel e no catálogo"""
+    product = client.get('/api/products').get_json()['products'][3]
+    url = f"/api/admin/products/{product['id']}/stock"
+    sizes = json.loads(product['size_available'])
+    assert client.put(url, json={'sizes': {sizes[0]: 1}}, headers=customer).status_code == 403
+    assert client.put(url, json={'sizes': {'99': 1}}, headers=admin).status_code == 400
+    assert client.put(url, json={'sizes': {sizes[0]: -1}}, headers=admin).status_code == 400
+    assert client.put(url, json={'stock_quantity': 1}, headers=admin).status_code == 400  # produto com tamanhos
+
+    response = client.put(url, json={'sizes': dict.fromkeys(sizes, 0) | {sizes[0]: 2}}, headers=admin)
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['product']['stock_quantity'] == 2
+
+    low_stock = client.get('/api/admin/dashboard', headers=admin).get_json()['low_stock_products']
+    assert (product['id'], 2) in [(p['id'], p['stock_quantity']) for p in low_stock]
+    assert client.get(f"/api/products/{product['id']}").get_json()['product']['stock_quantity'] == 2
+    assert verify() == []
+
+def test_rebuild_repairs_drift():
+    """Escrita fora do ORM desalinha os totais; o rebuild recalcula e confere"""
+    with app.app_context():
+        DashboardCounter.query.filter_by(name='total_orders').delete()
+        ProductSales.query.delete()
+        db.session.commit()
+    differences = verify()
+    assert 'total_orders' in [key for key, stored, expected in differences]
+    assert any(key.startswith('product:') for key, stored, expected in differences)
+
+    # Os totais são travados (e esvaziados) antes da leitura das tabelas: pedidos simultâneos esperam
+    with app.app_context():
+        with count_queries(db.engine) as counter:
+            assert rebuild_dashboard()
+    statements = [statement.lstrip().upper() for statement in counter.statements]
+    first_count = next(i for i, statement in enumerate(statements) if 'COUNT(' in statement)
+    assert any(statement.startswith('DELETE FROM DASHBOARD_COUNTERS') for statement in statements[:first_count])
+    assert verify() == []
+
+def run_dashboard_tests():
+    """Executar os testes do painel administrativo"""
+    print("=== TESTANDO PAINEL ADMINISTRATIVO ===\n")
+    init_database()
+    client = app.test_client()
+    admin = login(client, 'admin@sneakerhub.com', 'admin123')
+    customer = register(client, 'painel@teste.com')
+
+    test_admin_only(client, admin, customer)
+    print("✅ Acesso restrito OK!")
+
+    test_counters_follow_writes(client, admin, customer)
+    print("✅ Totais acompanham as escritas OK!")
+
+    test_stock_edits(client, admin, customer)
+    print("✅ Edição de estoque OK!")
+
+    test_rebuild_repairs_drift()
+    print("✅ Rebuild e verificação OK!")
+
+    print("\n=== TESTES DO PAINEL CONCLUÍDOS ===")
+
+if __name__ == '__main__':
+    run_dashboard_tests()
@@ -0,0 +1,136 @@
+import os
+
+# Banco SQLite em memória, isolado do MySQL de desenvolvimento
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from contextlib import contextmanager
+from sqlalchemy import event
+from app import app, db
+from databaseutils import init_database
+from fieldsets import FieldSet, InvalidFields
+
+app.config['TESTING'] = True
+
+CARD = {'id', 'name', 'price', 'image_url', 'brand', 'color', 'size_available', 'stock_quantity'}
+
+@contextmanager
+def recorded_selects():
+    # O COUNT(*) da paginação fica de fora: a subconsulta dele não lê as colunas listadas
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and 'count(*)' not in statement:
+            statements.append(statement)
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        with app.app_context():
+            event.remove(db.engine, 'before_cursor_execute', record)
+
+def test_parse():
+    """Presets, campos avulsos e caminhos aninhados viram uma seleção na ordem do recurso"""
+    products = FieldSet(('id', 'name', 'description', 'price'), {'card': ('id', 'name', 'price')})
+    lines = FieldSet(('id', 'product', 'quantity'), {'card': ('id', 'quantity', 'product.card')}, nested={'product': products})
+
+    assert products.parse() == dict.fromkeys(('id', 'name', 'description', 'price'))
+    assert products.parse('price, name') == {'name': None, 'price': None}
+    assert lines.parse('card') == {'id': None, 'product': {'id': None, 'name': None, 'price': None}, 'quantity': None}
+    assert lines.parse('quantity,product.price,product.description') == {
+        'product': {'description': None, 'price': None}, 'quantity': None
+    }
+    assert lines.parse('product')['product'] == products.parse()
+    for value in ('nome', 'product.nome', 'quantity.id'):
+        try:
+            lines.parse(value)
+            assert False, value
+        except InvalidFields:
+            pass
+
+def test_products(client):
+    """card responde só os campos da grade e nem lê as colunas longas"""
+    with recorded_selects() as statements:
+        response = client.get('/api/products?fields=card')
+    assert response.status_code == 200
+    products = response.get_json()['products']
+    assert products and all(set(product) == CARD for product in products)
+    listing = [statement for statement in statements if 'FROM products' in statement]
+    assert listing and not any('products.description' in statement or 'categories' in statement for statement in listing)
+
+    # A categoria entra só quando pedida, com a junção
+    product = client.get('/api/products?fields=name,category').get_json()['products'][0]
+    assert set(product) == {'name', 'category'} and product['category']['slug']
+
+    # Sem fields a resposta continua completa (e não reaproveita o cache do card), sem o sku interno
+    product = client.get('/api/products').get_json()['products'][0]
+    assert 'description' in product and 'category' in product and len(product) == 13 and 'sku' not in product
+    assert 'sku' not in client.get(f"/api/products/{product['id']}").get_json()['product']
+    assert client.get('/api/products?fields=id,sku').get_json()['products'][0]['sku']
+    assert len(client.get('/api/products?fields=full').get_json()['products'][0]) == 14
+
+    # Cursor ordenado por preço precisa da coluna mesmo fora do JSON
+    first = client.get('/api/products?cursor=&sort=price&per_page=2&fields=name').get_json()
+    second = client.get(f"/api/products?cursor={first['next_cursor']}&sort=price&per_page=2&fields=name").get_json()
+    assert all(set(product) == {'name'} for product in first['products'] + second['products'])
+    assert not {p['name'] for p in first['products']} & {p['name'] for p in second['products']}
+
+    assert client.get('/api/products?fields=card,preco').status_code == 400
+
+def test_cart_and_orders(client):
+    """Carrinho e pedidos aceitam presets e campos aninhados do produto"""
+    response = client.post('/api/auth/register', json={'name': 'Cliente', 'email': 'campos@teste.com', 'password': '123456'})
+    headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    product = client.get('/api/products?fields=id,price,size_available&per_page=1').get_json()['products'][0]
+    size = product['size_available'].strip('[]').split(',')[0].strip(' "')
+    assert client.post('/api/cart/add', json={'product_id': product['id'], 'quantity': 2, 'size': size}, headers=headers).status_code == 201
+
+    full = client.get('/api/cart', headers=headers).get_json()
+    with recorded_selects() as statements:
+        card = client.get('/api/cart?fields=card', headers=headers).get_json()
+    assert card['total'] == full['total'] and card['count'] == 1
+    line = card['cart_items'][0]
+    assert set(line) == {'id', 'product', 'quantity', 'size', 'subtotal'} and set(line['product']) == CARD
+    assert line['subtotal'] == full['cart_items'][0]['subtotal']
+    assert not any('products.description' in statement for statement in statements)
+
+    # Sem o produto no JSON o preço ainda é lido para o total
+    lean = client.get('/api/cart?fields=id,quantity', headers=headers).get_json()
+    assert lean['total'] == full['total'] and lean['cart_items'] == [{'id': line['id'], 'quantity': 2}]
+
+    assert client.post('/api/orders', json={'shipping_address': 'Rua dos Campos, 10'}, headers=headers).status_code == 201
+    with recorded_selects() as statements:
+        orders = client.get('/api/orders?fields=card', headers=headers).get_json()['orders']
+    order = orders[0]
+    assert set(order) == {'id', 'total_amount', 'status', 'payment_status', 'items', 'created_at'}
+    assert set(order['items'][0]['product']) == {'id', 'name', 'image_url'}
+    assert not any(column in statement for statement in statements
+                   for column in ('orders.shipping_address', 'orders.notes', 'products.description', 'FROM users'))
+
+    order = client.get('/api/orders?cursor=&fields=id,status,items.quantity,items.product.name', headers=headers).get_json()['orders'][0]
+    assert order == {'id': order['id'], 'status': 'pending', 'items': [{'product': {'name': order['items'][0]['product']['name']}, 'quantity': 2}]}
+
+    full = client.get('/api/orders', headers=headers).get_json()['orders'][0]
+    assert full['user']['email'] == 'campos@teste.com' and full['shipping_address'] == 'Rua dos Campos, 10'
+
+    assert client.get('/api/orders?fields=items.product.preco', headers=headers).status_code == 400
+    assert client.get('/api/cart?fields=total', headers=headers).status_code == 400
+
+def run_fieldsets_tests():
+    """Executar os testes de campos esparsos (fields=)"""
+    print("=== TESTANDO CAMPOS ESPARSOS (fields=) ===\n")
+    init_database()
+    client = app.test_client()
+
+    test_parse()
+    print("✅ Seleção de campos e presets OK!")
+
+    test_products(client)
+    print("✅ Produtos com card e colunas enxutas OK!")
+
+    test_cart_and_orders(client)
+    print("✅ Carrinho e pedidos com campos aninhados OK!")
+
+    print("\n=== TESTES DE CAMPOS ESPARSOS CONCLUÍDOS ===")
+
+if __name__ == '__main__':
+    run_fieldsets_tests()
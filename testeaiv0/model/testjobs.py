@@ -0,0 +1,212 @@
+import os
+
+# Banco SQLite em memória, isolado do MySQL de desenvolvimento
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from app import app, db, job_queue, mailer, Job
+from databaseutils import init_database
+
+app.config['TESTING'] = True
+
+calls = []
+
+@job_queue.handler('flaky')
+def flaky(fail_times):
+    calls.append(fail_times)
+    if len(calls) <= fail_times:
+        raise RuntimeError('falha simulada')
+
+def run_jobs(now=None):
+    with app.app_context():
+        return job_queue.run_pending(db.engine, now=now)
+
+def jobs(name):
+    with app.app_context():
+        return Job.query.filter_by(name=name).order_by(Job.id).all()
+
+def test_contact_enqueues(client):
+    """O contato só enfileira; o email sai quando o worker roda"""
+    sent = len(mailer.sent)
+    response = client.post('/api/contact', json={'name': 'Ana', 'email': 'ana@teste.com', 'message': 'Olá!', 'subject': 'Dúvida'})
+    assert response.status_code == 200
+    assert len(mailer.sent) == sent
+    assert [job.status for job in jobs('send_contact_email')] == ['queued']
+
+    assert run_jobs() == {'done': 1}
+    assert mailer.sent[-1]['to'] == app.config['CONTACT_EMAIL']
+    assert mailer.sent[-1]['reply_to'] == 'ana@teste.com'
+    assert 'Olá!' in mailer.sent[-1]['body']
+
+def test_order_jobs(client):
+    """Pedido gravado enfileira só a confirmação (o rollup é agendado pelo worker)"""
+    response = client.post('/api/auth/register', json={'name': 'Cliente Fila', 'email': 'fila@teste.com', 'password': '123456'})
+    headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    product = client.get('/api/products').get_json()['products'][0]
+
+    for _ in range(2):
+        client.post('/api/cart/add', json={'product_id': product['id'], 'quantity': 1, 'size': '40'}, headers=headers)
+        assert client.post('/api/orders', json={'shipping_address': 'Rua Teste, 1'}, headers=headers).status_code == 201
+    assert len(jobs('send_order_confirmation')) == 2
+    assert jobs('refresh_sales_rollup') == []
+
+    # Pedido recusado (carrinho vazio) não deixa job para trás
+    assert client.post('/api/orders', json={'shipping_address': 'Rua Teste, 1'}, headers=headers).status_code == 400
+    assert len(jobs('send_order_confirmation')) == 2
+
+    assert run_jobs() == {'done': 2}
+    assert [message['to'] for message in mailer.sent[-2:]] == ['fila@teste.com', 'fila@teste.com']
+
+def test_retry_and_dead_letter():
+    """Falhas voltam com backoff; esgotadas as tentativas o job vai para a dead-letter"""
+    with app.app_context():
+        with db.engine.begin() as conn:
+            job_queue.enqueue(conn, 'flaky', {'fail_times': 1})
+    now = datetime.utcnow()
+    assert run_jobs(now=now) == {'queued': 1}
+    job = jobs('flaky')[0]
+    assert job.attempts == 1 and job.run_at > now and 'falha simulada' in job.last_error
+
+    assert run_jobs(now=job.run_at) == {'done': 1}
+    assert jobs('flaky')[0].status == 'done'
+
+    calls.clear()
+    with app.app_context():
+        with db.engine.begin() as conn:
+            job_queue.enqueue(conn, 'flaky', {'fail_times': 10}, max_attempts=2)
+    now = datetime.utcnow() + timedelta(hours=1)
+    assert run_jobs(now=now) == {'queued': 1}
+    assert run_jobs(now=now + timedelta(hours=1)) == {'dead': 1}
+    assert jobs('flaky')[-1].status == 'dead'
+
+    with app.app_context():
+        assert job_queue.requeue_dead(db.engine, 'flaky') == 1
+    assert jobs('flaky')[-1].status == 'queued'
+
+def test_claim_is_exclusive():
+    """Dois workers não reservam o mesmo job; job de worker morto volta para a fila"""
+    with app.app_context():
+        first = job_queue.claim(db.engine, 'worker-1', now=datetime.utcnow() + timedelta(days=1))
+        second = job_queue.claim(db.engine, 'worker-2', now=datetime.utcnow() + timedelta(days=1))
+        assert [job.name for job in first] == ['flaky'] and second == []
+
+        expired = datetime.utcnow() + timedelta(days=1, seconds=job_queue.visibility_timeout + 1)
+        reclaimed = job_queue.claim(db.engine, 'worker-2', now=expired)
+        assert [job.id for job in reclaimed] == [first[0].id]
+
+        # O resultado do worker antigo é descartado
+        job_queue.execute(db.engine, first[0])
+        assert db.session.get(Job, first[0].id).locked_by == 'worker-2'
+
+def test_stats(client):
+    """Profundidade e latência aparecem no endpoint"""
+    stats = client.get('/api/jobs/stats').get_json()['jobs']
+    assert stats['depth']['flaky'] == {'running': 1}
+    assert stats['latency']['send_contact_email']['count'] == 1
+    assert stats['latency']['send_order_confirmation']['max_wait_seconds'] >= 0
+
+def test_abandoned_job_dead_letters():
+    """Worker morto em todas as tentativas: o job vai para a dead-letter em vez de voltar"""
+    with app.app_context():
+        with db.engine.begin() as conn:
+            job_id = job_queue.enqueue(conn, 'flaky', {'fail_times': 0}, max_attempts=1)
+        start = datetime.utcnow() + timedelta(days=2)
+        assert [job.id for job in job_queue.claim(db.engine, 'worker-1', now=start)] == [job_id]
+        assert job_queue.claim(db.engine, 'worker-2', now=start + timedelta(seconds=job_queue.visibility_timeout + 1)) == []
+        job = db.session.get(Job, job_id)
+        assert job.status == 'dead' and job.attempts == 1 and 'esgotado' in job.last_error
+
+def test_dedupe_and_purge():
+    """dedupe_key não duplica o job na fila; concluídos antigos saem da tabela"""
+    with app.app_context():
+        with db.engine.begin() as conn:
+            first = job_queue.enqueue(conn, 'refresh_sales_rollup', dedupe_key='refresh_sales_rollup')
+            assert job_queue.enqueue(conn, 'refresh_sales_rollup', dedupe_key='refresh_sales_rollup') == first
+    assert len(jobs('refresh_sales_rollup')) == 1
+    assert run_jobs() == {'done': 1}
+
+    # Em execução ainda bloqueia um igual
+    with app.app_context():
+        with db.engine.begin() as conn:
+            second = job_queue.enqueue(conn, 'refresh_sales_rollup', dedupe_key='refresh_sales_rollup')
+        claimed = job_queue.claim(db.engine, 'worker-1')
+        assert [job.id for job in claimed] == [second]
+        with db.engine.begin() as conn:
+            assert job_queue.enqueue(conn, 'refresh_sales_rollup', dedupe_key='refresh_sales_rollup') == second
+        assert job_queue.execute(db.engine, claimed[0]) == 'done'
+    assert [job.status for job in jobs('refresh_sales_rollup')] == ['done', 'done']
+
+    # Concluído, o próximo agendamento cria outro job
+    with app.app_context():
+        with db.engine.begin() as conn:
+            assert job_queue.enqueue(conn, 'refresh_sales_rollup', dedupe_key='refresh_sales_rollup') != first
+    assert [job.status for job in jobs('refresh_sales_rollup')] == ['done', 'done', 'queued']
+
+    with app.app_context():
+        done = Job.query.filter_by(status='done').count()
+        assert done > 1
+        assert job_queue.purge(db.engine, app.config['JOB_RETENTION']) == 0
+        later = datetime.utcnow() + timedelta(seconds=app.config['JOB_RETENTION'], hours=1)
+        assert job_queue.purge(db.engine, app.config['JOB_RETENTION'], now=later, batch=2) == done
+        assert Job.query.filter_by(status='done').count() == 0
+    assert [job.status for job in jobs('refresh_sales_rollup')] == ['queued']
+
+def test_dedupe_race():
+    """Agendamento simultâneo em outro worker: o índice único recusa o segundo INSERT e enqueue devolve o job dele"""
+    competitor = []
+
+    def other_worker(conn, cursor, statement, parameters, context, executemany):
+        # O outro worker grava o mesmo job depois da leitura deste e antes do INSERT
+        if statement.startswith('SAVEPOINT') and not competitor:
+            now = datetime.utcnow().isoformat(' ')
+            cursor.execute(
+                "INSERT INTO jobs (name, payload, status, attempts, max_attempts, dedupe_key, run_at, created_at) "
+                "VALUES ('refresh_sales_rollup', '{}', 'queued', 0, 5, 'corrida', ?, ?)", (now, now)
+            )
+            competitor.append(cursor.lastrowid)
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', other_worker)
+        try:
+            with db.engine.begin() as conn:
+                job_id = job_queue.enqueue(conn, 'refresh_sales_rollup', dedupe_key='corrida')
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', other_worker)
+        assert job_id == competitor[0]
+        assert Job.query.filter_by(dedupe_key='corrida').count() == 1
+
+def run_job_tests():
+    """Executar os testes da fila de jobs"""
+    print("=== TESTANDO FILA DE JOBS ===\n")
+    init_database()
+    client = app.test_client()
+
+    test_contact_enqueues(client)
+    print("✅ Contato enfileirado e enviado pelo worker OK!")
+
+    test_order_jobs(client)
+    print("✅ Jobs do pedido OK!")
+
+    test_retry_and_dead_letter()
+    print("✅ Retentativas e dead-letter OK!")
+
+    test_claim_is_exclusive()
+    print("✅ Reserva exclusiva OK!")
+
+    test_stats(client)
+    print("✅ Métricas da fila OK!")
+
+    test_abandoned_job_dead_letters()
+    print("✅ Job abandonado vai para a dead-letter OK!")
+
+    test_dedupe_and_purge()
+    print("✅ Dedupe e limpeza dos concluídos OK!")
+
+    test_dedupe_race()
+    print("✅ Dedupe com agendamento simultâneo OK!")
+
+    print("\n=== TESTES DA FILA CONCLUÍDOS ===")
+
+if __name__ == '__main__':
+    run_job_tests()
@@ -0,0 +1,106 @@
+import os
+
+# Banco SQLite em memória, isolado do MySQL de desenvolvimento
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+import logging
+import re
+from sqlalchemy.exc import OperationalError
+from app import app, db, request_metrics
+from databaseutils import init_database
+
+app.config['TESTING'] = True
+
+def scrape(client):
+    response = client.get('/api/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    return response.get_data(as_text=True)
+
+def sample(text, name, **labels):
+    """Valor de uma série; os labels informados precisam bater, na ordem em que aparecem"""
+    if labels:
+        pattern = re.escape(name) + r'\{' + ''.join(f'(?:[^}}]*){key}="{re.escape(str(value))}"' for key, value in labels.items()) + r'[^}]*\} (\S+)'
+    else:
+        pattern = r'^' + re.escape(name) + r' (\S+)$'
+    match = re.search(pattern, text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+def test_request_series(client):
+    """Cada requisição soma contagem, latência, tamanho e SQL no seu endpoint"""
+    for _ in range(3):
+        assert client.get('/api/products').status_code == 200
+    client.get('/api/rota-que-nao-existe')
+
+    text = scrape(client)
+    assert sample(text, 'sneakerhub_http_requests_total', endpoint='get_products', method='GET', status=200) == 3
+    assert sample(text, 'sneakerhub_http_requests_total', endpoint='nao_encontrado', status=404) == 1
+    assert sample(text, 'sneakerhub_http_request_duration_seconds_count', endpoint='get_products') == 3
+    assert sample(text, 'sneakerhub_http_request_duration_seconds_bucket', endpoint='get_products', le='+Inf') == 3
+    assert sample(text, 'sneakerhub_http_response_size_bytes_sum', endpoint='get_products') > 0
+    assert sample(text, 'sneakerhub_http_request_sql_queries_sum', endpoint='get_products') >= 1
+    assert sample(text, 'sneakerhub_http_request_sql_seconds_total', endpoint='get_products') > 0
+    assert sample(text, 'sneakerhub_http_request_sql_queries_sum', endpoint='nao_encontrado') == 0
+
+def test_collectors(client):
+    """Pool e fila de jobs aparecem junto"""
+    client.post('/api/contact', json={'name': 'Ana', 'email': 'ana@teste.com', 'message': 'Olá!'})
+    text = scrape(client)
+    assert sample(text, 'sneakerhub_jobs_queue_depth', job='send_contact_email', status='queued') == 1
+    assert sample(text, 'sneakerhub_jobs_oldest_ready_seconds') >= 0
+
+def test_failed_statements():
+    """Statement com erro não deixa o início pendurado na conexão do pool"""
+    with app.app_context():
+        with db.engine.connect() as conn:
+            for _ in range(3):
+                try:
+                    conn.exec_driver_sql('SELECT * FROM tabela_inexistente')
+                    assert False, 'a tabela não existe'
+                except OperationalError:
+                    conn.rollback()
+            assert conn.exec_driver_sql('SELECT 1').scalar() == 1
+            assert not conn.info.get('metrics_started')
+
+def test_slow_request_log(client):
+    """Acima do limite a requisição vai para o log com os statements executados"""
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logger = logging.getLogger('metrics')
+    logger.addHandler(handler)
+    request_metrics.slow_request_ms = 0.001
+    try:
+        client.get('/api/categories')
+    finally:
+        request_metrics.slow_request_ms = 0
+        logger.removeHandler(handler)
+
+    assert len(records) == 1
+    message = records[0].getMessage()
+    assert 'GET /api/categories -> 200' in message
+    assert 'SELECT' in message and 'categories' in message
+    assert sample(scrape(client), 'sneakerhub_slow_requests_total') == 1
+
+def run_metrics_tests():
+    """Executar os testes de métricas"""
+    print("=== TESTANDO MÉTRICAS ===\n")
+    init_database()
+    client = app.test_client()
+
+    test_request_series(client)
+    print("✅ Séries por endpoint OK!")
+
+    test_collectors(client)
+    print("✅ Pool e fila de jobs OK!")
+
+    test_failed_statements()
+    print("✅ Statements com erro OK!")
+
+    test_slow_request_log(client)
+    print("✅ Log de requisições lentas OK!")
+
+    print("\n=== TESTES DE MÉTRICAS CONCLUÍDOS ===")
+
+if __name__ == '__main__':
+    run_metrics_tests()
@@ -0,0 +1,218 @@
+import os
+import re
+import tempfile
+
+# Banco SQLite em memória, isolado do MySQL de desenvolvimento
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.exc import IntegrityError
+from app import app, db, CartItem, Category, Product, ProductVariant, User, catalog_cache
+from databaseutils import init_database, migrate
+from migrations import MIGRATIONS, Migration, current_version, downgrade, schema_migrations, upgrade
+
+app.config['TESTING'] = True
+catalog_cache.enabled = False  # cada requisição vai ao banco
+
+NEW_INDEXES = {
+    'products': {'ix_products_active_category_price', 'ix_products_active_stock',
+                 'ix_products_active_id', 'ix_products_active_price', 'ix_products_active_created'},
+    'cart_items': {'uq_cart_items_line'},
+    'orders': {'ix_orders_user_created'},
+    'order_items': {'ix_order_items_order'},
+}
+
+# "SCAN products" é leitura da tabela inteira; "SCAN products USING INDEX ..." não
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+WHERE = re.compile(r'\bWHERE\b', re.IGNORECASE)
+# Listas paginadas (LIMIT) devem sair na ordem do índice, sem ordenar tudo antes de cortar a página.
+# Exceção: com uma faixa fechada no índice (min_price e max_price) o planner lê só a faixa e ordena
+TEMP_SORT = re.compile(r'^USE TEMP B-TREE FOR (?:RIGHT PART OF |LAST TERM OF )?ORDER BY$')
+LIMIT = re.compile(r'\bLIMIT\b', re.IGNORECASE)
+BOUNDED_RANGE = re.compile(r'\b(\w+)>\? AND \1<\?')
+
+def index_names(table):
+    # sqlite_master, não o inspector: ele omite os índices de expressão
+    with db.engine.connect() as conn:
+        return set(conn.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"), {'table': table}
+        ).scalars())
+
+def test_migrations_are_reversible():
+    """Downgrade até a versão 0 e upgrade de volta"""
+    with app.app_context():
+        assert current_version(db.engine) == MIGRATIONS[-1].version
+
+        assert downgrade(db.engine, 0) == [migration.version for migration in reversed(MIGRATIONS)]
+        assert current_version(db.engine) == 0
+        for table in ('product_variants', 'dashboard_counters', 'product_sales'):
+            assert not inspect(db.engine).has_table(table)
+        for table, names in NEW_INDEXES.items():
+            assert not names & index_names(table), table
+
+        assert upgrade(db.engine, target=2) == [1, 2]
+        assert upgrade(db.engine) == [migration.version for migration in MIGRATIONS[2:]]
+        assert upgrade(db.engine) == []
+        for table, names in NEW_INDEXES.items():
+            assert names <= index_names(table), table
+        # Índices que substituem outros (o antigo sai na migração seguinte)
+        assert index_names('product_sales') == {'ix_product_sales_units_product'}
+        assert {'ix_jobs_dedupe_status', 'uq_jobs_active_dedupe'} <= index_names('jobs') and 'ix_jobs_dedupe_key' not in index_names('jobs')
+        assert 'ix_products_updated_at' not in index_names('products')
+        assert 'uq_cart_items_user_product_size' not in index_names('cart_items')
+
+def test_migrate_existing_database():
+    """Banco antigo atualizado pelo comando migrate: ganha as variantes e para de aceitar linhas sem tamanho repetidas"""
+    with app.app_context():
+        downgrade(db.engine, 25)
+        user_id = User.query.filter_by(email='admin@sneakerhub.com').one().id
+        product_id = Product.query.filter(Product.size_available.isnot(None)).first().id
+        ProductVariant.query.delete()
+        db.session.add_all([CartItem(user_id=user_id, product_id=product_id, quantity=quantity) for quantity in (1, 2)])
+        db.session.commit()  # o índice antigo aceita dois NULL
+
+    migrate()
+
+    with app.app_context():
+        assert current_version(db.engine) == MIGRATIONS[-1].version
+        assert ProductVariant.query.filter_by(product_id=product_id).count() > 0
+        lines = CartItem.query.filter_by(user_id=user_id, product_id=product_id).all()
+        assert [(line.size, line.quantity) for line in lines] == [(None, 3)]
+
+        db.session.add(CartItem(user_id=user_id, product_id=product_id, quantity=1))
+        try:
+            db.session.commit()
+            assert False, 'linha sem tamanho repetida deveria ser recusada'
+        except IntegrityError:
+            db.session.rollback()
+        CartItem.query.filter_by(user_id=user_id).delete()
+        db.session.commit()
+
+def test_concurrent_upgrade():
+    """Migração aplicada por outro processo no meio do passo não derruba o upgrade"""
+    assert not app.config['AUTO_MIGRATE']  # padrão: migrar no deploy, não em cada worker
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'schema.db')}"
+        engine, other = create_engine(url), create_engine(url)
+
+        def applied_elsewhere(conn):
+            with other.begin() as other_conn:
+                other_conn.execute(schema_migrations.insert().values(version=1, description='outro worker'))
+
+        migrations = [Migration(1, 'corrida', applied_elsewhere, lambda conn: None)]
+        assert upgrade(engine, migrations=migrations) == []
+        assert current_version(engine) == 1
+        engine.dispose()
+        other.dispose()
+
+def seed(client, products=200):
+    """Catálogo, usuário com carrinho e pedidos"""
+    with app.app_context():
+        categories = Category.query.all()
+        db.session.add_all([
+            Product(name=f'Produto Plano {i}', price=50 + i, stock_quantity=100, category_id=categories[i % len(categories)].id)
+            for i in range(products)
+        ])
+        db.session.commit()
+
+    response = client.post('/api/auth/register', json={'name': 'Cliente Plano', 'email': 'plano@teste.com', 'password': '123456'})
+    headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    product_id = client.get('/api/products').get_json()['products'][0]['id']
+    for _ in range(3):
+        client.post('/api/cart/add', json={'product_id': product_id, 'quantity': 1, 'size': '40'}, headers=headers)
+        client.post('/api/orders', json={'shipping_address': 'Rua Teste, 1'}, headers=headers)
+    return headers, product_id
+
+def exercise_endpoints(client, headers, product_id):
+    """Chamar cada rota que lê o banco (filtros, cursores, carrinho e pedidos)"""
+    yield 'GET /api/products', client.get('/api/products')
+    yield 'GET /api/products?category', client.get('/api/products?category=running&min_price=60&max_price=300')
+    yield 'GET /api/products?search', client.get('/api/products?search=air')
+    yield 'GET /api/products?size', client.get('/api/products?size=40')
+    first = client.get('/api/products?cursor=&sort=price&order=desc&include_total=true')
+    yield 'GET /api/products?cursor', first
+    yield 'GET /api/products?cursor (2)', client.get(f"/api/products?cursor={first.get_json()['next_cursor']}&sort=price&order=desc")
+    yield 'GET /api/products/<id>', client.get(f'/api/products/{product_id}')
+    yield 'GET /api/categories', client.get('/api/categories')
+    yield 'POST /api/auth/login', client.post('/api/auth/login', json={'email': 'plano@teste.com', 'password': '123456'})
+    yield 'GET /api/auth/profile', client.get('/api/auth/profile', headers=headers)
+    yield 'POST /api/cart/add', client.post('/api/cart/add', json={'product_id': product_id, 'quantity': 1, 'size': '41'}, headers=headers)
+    yield 'GET /api/cart', client.get('/api/cart', headers=headers)
+    yield 'POST /api/cart/batch', client.post('/api/cart/batch', json={'operations': [{'op': 'add', 'product_id': product_id, 'size': '42'}]}, headers=headers)
+    yield 'POST /api/orders', client.post('/api/orders', json={'shipping_address': 'Rua Teste, 1'}, headers=headers)
+    orders = client.get('/api/orders', headers=headers)
+    yield 'GET /api/orders', orders
+    yield 'GET /api/orders?cursor', client.get('/api/orders?cursor=&include_total=true', headers=headers)
+    yield 'GET /api/orders/<id>', client.get(f"/api/orders/{orders.get_json()['orders'][0]['id']}", headers=headers)
+    admin = client.post('/api/auth/login', json={'email': 'admin@sneakerhub.com', 'password': 'admin123'}).get_json()
+    admin_headers = {'Authorization': f"Bearer {admin['access_token']}"}
+    yield 'GET /api/admin/dashboard', client.get('/api/admin/dashboard', headers=admin_headers)
+    yield 'GET /api/admin/reports/sales', client.get('/api/admin/reports/sales?start=2026-01-01&end=2026-12-31', headers=admin_headers)
+
+def full_scans(statements):
+    """Tabelas lidas por inteiro e páginas ordenadas fora do índice no plano (EXPLAIN QUERY PLAN) de cada comando"""
+    tables = set(inspect(db.engine).get_table_names())
+    found = []
+    with db.engine.connect() as conn:
+        for statement, parameters in statements:
+            # Sem WHERE a leitura completa é a intenção (ex.: listar as categorias)
+            if not WHERE.search(statement):
+                continue
+            plan = [row[-1] for row in conn.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()]
+            for detail in plan:
+                match = FULL_SCAN.match(detail)
+                if match and match.group(1) in tables:
+                    found.append((match.group(1), statement))
+            sorted_outside_index = any(TEMP_SORT.match(detail) for detail in plan) and LIMIT.search(statement)
+            if sorted_outside_index and not any(BOUNDED_RANGE.search(detail) for detail in plan):
+                found.append(('ORDER BY (temp b-tree)', statement))
+    return found
+
+def test_no_full_scans(client):
+    """Nenhuma consulta das rotas lê uma tabela inteira"""
+    headers, product_id = seed(client)
+
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(('SELECT', 'UPDATE', 'DELETE')):
+            statements.append((statement, parameters))
+
+    failures = []
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            for name, response in exercise_endpoints(client, headers, product_id):
+                assert response.status_code < 400, (name, response.get_json())
+                with app.app_context():
+                    failures += [(name, table, statement) for table, statement in full_scans(statements)]
+                statements.clear()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+
+    for name, table, statement in failures:
+        print(f"❌ {name}: full scan ou ordenação fora do índice em {table}\n   {statement}")
+    assert not failures
+
+def run_migration_tests():
+    """Executar os testes das migrações e dos planos de consulta"""
+    print("=== TESTANDO MIGRAÇÕES E ÍNDICES ===\n")
+    init_database()
+    client = app.test_client()
+
+    test_migrations_are_reversible()
+    print("✅ Migrações reversíveis OK!")
+
+    test_concurrent_upgrade()
+    print("✅ Upgrade concorrente OK!")
+
+    test_migrate_existing_database()
+    print("✅ Migrate em banco existente OK!")
+
+    test_no_full_scans(client)
+    print("✅ Nenhuma rota faz full scan!")
+
+    print("\n=== TESTES DE MIGRAÇÕES CONCLUÍDOS ===")
+
+if __name__ == '__main__':
+    run_migration_tests()
@@ -0,0 +1,111 @@
+import os
+
+# Banco SQLite em memória, isolado do MySQL de desenvolvimento
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+import csv
+import io
+import json
+from datetime import datetime
+from decimal import Decimal
+from app import app, db, export_orders, Order, OrderItem, User
+from databaseutils import generate_data, init_database
+
+app.config['TESTING'] = True
+app.config['ORDER_EXPORT_CHUNK'] = 7  # vários lotes mesmo com poucos pedidos
+
+def login(client, email, password):
+    response = client.post('/api/auth/login', json={'email': email, 'password': password})
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+def test_admin_only(client):
+    """Exportar pedidos é rota de administrador"""
+    response = client.post('/api/auth/register', json={'name': 'Cliente', 'email': 'cliente@teste.com', 'password': '123456'})
+    customer = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    assert client.get('/api/admin/orders/export', headers=customer).status_code == 403
+
+def test_invalid_filters(client, admin):
+    for query in ('format=xml', 'start=2025-13-01', 'end=ontem', 'status=perdido', 'start=2025-05-02&end=2025-05-01'):
+        response = client.get(f'/api/admin/orders/export?{query}', headers=admin)
+        assert response.status_code == 400, query
+        assert 'error' in response.get_json()
+
+def test_csv_export(client, admin):
+    """Uma linha por item, em lotes; pedido sem itens sai uma vez com os campos do item vazios"""
+    with app.app_context():
+        user = User.query.filter_by(email='cliente@teste.com').one()
+        empty = Order(user_id=user.id, total_amount=0, shipping_address='Rua Vazia, 1', created_at=datetime(2025, 6, 1))
+        db.session.add(empty)
+        db.session.commit()
+        empty_id = empty.id
+        orders, items = Order.query.count(), OrderItem.query.count()
+        chunks = list(export_orders('csv'))
+    assert len(chunks) == 1 + -(-orders // 7)  # cabeçalho + um pedaço por lote
+
+    response = client.get('/api/admin/orders/export', headers=admin)
+    assert response.status_code == 200 and response.is_streamed
+    assert response.headers['Content-Disposition'] == 'attachment; filename=pedidos.csv'
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(rows) == items + 1
+    assert len({row['order_id'] for row in rows}) == orders
+
+    blank = [row for row in rows if row['order_id'] == str(empty_id)]
+    assert len(blank) == 1 and blank[0]['item_id'] == '' and blank[0]['customer_email'] == 'cliente@teste.com'
+
+    # Em ordem de data, e o total de cada pedido fecha com as linhas
+    dates = [row['created_at'] for row in rows]
+    assert dates == sorted(dates)
+    totals = {}
+    for row in rows:
+        if row['item_id']:
+            totals[row['order_id']] = totals.get(row['order_id'], Decimal('0')) + Decimal(row['line_total'])
+            assert Decimal(row['line_total']) == Decimal(row['unit_price']) * int(row['quantity'])
+    assert all(totals[row['order_id']] == Decimal(row['total_amount']) for row in rows if row['item_id'])
+
+def test_ndjson_filters(client, admin):
+    """NDJSON com um pedido por linha; período inclusivo e lista de status"""
+    response = client.get('/api/admin/orders/export?format=ndjson', headers=admin)
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    with app.app_context():
+        assert len(records) == Order.query.count()
+        assert sum(len(record['items']) for record in records) == OrderItem.query.count()
+        month = Order.query.filter(Order.created_at >= datetime(2025, 6, 1), Order.created_at < datetime(2025, 7, 1))
+        expected_month = {order.id for order in month}
+        expected_status = {order.id for order in month.filter(Order.status.in_(('cancelled', 'delivered')))}
+
+    response = client.get('/api/admin/orders/export?format=ndjson&start=2025-06-01&end=2025-06-30', headers=admin)
+    month = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert {record['order_id'] for record in month} == expected_month and expected_month
+    assert all('2025-06-01' <= record['created_at'][:10] <= '2025-06-30' for record in month)
+
+    response = client.get(
+        '/api/admin/orders/export?format=ndjson&start=2025-06-01&end=2025-06-30&status=cancelled,delivered', headers=admin
+    )
+    filtered = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert {record['order_id'] for record in filtered} == expected_status and expected_status
+    assert all(record['status'] in ('cancelled', 'delivered') for record in filtered)
+
+def run_order_export_tests():
+    """Executar os testes da exportação de pedidos"""
+    print("=== TESTANDO EXPORTAÇÃO DE PEDIDOS ===\n")
+    init_database()
+    generate_data(users=30, products=20, orders=120, seed=5)
+    client = app.test_client()
+    admin = login(client, 'admin@sneakerhub.com', 'admin123')
+
+    test_admin_only(client)
+    print("✅ Acesso restrito OK!")
+
+    test_invalid_filters(client, admin)
+    print("✅ Validação dos filtros OK!")
+
+    test_csv_export(client, admin)
+    print("✅ Exportação CSV em lotes OK!")
+
+    test_ndjson_filters(client, admin)
+    print("✅ NDJSON com filtros de período e status OK!")
+
+    print("\n=== TESTES DA EXPORTAÇÃO DE PEDIDOS CONCLUÍDOS ===")
+
+if __name__ == '__main__':
+    run_order_export_tests()
@@ -0,0 +1,129 @@
+import json
+import os
+
+# Banco SQLite em memória, isolado do MySQL de desenvolvimento
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from app import app, db, Product, Category, PRODUCT_SORTS, catalog_cache
+from databaseutils import init_database
+from keyset import keyset_page
+from querybudget import count_queries
+
+app.config['TESTING'] = True
+catalog_cache.enabled = False  # cada página deve ir ao banco
+
+def seed_catalog():
+    """Produtos com preços repetidos, para exercitar o desempate pelo id"""
+    init_database()
+    with app.app_context():
+        category = Category.query.first()
+        for i in range(30):
+            db.session.add(Product(name=f'Produto Cursor {i}', price=100 + i % 5, stock_quantity=10, category_id=category.id))
+        db.session.commit()
+
+def walk(client, url, key, **params):
+    """Percorrer todas as páginas seguindo next_cursor"""
+    items, cursor = [], ''
+    while cursor is not None:
+        response = client.get(url, query_string=dict(params, cursor=cursor))
+        assert response.status_code == 200, response.get_json()
+        data = response.get_json()
+        items.extend(data[key])
+        cursor = data['next_cursor']
+    return items
+
+def test_products_cursor(client):
+    """Percorrer o catálogo por preço dá a mesma ordem que ordenar tudo"""
+    products = walk(client, '/api/products', 'products', sort='price', order='desc', per_page=7)
+    expected = sorted(products, key=lambda p: (-p['price'], -p['id']))
+    assert [p['id'] for p in products] == [p['id'] for p in expected]
+    assert len({p['id'] for p in products}) == len(products) == 36
+
+    # A página seguinte é um intervalo no índice, sem COUNT(*)
+    cursor = client.get('/api/products', query_string={'cursor': '', 'per_page': 7}).get_json()['next_cursor']
+    with app.app_context():
+        with count_queries(db.engine) as counter:
+            client.get('/api/products', query_string={'cursor': cursor, 'per_page': 7})
+    assert any('products.id >' in s for s in counter.statements)
+    assert not any('count(' in s.lower() for s in counter.statements)
+
+    response = client.get('/api/products', query_string={'cursor': '', 'per_page': 7, 'include_total': 'true'})
+    assert response.get_json()['total'] == 36
+
+def test_invalid_cursor(client):
+    """Cursor inválido ou de outra ordenação é um 400"""
+    assert client.get('/api/products?cursor=lixo').status_code == 400
+
+    cursor = client.get('/api/products?cursor=&sort=price&per_page=2').get_json()['next_cursor']
+    assert client.get(f'/api/products?cursor={cursor}&sort=id').status_code == 400
+    assert client.get('/api/products?cursor=&sort=name').status_code == 400
+
+def test_invalid_per_page(client):
+    """per_page zero ou negativo usa 20 por página; acima do teto fica no teto"""
+    for per_page in (0, -2):
+        data = client.get('/api/products', query_string={'cursor': '', 'per_page': per_page}).get_json()
+        assert len(data['products']) == data['per_page'] == 20 and data['next_cursor']
+
+    with app.app_context():
+        try:
+            keyset_page(Product.query, 'id', PRODUCT_SORTS['id'], limit=0)
+            assert False, 'limit 0 deveria ser rejeitado'
+        except ValueError:
+            pass
+
+    max_per_page, app.config['MAX_PER_PAGE'] = app.config['MAX_PER_PAGE'], 5
+    try:
+        data = client.get('/api/products', query_string={'cursor': '', 'per_page': 1000}).get_json()
+        assert len(data['products']) == data['per_page'] == 5
+        assert len(client.get('/api/products?per_page=1000').get_json()['products']) == 5
+    finally:
+        app.config['MAX_PER_PAGE'] = max_per_page
+
+def test_orders_cursor(client):
+    """Histórico de pedidos por cursor, do mais recente ao mais antigo"""
+    response = client.post('/api/auth/register', json={
+        'name': 'Cliente Cursor',
+        'email': 'cursor@teste.com',
+        'password': '123456'
+    })
+    headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    product = client.get('/api/products').get_json()['products'][0]
+    sizes = json.loads(product['size_available'])
+    for i in range(7):
+        client.post('/api/cart/add', json={'product_id': product['id'], 'quantity': 1, 'size': sizes[i % len(sizes)]}, headers=headers)
+        client.post('/api/orders', json={'shipping_address': 'Rua Teste, 1'}, headers=headers)
+
+    orders, cursor = [], ''
+    while cursor is not None:
+        data = client.get('/api/orders', query_string={'cursor': cursor, 'per_page': 3}, headers=headers).get_json()
+        orders.extend(data['orders'])
+        cursor = data['next_cursor']
+
+    paged = client.get('/api/orders?per_page=50', headers=headers).get_json()['orders']
+    assert [o['id'] for o in orders] == [o['id'] for o in paged]
+    assert len(orders) == 7
+
+    for per_page in (0, -2):
+        response = client.get('/api/orders', query_string={'cursor': '', 'per_page': per_page}, headers=headers)
+        assert response.status_code == 200, response.get_json()
+        assert len(response.get_json()['orders']) == 7
+
+def run_pagination_tests():
+    """Executar os testes da paginação por cursor"""
+    print("=== TESTANDO PAGINAÇÃO POR CURSOR ===\n")
+    seed_catalog()
+    client = app.test_client()
+
+    test_products_cursor(client)
+    print("✅ Produtos OK!")
+    test_invalid_cursor(client)
+    print("✅ Cursor inválido OK!")
+    test_invalid_per_page(client)
+    print("✅ per_page inválido OK!")
+    test_orders_cursor(client)
+    print("✅ Pedidos OK!")
+
+    print("\n=== TESTES DE PAGINAÇÃO CONCLUÍDOS ===")
+
+if __name__ == '__main__':
+    run_pagination_tests()
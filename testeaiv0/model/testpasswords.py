@@ -0,0 +1,88 @@
+import os
+import threading
+
+# Banco SQLite em memória, isolado do MySQL de desenvolvimento
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+import app as app_module
+from app import app, db, User
+from databaseutils import init_database
+from passwords import HashingPoolSaturated, PasswordHasher
+from werkzeug.security import generate_password_hash
+
+app.config['TESTING'] = True
+
+def test_saturation():
+    """Com o pool e a fila cheios, a próxima chamada é recusada na hora"""
+    hasher = PasswordHasher(method='pbkdf2:sha256:3000000', workers=1, max_queue=0, retry_after=2)
+    started = threading.Event()
+
+    def slow_hash():
+        started.set()
+        hasher.hash('senha')
+
+    thread = threading.Thread(target=slow_hash)
+    thread.start()
+    started.wait()
+    while hasher.stats()['in_flight'] == 0:
+        pass
+
+    try:
+        hasher.hash('outra')
+        assert False, 'deveria recusar'
+    except HashingPoolSaturated as e:
+        assert e.retry_after == 2
+    thread.join()
+
+    stats = hasher.stats()
+    assert stats['rejected'] == 1
+    assert stats['operations']['hash']['count'] == 1
+    assert sum(stats['operations']['hash']['buckets']) == 1
+
+def test_login_returns_503_when_saturated(client):
+    """O login responde 503 com Retry-After em vez de enfileirar sem limite"""
+    original = app_module.password_hasher
+    app_module.password_hasher = PasswordHasher(workers=1, max_queue=0, retry_after=3)
+    app_module.password_hasher._slots.acquire()  # ocupa a única vaga
+    try:
+        response = client.post('/api/auth/login', json={'email': 'admin@sneakerhub.com', 'password': 'admin123'})
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '3'
+    finally:
+        app_module.password_hasher = original
+
+def test_rehash_on_login(client):
+    """Hash com custo antigo é trocado pelo configurado no login"""
+    with app.app_context():
+        db.session.add(User(name='Legado', email='legado@teste.com',
+                            password_hash=generate_password_hash('123456', method='pbkdf2:sha256:1000')))
+        db.session.commit()
+
+    response = client.post('/api/auth/login', json={'email': 'legado@teste.com', 'password': '123456'})
+    assert response.status_code == 200
+
+    with app.app_context():
+        password_hash = User.query.filter_by(email='legado@teste.com').first().password_hash
+    assert password_hash.startswith(app.config['PASSWORD_HASH_METHOD'] + '$')
+    assert client.post('/api/auth/login', json={'email': 'legado@teste.com', 'password': '123456'}).status_code == 200
+
+    stats = client.get('/api/hashing/stats').get_json()['password_hashing']
+    assert stats['operations']['verify']['count'] >= 2
+
+def run_password_tests():
+    """Executar os testes do hash de senhas"""
+    print("=== TESTANDO HASH DE SENHAS ===\n")
+    init_database()
+    client = app.test_client()
+
+    test_saturation()
+    print("✅ Back-pressure do pool OK!")
+    test_login_returns_503_when_saturated(client)
+    print("✅ 503 com Retry-After OK!")
+    test_rehash_on_login(client)
+    print("✅ Atualização do hash no login OK!")
+
+    print("\n=== TESTES DE SENHA CONCLUÍDOS ===")
+
+if __name__ == '__main__':
+    run_password_tests()
@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Banco SQLite em memória, isolado do MySQL de desenvolvimento
+os.environ['DATABASE_URL'] = 'sqlite://'
+# Backend local: o cache de perfil só liga explicitamente, com um processo só
+os.environ['PROFILE_CACHE_LOCAL'] = 'true'
+
+from app import app, db, User
+from databaseutils import init_database
+from querybudget import count_queries
+
+app.config['TESTING'] = True
+
+def test_profile_cache(client):
+    """Perfil servido do cache e atualizado quando o usuário muda"""
+    response = client.post('/api/auth/register', json={
+        'name': 'Cliente Perfil',
+        'email': 'perfil@teste.com',
+        'password': '123456'
+    })
+    headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+    first = client.get('/api/auth/profile', headers=headers).get_json()
+    with app.app_context():
+        with count_queries(db.engine) as counter:
+            second = client.get('/api/auth/profile', headers=headers).get_json()
+            client.get('/api/cart', headers=headers)
+    assert first == second
+    assert not any('users' in statement for statement in counter.statements)
+
+    with app.app_context():
+        User.query.filter_by(email='perfil@teste.com').first().phone = '(11) 90000-0000'
+        db.session.commit()
+
+    assert client.get('/api/auth/profile', headers=headers).get_json()['user']['phone'] == '(11) 90000-0000'
+    assert client.get('/api/cache/stats').get_json()['profiles']['enabled'] is True
+
+def test_local_backend_needs_opt_in():
+    """Sem backend compartilhado e sem PROFILE_CACHE_LOCAL o cache de perfil fica desligado"""
+    env = {key: value for key, value in os.environ.items() if key != 'PROFILE_CACHE_LOCAL'}
+    env['PYTHONPATH'] = os.pathsep.join([os.path.dirname(HERE), HERE])
+    output = subprocess.run(
+        [sys.executable, '-c', 'from app import profile_cache; print(profile_cache.enabled)'],
+        env=env, cwd=HERE, capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip().splitlines()[-1] == 'False', output
+
+def run_profile_tests():
+    """Executar os testes do cache de perfil"""
+    print("=== TESTANDO CACHE DE PERFIL ===\n")
+    init_database()
+    test_profile_cache(app.test_client())
+    print("✅ Perfil sem consultar users OK!")
+    test_local_backend_needs_opt_in()
+    print("✅ Backend local só com opt-in OK!")
+    print("\n=== TESTES DE PERFIL CONCLUÍDOS ===")
+
+if __name__ == '__main__':
+    run_profile_tests()
@@ -0,0 +1,106 @@
+import os
+
+# Banco SQLite em memória, isolado do MySQL de desenvolvimento
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from flask import jsonify
+from app import app, db, Product, Category, User, Order, catalog_cache
+from databaseutils import init_database
+
+app.config['TESTING'] = True
+app.config['QUERY_BUDGET_ENFORCE'] = True
+catalog_cache.enabled = False  # medir o caminho que vai ao banco
+
+def seed_catalog(extra_products=48):
+    """Popular o banco com produtos suficientes para expor consultas N+1"""
+    init_database()
+    with app.app_context():
+        categories = Category.query.all()
+        for i in range(extra_products):
+            db.session.add(Product(
+                name=f'Produto Orçamento {i}',
+                price=100 + i,
+                stock_quantity=100,
+                category_id=categories[i % len(categories)].id,
+                brand='TestBrand'
+            ))
+        db.session.commit()
+
+def get_token(client):
+    """Registrar um usuário de teste e retornar o token"""
+    response = client.post('/api/auth/register', json={
+        'name': 'Cliente Orçamento',
+        'email': 'orcamento@teste.com',
+        'password': '123456'
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['access_token']
+
+def fill_orders(client, headers, product_ids, orders=10):
+    """Criar pedidos com vários itens para o histórico"""
+    for i in range(orders):
+        for product_id in product_ids[i:i + 5]:
+            client.post('/api/cart/add', json={'product_id': product_id, 'quantity': 1, 'size': '42'}, headers=headers)
+        response = client.post('/api/orders', json={'shipping_address': 'Rua Teste, 1'}, headers=headers)
+        assert response.status_code == 201, response.get_json()
+
+def test_catalog_budgets(client):
+    """Listagem e detalhe de produtos dentro do orçamento"""
+    response = client.get('/api/products?per_page=48')
+    assert response.status_code == 200
+    assert len(response.get_json()['products']) == 48
+
+    response = client.get('/api/products?category=running&search=Or&min_price=50&per_page=48')
+    assert response.status_code == 200
+
+    product_id = response.get_json()['products'][0]['id']
+    assert client.get(f'/api/products/{product_id}').status_code == 200
+    assert client.get('/api/categories').status_code == 200
+
+def test_cart_and_order_budgets(client):
+    """Carrinho e pedidos dentro do orçamento"""
+    headers = {'Authorization': f'Bearer {get_token(client)}'}
+    product_ids = [p['id'] for p in client.get('/api/products?per_page=48').get_json()['products']]
+
+    fill_orders(client, headers, product_ids)
+
+    for product_id in product_ids[:20]:
+        client.post('/api/cart/add', json={'product_id': product_id, 'quantity': 1, 'size': '40'}, headers=headers)
+    response = client.get('/api/cart', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['count'] == 20
+
+    response = client.get('/api/orders', headers=headers)
+    assert response.status_code == 200
+    orders = response.get_json()['orders']
+    assert len(orders) == 10
+
+    assert client.get(f"/api/orders/{orders[0]['id']}", headers=headers).status_code == 200
+
+    # A serialização em lote deve produzir exatamente os mesmos bytes do lazy load
+    with app.test_request_context():
+        user = User.query.filter_by(email='orcamento@teste.com').first()
+        lazy_orders = Order.query.filter_by(user_id=user.id).order_by(Order.created_at.desc()).limit(10).all()
+        expected = jsonify({
+            'orders': [order.to_dict() for order in lazy_orders],
+            'total': 10,
+            'pages': 1,
+            'current_page': 1
+        }).get_data()
+    assert response.get_data() == expected
+
+def run_budget_tests():
+    """Executar as verificações de orçamento de consultas"""
+    print("=== VERIFICANDO ORÇAMENTO DE CONSULTAS ===\n")
+    seed_catalog()
+
+    client = app.test_client()
+    test_catalog_budgets(client)
+    print("✅ Catálogo OK!")
+    test_cart_and_order_budgets(client)
+    print("✅ Carrinho e pedidos OK!")
+
+    print("\n=== ORÇAMENTOS RESPEITADOS ===")
+
+if __name__ == '__main__':
+    run_budget_tests()
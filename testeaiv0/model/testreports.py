@@ -0,0 +1,114 @@
+import os
+
+# Banco SQLite em memória, isolado do MySQL de desenvolvimento
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import func
+from app import app, db, sales_rollup, sales_rollup_tables, Category, Order, OrderItem, Product
+from databaseutils import init_database, rebuild_sales
+
+app.config['TESTING'] = True
+app.config['QUERY_BUDGET_ENFORCE'] = True
+
+DAYS = [date(2026, 3, 1) + timedelta(days=i) for i in range(5)]
+LATER = datetime(2026, 12, 31)  # "agora" do job: todos os pedidos já assentados
+
+def money(value):
+    return Decimal(str(value)).quantize(Decimal('0.01'))
+
+def seed_orders(client):
+    """Três pedidos por dia, com produtos de categorias diferentes"""
+    response = client.post('/api/auth/register', json={'name': 'Cliente Relatório', 'email': 'relatorio@teste.com', 'password': '123456'})
+    headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+    products = client.get('/api/products').get_json()['products']
+
+    for day in DAYS:
+        for i in range(3):
+            product = products[(DAYS.index(day) + i) % len(products)]
+            size = str(38 + DAYS.index(day))  # cada tamanho recebe no máximo um pedido
+            client.post('/api/cart/add', json={'product_id': product['id'], 'quantity': i + 1, 'size': size}, headers=headers)
+            response = client.post('/api/orders', json={'shipping_address': 'Rua Teste, 1'}, headers=headers)
+            assert response.status_code == 201, response.get_json()
+            with app.app_context():
+                db.session.get(Order, response.get_json()['order']['id']).created_at = datetime.combine(day, datetime.min.time()) + timedelta(hours=i)
+                db.session.commit()
+
+def live_report(start=None, end=None):
+    """O mesmo relatório calculado direto de orders e order_items (o caminho que não escala)"""
+    with app.app_context():
+        orders = Order.query
+        items = db.session.query(Category.name, func.sum(OrderItem.price * OrderItem.quantity)).join(
+            Product, Product.id == OrderItem.product_id).join(Category).join(Order).group_by(Category.name)
+        if start:
+            orders = orders.filter(Order.created_at >= datetime.combine(start, datetime.min.time()))
+            items = items.filter(Order.created_at >= datetime.combine(start, datetime.min.time()))
+        if end:
+            orders = orders.filter(Order.created_at < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+            items = items.filter(Order.created_at < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+        total = sum((money(order.total_amount) for order in orders.all()), money(0))
+        return total, orders.count(), {name: money(value) for name, value in items.all()}
+
+def report(client, headers, **params):
+    response = client.get('/api/admin/reports/sales', query_string=params, headers=headers)
+    assert response.status_code == 200, response.get_json()
+    data = response.get_json()
+    categories = {row['category']: money(row['total']) for row in data['sales_by_category']}
+    return money(data['summary']['total_sales']), data['summary']['total_orders'], categories, data
+
+def run_job():
+    with app.app_context():
+        return sales_rollup.run(db.engine, *sales_rollup_tables(), now=LATER)
+
+def test_settle_window():
+    """Pedidos mais novos que o intervalo de assentamento ficam para a próxima rodada"""
+    with app.app_context():
+        now = datetime.combine(DAYS[2], datetime.min.time())
+        assert sales_rollup.run(db.engine, *sales_rollup_tables(), now=now) == 6
+
+def test_report_matches_history(client, headers):
+    """Rollups somados batem com o cálculo direto, no total e por período"""
+    assert run_job() == len(DAYS) * 3 - 6
+    assert run_job() == 0  # a marca d'água avançou: nada é somado duas vezes
+
+    total, count, categories, data = report(client, headers)
+    assert (total, count, categories) == live_report()
+    assert money(data['summary']['average_order_value']) == money(total / count)
+    assert data['as_of']['last_order_id'] > 0
+
+    start, end = DAYS[1], DAYS[3]
+    total, count, categories, data = report(client, headers, start=start.isoformat(), end=end.isoformat())
+    assert count == 9
+    assert (total, count, categories) == live_report(start, end)
+
+    assert client.get('/api/admin/reports/sales?start=01/03/2026', headers=headers).status_code == 400
+
+def test_rebuild(client, headers):
+    """Refazer do zero chega no mesmo resultado"""
+    before = report(client, headers)[:3]
+    assert rebuild_sales() == len(DAYS) * 3
+    assert report(client, headers)[:3] == before == live_report()
+
+def run_report_tests():
+    """Executar os testes do relatório de vendas"""
+    print("=== TESTANDO RELATÓRIO DE VENDAS ===\n")
+    init_database()
+    client = app.test_client()
+    seed_orders(client)
+    admin = client.post('/api/auth/login', json={'email': 'admin@sneakerhub.com', 'password': 'admin123'}).get_json()
+    headers = {'Authorization': f"Bearer {admin['access_token']}"}
+
+    test_settle_window()
+    print("✅ Janela de assentamento OK!")
+
+    test_report_matches_history(client, headers)
+    print("✅ Relatório a partir dos rollups OK!")
+
+    test_rebuild(client, headers)
+    print("✅ Rebuild dos rollups OK!")
+
+    print("\n=== TESTES DO RELATÓRIO CONCLUÍDOS ===")
+
+if __name__ == '__main__':
+    run_report_tests()
@@ -0,0 +1,164 @@
+import os
+
+# Banco SQLite em memória, isolado do MySQL de desenvolvimento
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+import threading
+from types import SimpleNamespace
+from datetime import datetime
+from app import app, db, Product, Category, catalog_cache, search_index
+from databaseutils import init_database
+from searchindex import SearchIndex
+
+app.config['TESTING'] = True
+
+def search(client, text):
+    response = client.get('/api/products', query_string={'search': text, 'per_page': 50})
+    assert response.status_code == 200, response.get_json()
+    return [product['name'] for product in response.get_json()['products']]
+
+def test_accents_and_prefix(client):
+    """Busca sem acento e por prefixo"""
+    assert len(search(client, 'tenis')) == 6          # "Tênis" nas descrições
+    assert search(client, 'revol') == ['Air Max Revolution']
+    assert search(client, 'NIKE') == ['Air Max Revolution']
+    assert 'Runner\'s Choice' in search(client, 'corr')  # categoria "Corrida"
+    assert search(client, 'inexistente') == []
+
+def test_ranking(client):
+    """Casar no nome vale mais que casar só na descrição"""
+    with app.app_context():
+        category = Category.query.filter_by(slug='casual').first()
+        db.session.add(Product(
+            name='Chinelo Basico', price=49.9, stock_quantity=10, category_id=category.id,
+            description='Não é um tênis urbano, mas combina com o estilo urban'
+        ))
+        db.session.commit()
+
+    results = search(client, 'urban')
+    assert results[0] == 'Urban Classic'
+    assert 'Chinelo Basico' in results
+
+def test_index_follows_writes(client):
+    """Produtos renomeados ou inativados refletem na próxima busca"""
+    with app.app_context():
+        product = Product.query.filter_by(name='Street Style').first()
+        product.name = 'Skate Board Pro'
+        db.session.commit()
+
+    assert search(client, 'skate') == ['Skate Board Pro']
+    assert 'Street Style' not in search(client, 'street')
+
+    with app.app_context():
+        Product.query.filter_by(name='Skate Board Pro').first().is_active = False
+        db.session.commit()
+
+    assert search(client, 'skate') == []
+
+def test_other_worker_writes(client):
+    """Escrita de outro worker (importação em massa) chega pela geração compartilhada do catálogo"""
+    search(client, 'air')  # índice em dia e gerações registradas
+    with app.app_context():
+        product = Product.query.filter_by(name='Urban Classic').first()
+        with db.engine.begin() as conn:
+            # Fora do ORM, como o upsert da importação: nenhum evento deste processo
+            conn.execute(Product.__table__.update().where(Product.__table__.c.id == product.id)
+                         .values(name='Metro Runner', updated_at=datetime.utcnow()))
+        product_id = product.id
+    assert search(client, 'metro') == []  # nada avisou ainda (refresh só no intervalo)
+
+    catalog_cache.invalidate_products([product_id])  # o que o outro worker grava no backend compartilhado
+    assert search(client, 'metro') == ['Metro Runner']
+
+def test_late_commit_and_delete(client):
+    """Escrita confirmada com updated_at antigo (flush antes de outras, commit depois) e exclusão chegam à busca"""
+    search(client, 'air')
+    with app.app_context():
+        category = Category.query.filter_by(slug='casual').first()
+        late = Product(name='Sandalia Tardia', price=59.9, stock_quantity=5, category_id=category.id,
+                       created_at=datetime(2000, 1, 1), updated_at=datetime(2000, 1, 1))
+        gone = Product(name='Bota Removida', price=99.9, stock_quantity=5, category_id=category.id)
+        db.session.add_all([late, gone])
+        db.session.commit()
+        late_id = late.id
+        # O onupdate sobrescreveria o valor: o horário antigo vai direto na linha, na mesma transação
+        db.session.execute(Product.__table__.update().where(Product.__table__.c.id == late_id)
+                           .values(updated_at=datetime(2000, 1, 1)))
+        db.session.commit()
+    assert search(client, 'sandalia') == ['Sandalia Tardia'] and search(client, 'bota') == ['Bota Removida']
+
+    with app.app_context():
+        product = db.session.get(Product, late_id)
+        product.name = 'Sandalia Renomeada'
+        db.session.flush()
+        db.session.execute(Product.__table__.update().where(Product.__table__.c.id == late_id)
+                           .values(updated_at=datetime(2000, 1, 1)))
+        db.session.delete(Product.query.filter_by(name='Bota Removida').first())
+        db.session.commit()
+
+    assert search(client, 'renomeada') == ['Sandalia Renomeada']
+    assert search(client, 'bota') == [] and search_index.search('bota') == ([], 0)
+
+def test_capped_total(client):
+    """Com mais acertos que max_results a resposta avisa que o total foi cortado"""
+    response = client.get('/api/products', query_string={'search': 'tenis'}).get_json()
+    assert response['total_capped'] is False and response['total'] == 6
+    search_index.max_results = 2
+    try:
+        response = client.get('/api/products', query_string={'search': 'tenis', 'per_page': 5}).get_json()
+    finally:
+        search_index.max_results = 1000
+    assert response['total_capped'] is True and response['total'] == 2
+
+def test_background_rebuild():
+    """Rebuild numa thread só, com as buscas servidas pelo índice anterior"""
+    def product(product_id, name):
+        return SimpleNamespace(id=product_id, name=name, brand=None, category=None, color=None,
+                               description=None, is_active=True, updated_at=None)
+
+    index = SearchIndex()
+    index.sync(lambda: [product(1, 'Tenis Azul')], lambda product_ids: [])
+    assert index.search('azul') == ([1], 1)
+
+    release, loads = threading.Event(), []
+    def slow_catalog():
+        loads.append(1)
+        release.wait(5)
+        return [product(1, 'Tenis Verde')]
+
+    index.needs_rebuild = True
+    for _ in range(3):
+        index.sync(slow_catalog, lambda product_ids: [])
+        assert index.search('azul') == ([1], 1)  # rebuild em andamento: índice anterior
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == 'search-index':
+            thread.join()
+    assert loads == [1]  # uma reconstrução, não uma por busca
+    assert index.search('azul') == ([], 0) and index.search('verde') == ([1], 1)
+
+def run_search_tests():
+    """Executar os testes da busca de produtos"""
+    print("=== TESTANDO BUSCA DE PRODUTOS ===\n")
+    init_database()
+    client = app.test_client()
+
+    test_accents_and_prefix(client)
+    print("✅ Acentos e prefixo OK!")
+    test_ranking(client)
+    print("✅ Relevância OK!")
+    test_index_follows_writes(client)
+    print("✅ Sincronização OK!")
+    test_other_worker_writes(client)
+    print("✅ Escritas de outros workers OK!")
+    test_late_commit_and_delete(client)
+    print("✅ Commit tardio e exclusão OK!")
+    test_capped_total(client)
+    print("✅ Total cortado sinalizado OK!")
+    test_background_rebuild()
+    print("✅ Rebuild em segundo plano OK!")
+
+    print("\n=== TESTES DE BUSCA CONCLUÍDOS ===")
+
+if __name__ == '__main__':
+    run_search_tests()
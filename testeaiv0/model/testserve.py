@@ -0,0 +1,81 @@
+import http.client
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from argparse import Namespace
+from urllib.parse import urlsplit
+
+from benchserve import HERE, ROOT, start_server
+
+DB_LATENCY = 100  # ms por consulta
+
+def timed_requests(base_url, requests):
+    """Disparar as requisições juntas; retorna [(status, segundos)] na ordem dada"""
+    url = urlsplit(base_url)
+    results = [None] * len(requests)
+    def send(index, method, path, body):
+        connection = http.client.HTTPConnection(url.hostname, url.port, timeout=30)
+        started = time.perf_counter()
+        connection.request(method, path, body=json.dumps(body) if body else None, headers={'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        response.read()
+        results[index] = (response.status, time.perf_counter() - started)
+    threads = [threading.Thread(target=send, args=(i, *request)) for i, request in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_slow_io_does_not_block(base_url):
+    """Consultas lentas de várias requisições esperam juntas, não uma atrás da outra"""
+    timed_requests(base_url, [('GET', '/api/categories', None)])  # aquece pool e tabelas
+    # Produtos diferentes: cada detalhe é uma consulta (fora do cache)
+    started = time.perf_counter()
+    results = timed_requests(base_url, [('GET', f'/api/products/{product_id}', None) for product_id in range(1, 7)])
+    elapsed = time.perf_counter() - started
+    assert all(status == 200 for status, seconds in results), results
+    # Em série seriam 6 x 100 ms; com I/O cooperativo fica perto de uma consulta só
+    assert elapsed < 6 * DB_LATENCY / 1000 / 2, elapsed
+
+def test_hashing_off_the_event_loop(base_url):
+    """O PBKDF2 roda em threads nativas: a API segue respondendo durante os logins"""
+    login = ('POST', '/api/auth/login', {'email': 'admin@sneakerhub.com', 'password': 'admin123'})
+    logins = []
+    background = threading.Thread(target=lambda: logins.extend(timed_requests(base_url, [login] * 4)))
+    background.start()
+    time.sleep(2 * DB_LATENCY / 1000)  # logins já passaram da consulta e estão no hash
+    health = timed_requests(base_url, [('GET', '/api/health', None)] * 4)
+    background.join()
+    assert all(status == 200 for status, seconds in logins + health), (logins, health)
+    slowest_login = max(seconds for status, seconds in logins)
+    assert max(seconds for status, seconds in health) < slowest_login / 4, (logins, health)
+
+def run_serve_tests():
+    """Executar os testes do modo gevent do serve.py"""
+    print("=== TESTANDO SERVIDOR GEVENT (serve.py) ===\n")
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(directory, 'serve.db')}",
+                   PYTHONPATH=os.pathsep.join([ROOT, HERE]))
+        subprocess.run([sys.executable, os.path.join(HERE, 'databaseutils.py')], env=env, cwd=HERE,
+                       check=True, stdout=subprocess.DEVNULL)
+        args = Namespace(threads=1, connections=100, db_latency=DB_LATENCY)
+        process, base_url = start_server('gevent', args, env)
+        try:
+            test_slow_io_does_not_block(base_url)
+            print("✅ I/O lento não bloqueia as outras requisições OK!")
+
+            test_hashing_off_the_event_loop(base_url)
+            print("✅ Hash de senha fora do loop de eventos OK!")
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+
+    print("\n=== TESTES DO SERVIDOR GEVENT CONCLUÍDOS ===")
+
+if __name__ == '__main__':
+    run_serve_tests()
@@ -0,0 +1,94 @@
+import os
+import tempfile
+import threading
+
+# Banco local em arquivo (várias conexões concorrentes); STRESS_DATABASE_URL aponta para um MySQL local
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'stress.db')
+os.environ['DATABASE_URL'] = os.getenv('STRESS_DATABASE_URL', f'sqlite:///{DB_PATH}')
+
+from flask_jwt_extended import create_access_token
+from werkzeug.security import generate_password_hash
+from app import app, db, User, Category, Product, CartItem, OrderItem
+from databaseutils import init_database
+
+app.config['TESTING'] = True
+
+STOCK = 20
+BUYERS = 60
+
+def seed(buyers=BUYERS, stock=STOCK):
+    """Um SKU com pouco estoque e muitos compradores com ele no carrinho"""
+    init_database()
+    with app.app_context():
+        category = Category.query.first()
+        product = Product(name='Edição Limitada', price=999.99, stock_quantity=stock, category_id=category.id)
+        db.session.add(product)
+        db.session.flush()
+
+        # Hash barato: o teste é do estoque, não do PBKDF2
+        password_hash = generate_password_hash('123456', method='pbkdf2:sha256:1000')
+        users = [User(name=f'Comprador {i}', email=f'comprador{i}@teste.com', password_hash=password_hash) for i in range(buyers)]
+        db.session.add_all(users)
+        db.session.flush()
+
+        db.session.add_all([CartItem(user_id=user.id, product_id=product.id, quantity=1, size='42') for user in users])
+        db.session.commit()
+
+        tokens = [create_access_token(identity=user.id) for user in users]
+        return product.id, tokens
+
+def checkout_storm(tokens):
+    """Todos os compradores fecham o pedido ao mesmo tempo"""
+    barrier = threading.Barrier(len(tokens))
+    results = [None] * len(tokens)
+
+    def checkout(index, token):
+        client = app.test_client()
+        barrier.wait()
+        response = client.post('/api/orders', json={'shipping_address': 'Rua Teste, 1'},
+                               headers={'Authorization': f'Bearer {token}'})
+        results[index] = (response.status_code, response.get_json())
+
+    threads = [threading.Thread(target=checkout, args=(i, token)) for i, token in enumerate(tokens)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_no_oversell():
+    """Nenhum pedido além do estoque, e todo pedido recusado diz qual item faltou"""
+    product_id, tokens = seed()
+    results = checkout_storm(tokens)
+
+    created = [body for status, body in results if status == 201]
+    rejected = [body for status, body in results if status == 400]
+    errors = [body for status, body in results if status not in (201, 400)]
+
+    with app.app_context():
+        stock = db.session.get(Product, product_id).stock_quantity
+        sold = db.session.query(db.func.coalesce(db.func.sum(OrderItem.quantity), 0)).filter_by(product_id=product_id).scalar()
+
+    print(f"Pedidos criados: {len(created)}, recusados: {len(rejected)}, erros: {len(errors)}")
+    print(f"Estoque final: {stock}, unidades vendidas: {sold}")
+
+    assert stock >= 0
+    assert sold == len(created) == STOCK - stock
+    assert len(created) <= STOCK
+    for body in rejected:
+        assert body['error'] == 'Estoque insuficiente'
+        assert body['items'][0]['product_id'] == product_id
+        assert body['items'][0]['requested'] == 1
+    assert not errors, errors[:3]
+    assert len(created) == STOCK
+
+def run_stock_tests():
+    """Executar o teste de estresse do estoque"""
+    print("=== TESTANDO CONCORRÊNCIA NO ESTOQUE ===\n")
+    print(f"Banco: {app.config['SQLALCHEMY_DATABASE_URI']}")
+    test_no_oversell()
+    print("✅ Sem venda além do estoque!")
+    print("\n=== TESTE DE ESTOQUE CONCLUÍDO ===")
+
+if __name__ == '__main__':
+    run_stock_tests()
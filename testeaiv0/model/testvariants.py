@@ -0,0 +1,126 @@
+import os
+
+# Banco SQLite em memória, isolado do MySQL de desenvolvimento
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from flask_jwt_extended import decode_token
+from sqlalchemy import text
+import app as app_module
+from app import app, db, Product, ProductVariant
+from databaseutils import init_database, migrate_product_variants, parse_sizes
+
+app.config['TESTING'] = True
+
+def get_headers(client):
+    response = client.post('/api/auth/register', json={
+        'name': 'Cliente Tamanhos',
+        'email': 'tamanhos@teste.com',
+        'password': '123456'
+    })
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+def variant_stock(product_id, size):
+    with app.app_context():
+        return ProductVariant.query.filter_by(product_id=product_id, size=size).one().stock_quantity
+
+def test_migration():
+    """Tamanhos do JSON viram linhas, com o estoque total preservado"""
+    assert parse_sizes('["40", "41", "40"]') == ['40', '41']
+    assert parse_sizes('38, 39') == ['38', '39']
+    assert parse_sizes(None) == []
+
+    with app.app_context():
+        for product in Product.query.all():
+            sizes = parse_sizes(product.size_available)
+            assert sorted(variant.size for variant in product.variants) == sorted(sizes)
+            assert sum(variant.stock_quantity for variant in product.variants) == product.stock_quantity
+        count = ProductVariant.query.count()
+
+    # Rodar de novo não duplica nada
+    migrate_product_variants()
+    with app.app_context():
+        assert ProductVariant.query.count() == count
+
+def test_size_filter(client):
+    """Filtro por tamanho com estoque, resolvido pelo índice"""
+    names = lambda size: sorted(p['name'] for p in client.get('/api/products', query_string={'size': size}).get_json()['products'])
+    assert names('35') == ['Street Style', 'Urban Classic']
+    assert len(names('40')) == 6
+    assert names('50') == []
+
+    with app.app_context():
+        street = Product.query.filter_by(name='Street Style').first()
+        ProductVariant.query.filter_by(product_id=street.id, size='35').one().stock_quantity = 0
+        db.session.commit()
+    assert names('35') == ['Urban Classic']
+
+    with app.app_context():
+        plan = db.session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT product_id FROM product_variants WHERE size = '40' AND stock_quantity > 0"
+        )).all()
+    assert any('ix_product_variants_size_stock' in row[-1] for row in plan), plan
+
+def test_cart_and_order(client, headers):
+    """Carrinho e pedido conferem e baixam o estoque do tamanho"""
+    with app.app_context():
+        product = Product.query.filter_by(name='Sport Pro Elite').first()
+        product_id, total = product.id, product.stock_quantity
+    stock = variant_stock(product_id, '45')
+
+    add = lambda size, quantity: client.post('/api/cart/add', json={'product_id': product_id, 'quantity': quantity, 'size': size}, headers=headers)
+    assert add(None, 1).get_json()['error'] == 'Tamanho obrigatório'
+    assert add('46', 1).get_json()['error'] == 'Tamanho indisponível'
+    assert add('45', stock + 1).get_json()['error'] == 'Estoque insuficiente'
+    assert add('45', stock).status_code == 201
+
+    item = client.get('/api/cart', headers=headers).get_json()['cart_items'][0]
+    assert client.put(f"/api/cart/update/{item['id']}", json={'quantity': stock + 1}, headers=headers).status_code == 400
+
+    # Outro comprador leva parte do tamanho antes do checkout
+    with app.app_context():
+        ProductVariant.query.filter_by(product_id=product_id, size='45').one().stock_quantity = 1
+        db.session.commit()
+    response = client.post('/api/orders', json={'shipping_address': 'Rua Teste, 1'}, headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()['items'][0]['available'] == 1
+    assert variant_stock(product_id, '45') == 1
+
+    with app.app_context():
+        ProductVariant.query.filter_by(product_id=product_id, size='45').one().stock_quantity = stock
+        db.session.commit()
+    response = client.post('/api/orders', json={'shipping_address': 'Rua Teste, 1'}, headers=headers)
+    assert response.status_code == 201, response.get_json()
+    assert variant_stock(product_id, '45') == 0
+    with app.app_context():
+        assert db.session.get(Product, product_id).stock_quantity == total - stock
+
+    # Linha sem tamanho gravada antes da migração: o pedido não baixa só o total do produto
+    with app.app_context():
+        user_id = decode_token(headers['Authorization'].split()[1])['sub']
+        app_module.cart_store.apply(user_id, adds=[(product_id, 1, None)])
+        db.session.commit()
+    response = client.post('/api/orders', json={'shipping_address': 'Rua Teste, 1'}, headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Tamanho obrigatório'
+    with app.app_context():
+        assert db.session.get(Product, product_id).stock_quantity == total - stock
+
+def run_variant_tests():
+    """Executar os testes do estoque por tamanho"""
+    print("=== TESTANDO ESTOQUE POR TAMANHO ===\n")
+    init_database()
+    client = app.test_client()
+
+    test_migration()
+    print("✅ Migração do size_available OK!")
+
+    test_size_filter(client)
+    print("✅ Filtro por tamanho OK!")
+
+    test_cart_and_order(client, get_headers(client))
+    print("✅ Carrinho e pedido por tamanho OK!")
+
+    print("\n=== TESTES DE TAMANHOS CONCLUÍDOS ===")
+
+if __name__ == '__main__':
+    run_variant_tests()
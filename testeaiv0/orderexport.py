@@ -0,0 +1,130 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, select
+
+ORDER_STATUSES = ('pending', 'confirmed', 'shipped', 'delivered', 'cancelled')
+FORMATS = ('csv', 'ndjson')
+
+# CSV: uma linha por item, com os dados do pedido repetidos (pedido sem itens sai com os campos do item vazios)
+ORDER_FIELDS = ('order_id', 'created_at', 'status', 'payment_method', 'payment_status', 'total_amount',
+                'user_id', 'customer_email', 'shipping_address', 'tracking_code')
+ITEM_FIELDS = ('item_id', 'product_id', 'sku', 'product_name', 'size', 'quantity', 'unit_price', 'line_total')
+FIELDS = ORDER_FIELDS + ITEM_FIELDS
+
+
+def parse_order_filters(start=None, end=None, status=None):
+    """Validar os filtros (datas YYYY-MM-DD inclusivas, status separados por vírgula); ValueError se inválidos"""
+    def day(value, name):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d')
+        except ValueError:
+            raise ValueError(f'{name} deve estar no formato YYYY-MM-DD')
+
+    filters = {'start': None, 'end': None, 'statuses': None}
+    if start:
+        filters['start'] = day(start, 'start')
+    if end:
+        # Fim inclusivo: tudo antes da meia-noite do dia seguinte
+        filters['end'] = day(end, 'end') + timedelta(days=1)
+    if filters['start'] and filters['end'] and filters['start'] >= filters['end']:
+        raise ValueError('start deve ser anterior ou igual a end')
+    if status:
+        statuses = [value.strip() for value in status.split(',') if value.strip()]
+        unknown = [value for value in statuses if value not in ORDER_STATUSES]
+        if unknown:
+            raise ValueError(f'status deve ser um de: {", ".join(ORDER_STATUSES)}')
+        filters['statuses'] = statuses
+    return filters
+
+
+def export_order_rows(engine, order_table, item_table, user_table, product_table, fmt='csv',
+                      start=None, end=None, statuses=None, chunk_size=1000):
+    """Gerar os pedidos com seus itens em pedaços de texto, por lotes de (created_at, id).
+
+    Cada lote é uma consulta curta com LIMIT retomando do último pedido lido,
+    então a memória fica no tamanho do lote e nenhuma transação longa segura
+    o banco, seja qual for o número de pedidos.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f'format deve ser um de: {", ".join(FORMATS)}')
+    orders, items, users, products = order_table, item_table, user_table, product_table
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDS, lineterminator='\n') if fmt == 'csv' else None
+
+    def flush():
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    if writer is not None:
+        writer.writeheader()
+        yield flush()
+
+    conditions = []
+    if start is not None:
+        conditions.append(orders.c.created_at >= start)
+    if end is not None:
+        conditions.append(orders.c.created_at < end)
+    if statuses:
+        conditions.append(orders.c.status.in_(statuses))
+
+    query = (
+        select(orders, users.c.email.label('customer_email'))
+        .join(users, users.c.id == orders.c.user_id)
+        .order_by(orders.c.created_at, orders.c.id)
+        .limit(chunk_size)
+    )
+    last = None
+    while True:
+        page = query.where(*conditions)
+        if last is not None:
+            page = page.where(or_(
+                orders.c.created_at > last.created_at,
+                and_(orders.c.created_at == last.created_at, orders.c.id > last.id)
+            ))
+        with engine.connect() as conn:
+            rows = conn.execute(page).all()
+            if not rows:
+                return
+            lines = {}
+            for item in conn.execute(
+                select(items, products.c.sku, products.c.name.label('product_name'))
+                .join(products, products.c.id == items.c.product_id)
+                .where(items.c.order_id.in_([row.id for row in rows]))
+                .order_by(items.c.order_id, items.c.id)
+            ).all():
+                lines.setdefault(item.order_id, []).append({
+                    'item_id': item.id,
+                    'product_id': item.product_id,
+                    'sku': item.sku,
+                    'product_name': item.product_name,
+                    'size': item.size,
+                    'quantity': item.quantity,
+                    'unit_price': str(item.price),
+                    'line_total': str(item.price * item.quantity),
+                })
+        last = rows[-1]
+
+        for row in rows:
+            record = {
+                'order_id': row.id,
+                'created_at': row.created_at.isoformat() if row.created_at else None,
+                'status': row.status,
+                'payment_method': row.payment_method,
+                'payment_status': row.payment_status,
+                'total_amount': str(row.total_amount),
+                'user_id': row.user_id,
+                'customer_email': row.customer_email,
+                'shipping_address': row.shipping_address,
+                'tracking_code': row.tracking_code,
+            }
+            if writer is None:
+                buffer.write(json.dumps(dict(record, items=lines.get(row.id, [])), ensure_ascii=False) + '\n')
+                continue
+            for line in lines.get(row.id) or [dict.fromkeys(ITEM_FIELDS)]:
+                writer.writerow(dict(record, **line))
+        yield flush()
@@ -0,0 +1,120 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+try:
+    from gevent import monkey
+    from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+except ImportError:  # dependência opcional: só no modo gevent do serve.py
+    monkey = None
+
+# Limites (em segundos) do histograma de latência por operação
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class HashingPoolSaturated(Exception):
+    """Fila de hashing cheia: o cliente deve tentar de novo depois de retry_after segundos"""
+
+    def __init__(self, retry_after):
+        super().__init__('Muitas requisições de autenticação, tente novamente em instantes')
+        self.retry_after = retry_after
+
+
+def hashing_executor(workers):
+    """Pool de threads do sistema para o hash, mesmo com o gevent ativo.
+
+    Com o threading do monkey patch as threads do ThreadPoolExecutor viram
+    greenlets, e um PBKDF2 de centenas de ms travaria o loop de eventos
+    inteiro; o pool do gevent usa threads nativas e espera sem bloquear.
+    """
+    if monkey is not None and monkey.is_module_patched('threading'):
+        return NativeThreadPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+
+
+class PasswordHasher:
+    """Hash e verificação de senhas num pool limitado de threads.
+
+    O PBKDF2/scrypt do hashlib libera o GIL, então o pool limita quantos
+    hashes rodam ao mesmo tempo sem travar as outras requisições; acima de
+    workers + max_queue pedidos pendentes, novas chamadas são recusadas.
+    """
+
+    def __init__(self, method='pbkdf2:sha256:600000', workers=4, max_queue=32, retry_after=1):
+        self.method = method
+        self.workers = workers
+        self.max_queue = max_queue
+        self.retry_after = retry_after
+        self.rejected = 0
+        self._executor = hashing_executor(workers)
+        self._slots = threading.BoundedSemaphore(workers + max_queue)
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._prefix = None
+        self._latency = {
+            operation: {'count': 0, 'total_seconds': 0.0, 'max_seconds': 0.0, 'buckets': [0] * (len(LATENCY_BUCKETS) + 1)}
+            for operation in ('hash', 'verify')
+        }
+
+    def _record(self, operation, seconds):
+        with self._lock:
+            stats = self._latency[operation]
+            stats['count'] += 1
+            stats['total_seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+            bucket = next((i for i, limit in enumerate(LATENCY_BUCKETS) if seconds <= limit), len(LATENCY_BUCKETS))
+            stats['buckets'][bucket] += 1
+
+    def _run(self, operation, function, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise HashingPoolSaturated(self.retry_after)
+
+        with self._lock:
+            self._in_flight += 1
+
+        def timed():
+            started = time.perf_counter()
+            try:
+                return function(*args)
+            finally:
+                self._record(operation, time.perf_counter() - started)
+
+        try:
+            return self._executor.submit(timed).result()
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run('hash', generate_password_hash, password, self.method)
+
+    def verify(self, password_hash, password):
+        return self._run('verify', check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """O hash foi gerado com outro algoritmo ou custo que o configurado?"""
+        if self._prefix is None:
+            # Expande apelidos ("pbkdf2" -> "pbkdf2:sha256:600000") uma única vez
+            self._prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        return password_hash.split('$', 1)[0] != self._prefix
+
+    def stats(self):
+        with self._lock:
+            return {
+                'method': self.method,
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'in_flight': self._in_flight,
+                'queued': max(self._in_flight - self.workers, 0),
+                'rejected': self.rejected,
+                'latency_buckets': list(LATENCY_BUCKETS),
+                'operations': {
+                    operation: dict(stats, buckets=list(stats['buckets']))
+                    for operation, stats in self._latency.items()
+                }
+            }
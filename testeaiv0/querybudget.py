@@ -0,0 +1,63 @@
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app
+from sqlalchemy import event
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Endpoint executou mais consultas SQL do que o orçamento declarado"""
+
+
+class QueryCounter:
+    """Conta as consultas SQL executadas pela thread atual"""
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+        self._thread_id = threading.get_ident()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if threading.get_ident() == self._thread_id:
+            self.count += 1
+            self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(engine):
+    """Contar as consultas executadas no engine dentro do bloco"""
+    counter = QueryCounter()
+    event.listen(engine, 'before_cursor_execute', counter._before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter._before_cursor_execute)
+
+
+def query_budget(limit):
+    """Declarar o número máximo de consultas SQL de um endpoint.
+
+    Só é verificado quando QUERY_BUDGET_ENFORCE está ativo (testes), para
+    que um novo acesso lazy a um relacionamento não passe despercebido.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not current_app.config.get('QUERY_BUDGET_ENFORCE'):
+                return view(*args, **kwargs)
+
+            engine = current_app.extensions['sqlalchemy'].engine
+            with count_queries(engine) as counter:
+                response = view(*args, **kwargs)
+
+            if counter.count > limit:
+                raise QueryBudgetExceeded(
+                    f'{view.__name__} executou {counter.count} consultas '
+                    f'(orçamento: {limit}):\n' + '\n'.join(counter.statements)
+                )
+            return response
+
+        wrapper.query_budget = limit
+        return wrapper
+    return decorator
@@ -0,0 +1,150 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from dashboard import money, upsert_add
+
+
+class SalesRollup:
+    """Vendas agregadas por dia e por (dia, categoria), preenchidas a partir de uma marca d'água.
+
+    O job lê só os pedidos com id acima da marca e criados há mais de
+    settle_seconds (um pedido de id menor ainda em transação não é pulado),
+    soma nas tabelas de rollup e avança a marca na mesma transação. Os
+    relatórios somam poucas linhas por dia, seja qual for o volume de pedidos.
+    """
+
+    name = 'sales_rollup'
+
+    def __init__(self, daily_table, category_table, watermark_table, settle_seconds=60, batch_size=1000):
+        self.daily = daily_table
+        self.by_category = category_table
+        self.watermarks = watermark_table
+        self.settle_seconds = settle_seconds
+        self.batch_size = batch_size
+
+    def watermark(self, conn, lock=False):
+        query = select(self.watermarks.c.last_id).where(self.watermarks.c.name == self.name)
+        if lock:
+            # Dois jobs ao mesmo tempo: o segundo espera e relê a marca já avançada
+            query = query.with_for_update()
+        last_id = conn.execute(query).scalar()
+        if last_id is None:
+            conn.execute(self.watermarks.insert().values(name=self.name, last_id=0, updated_at=datetime.utcnow()))
+            return 0
+        return last_id
+
+    def status(self, conn):
+        row = conn.execute(select(self.watermarks).where(self.watermarks.c.name == self.name)).first()
+        return {
+            'last_order_id': row.last_id if row else 0,
+            'updated_at': row.updated_at if row else None
+        }
+
+    def run_batch(self, conn, order_table, item_table, product_table, now=None):
+        """Agregar um lote de pedidos novos; retorna quantos pedidos entraram"""
+        last_id = self.watermark(conn, lock=True)
+        settled = (now or datetime.utcnow()) - timedelta(seconds=self.settle_seconds)
+
+        orders = conn.execute(
+            select(order_table.c.id, order_table.c.total_amount, order_table.c.created_at)
+            .where(order_table.c.id > last_id, order_table.c.created_at <= settled)
+            .order_by(order_table.c.id)
+            .limit(self.batch_size)
+        ).all()
+        if not orders:
+            return 0
+
+        # Parar antes do primeiro pedido ainda não assentado mantém a marca contínua
+        pending = conn.execute(
+            select(func.min(order_table.c.id))
+            .where(order_table.c.id > last_id, order_table.c.id < orders[-1].id, order_table.c.created_at > settled)
+        ).scalar()
+        if pending is not None:
+            orders = [order for order in orders if order.id < pending]
+            if not orders:
+                return 0
+
+        days = {order.id: order.created_at.date() for order in orders}
+        daily = {}
+        for order in orders:
+            count, total = daily.get(days[order.id], (0, money(0)))
+            daily[days[order.id]] = (count + 1, total + money(order.total_amount))
+
+        items = conn.execute(
+            select(item_table.c.order_id, item_table.c.quantity, item_table.c.price, product_table.c.category_id)
+            .join(product_table, product_table.c.id == item_table.c.product_id)
+            .where(item_table.c.order_id.in_(list(days)))
+        ).all()
+        by_category = {}
+        for item in items:
+            key = (days[item.order_id], item.category_id)
+            units, total = by_category.get(key, (0, money(0)))
+            by_category[key] = (units + item.quantity, total + money(item.price) * item.quantity)
+
+        for day, (count, total) in sorted(daily.items()):
+            upsert_add(conn, self.daily, {'day': day}, {'order_count': count, 'total': total})
+        for (day, category_id), (units, total) in sorted(by_category.items()):
+            upsert_add(conn, self.by_category, {'day': day, 'category_id': category_id}, {'units': units, 'total': total})
+
+        conn.execute(
+            self.watermarks.update()
+            .where(self.watermarks.c.name == self.name)
+            .values(last_id=orders[-1].id, updated_at=datetime.utcnow())
+        )
+        return len(orders)
+
+    def run(self, engine, *tables, now=None):
+        """Processar todos os lotes pendentes (uma transação por lote); retorna o total de pedidos"""
+        processed = 0
+        while True:
+            with engine.begin() as conn:
+                count = self.run_batch(conn, *tables, now=now)
+            processed += count
+            if count < self.batch_size:
+                return processed
+
+    def rebuild(self, engine, *tables, now=None):
+        """Apagar os rollups e a marca d'água e agregar o histórico inteiro de novo"""
+        with engine.begin() as conn:
+            conn.execute(self.daily.delete())
+            conn.execute(self.by_category.delete())
+            conn.execute(self.watermarks.delete().where(self.watermarks.c.name == self.name))
+        return self.run(engine, *tables, now=now)
+
+    def report(self, conn, category_table, start=None, end=None):
+        """Resumo e vendas por categoria entre start e end (datas, inclusive)"""
+
+        def in_range(table, query):
+            if start is not None:
+                query = query.where(table.c.day >= start)
+            if end is not None:
+                query = query.where(table.c.day <= end)
+            return query
+
+        order_count, total = conn.execute(
+            in_range(self.daily, select(func.sum(self.daily.c.order_count), func.sum(self.daily.c.total)))
+        ).one()
+        order_count, total = int(order_count or 0), money(total)
+
+        rows = conn.execute(
+            in_range(self.by_category, select(
+                category_table.c.id, category_table.c.name,
+                func.sum(self.by_category.c.units).label('units'),
+                func.sum(self.by_category.c.total).label('total')
+            ).join(category_table, category_table.c.id == self.by_category.c.category_id))
+            .group_by(category_table.c.id, category_table.c.name)
+            .order_by(func.sum(self.by_category.c.total).desc())
+        ).all()
+
+        return {
+            'summary': {
+                'total_sales': total,
+                'total_orders': order_count,
+                'average_order_value': money(total / order_count) if order_count else money(0)
+            },
+            'sales_by_category': [
+                {'category_id': row.id, 'category': row.name, 'units': int(row.units), 'total': money(row.total)}
+                for row in rows
+            ]
+        }
@@ -0,0 +1,234 @@
+import logging
+import math
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+# Peso de cada campo na relevância
+FIELD_WEIGHTS = {
+    'name': 3.0,
+    'brand': 2.0,
+    'category': 2.0,
+    'color': 1.5,
+    'description': 1.0
+}
+
+# Palavras muito comuns que só poluiriam o índice
+STOPWORDS = {
+    'a', 'as', 'o', 'os', 'e', 'de', 'da', 'das', 'do', 'dos', 'em', 'na', 'no',
+    'para', 'por', 'com', 'um', 'uma', 'que', 'se', 'ao', 'the'
+}
+
+# Um termo que só casa por prefixo vale menos que o termo exato
+PREFIX_PENALTY = 0.5
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(text):
+    """Minúsculas e sem acentos ("Tênis" -> "tenis")"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall(normalize(text)) if token not in STOPWORDS]
+
+
+class SearchIndex:
+    """Índice invertido em memória dos produtos ativos.
+
+    Cada documento é indexado pelos campos de FIELD_WEIGHTS; a busca exige
+    todos os termos (o último também casa por prefixo, para busca enquanto
+    se digita) e ordena por TF-IDF ponderado pelo campo. sync() mantém o
+    índice em dia: uma sincronização por vez, e as reconstruções completas
+    rodam em segundo plano enquanto as buscas usam o índice anterior.
+    """
+
+    def __init__(self, rebuild_interval=600, max_results=1000, clock=time.monotonic):
+        self.rebuild_interval = rebuild_interval
+        self.max_results = max_results
+        self.clock = clock
+        self.needs_rebuild = True
+        self._pending = set()       # produtos alterados ainda não reindexados
+        self._last_rebuild = None
+        self._generations = None    # gerações do catálogo vistas na última sincronização
+        self._postings = defaultdict(dict)  # termo -> {product_id: peso}
+        self._documents = {}                # product_id -> termos do documento
+        self._terms = []                    # termos ordenados, para busca por prefixo
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()  # uma sincronização (rebuild ou update) por vez
+
+    @staticmethod
+    def document(product):
+        """Campos indexáveis de um produto"""
+        return {
+            'name': product.name,
+            'brand': product.brand,
+            'category': product.category.name if product.category else None,
+            'color': product.color,
+            'description': product.description
+        }
+
+    def _remove(self, product_id):
+        for term in self._documents.pop(product_id, ()):
+            postings = self._postings[term]
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[term]
+
+    def _index(self, product, postings, documents):
+        weights = defaultdict(float)
+        for field, text in self.document(product).items():
+            for token in tokenize(text):
+                weights[token] += FIELD_WEIGHTS[field]
+
+        for term, weight in weights.items():
+            # Saturação da frequência: repetir a palavra na descrição não domina o nome
+            postings[term][product.id] = 1 + math.log(weight)
+        documents[product.id] = set(weights)
+
+    def rebuild(self, products):
+        """Reindexar todo o catálogo (products pode ser lido em lotes: é percorrido uma vez)"""
+        # Escritas marcadas durante a leitura continuam marcadas para a próxima sincronização
+        self.needs_rebuild = False
+        with self._lock:
+            self._pending.clear()
+        postings, documents = defaultdict(dict), {}
+        try:
+            # Monta um índice novo fora da trava: as buscas seguem no anterior até a troca
+            for product in products:
+                if product.is_active:
+                    self._index(product, postings, documents)
+        except Exception:
+            self.needs_rebuild = True
+            raise
+        terms = sorted(postings)
+        with self._lock:
+            self._postings, self._documents, self._terms = postings, documents, terms
+            self._last_rebuild = self.clock()
+
+    def update(self, product_ids, products):
+        """Reindexar os produtos alterados; os ids sem linha em products (excluídos) saem do índice"""
+        with self._lock:
+            for product_id in product_ids:
+                self._remove(product_id)
+            for product in products:
+                if product.is_active:
+                    self._index(product, self._postings, self._documents)
+            self._terms = sorted(self._postings)
+
+    def sync(self, load_all, load_products, generations=None, changes=None):
+        """Deixar o índice em dia antes de uma busca.
+
+        load_all() devolve todos os produtos e load_products(ids) os produtos
+        ainda existentes entre os ids. generations() devolve as gerações
+        (produtos, categorias) do cache do catálogo e changes(desde, até) os
+        ids invalidados entre duas gerações de produtos, ou None se o registro
+        já expirou. Com o cache compartilhado, escritas de qualquer worker
+        aparecem já na próxima busca; com o local, as de outros workers só na
+        reconstrução periódica. Só o primeiro build roda na requisição (ainda
+        não há índice para servir); os rebuilds seguintes vão para uma thread
+        e quem chega enquanto outra sincronização roda não espera por ela.
+        """
+        if generations is not None:
+            self._follow(generations(), changes)
+        if self._last_rebuild is None:
+            with self._sync_lock:
+                if self._last_rebuild is None:
+                    self.rebuild(load_all())
+            return
+        if not (self.due_for_rebuild() or self._pending) or not self._sync_lock.acquire(blocking=False):
+            return
+        if self.due_for_rebuild():
+            threading.Thread(target=self._rebuild_in_background, args=(load_all,), name='search-index', daemon=True).start()
+            return
+        with self._lock:
+            product_ids, self._pending = self._pending, set()
+        try:
+            self.update(product_ids, load_products(product_ids))
+        except Exception:
+            with self._lock:
+                self._pending |= product_ids
+            raise
+        finally:
+            self._sync_lock.release()
+
+    def _follow(self, current, changes):
+        with self._lock:
+            previous, self._generations = self._generations, current
+        if previous is None or previous == current:
+            return
+        if previous[1] != current[1]:
+            self.needs_rebuild = True  # categoria renomeada muda documentos sem tocar nos produtos
+            return
+        product_ids = changes(previous[0], current[0]) if changes is not None else None
+        if product_ids is None:
+            self.needs_rebuild = True  # não se sabe quais produtos mudaram
+            return
+        with self._lock:
+            self._pending.update(product_ids)
+
+    def _rebuild_in_background(self, load_all):
+        try:
+            self.rebuild(load_all())
+        except Exception:
+            logger.exception('Falha ao reconstruir o índice de busca; o índice anterior segue em uso')
+        finally:
+            self._sync_lock.release()
+
+    def due_for_rebuild(self):
+        """Reconstrução periódica: pega exclusões e renomeações de categoria de outros workers"""
+        if self.needs_rebuild or self._last_rebuild is None:
+            return True
+        return self.clock() - self._last_rebuild >= self.rebuild_interval
+
+    def _expand(self, token, prefix):
+        if not prefix:
+            return [(token, 1.0)] if token in self._postings else []
+
+        expanded = []
+        position = bisect_left(self._terms, token)
+        while position < len(self._terms) and self._terms[position].startswith(token):
+            term = self._terms[position]
+            expanded.append((term, 1.0 if term == token else PREFIX_PENALTY))
+            position += 1
+        return expanded
+
+    def search(self, text):
+        """(IDs dos produtos que casam com todos os termos, do mais relevante ao menos; total de acertos).
+
+        A lista para em max_results; o total conta todos os acertos, para a
+        resposta avisar quando ficou cortada.
+        """
+        # A última palavra ainda está sendo digitada: não é descartada como stopword
+        words = TOKEN_RE.findall(normalize(text))
+        tokens = [word for word in words[:-1] if word not in STOPWORDS] + words[-1:]
+        if not tokens:
+            return [], 0
+
+        with self._lock:
+            total = max(len(self._documents), 1)
+            scores = None
+            for position, token in enumerate(tokens):
+                term_scores = defaultdict(float)
+                for term, factor in self._expand(token, prefix=position == len(tokens) - 1):
+                    postings = self._postings[term]
+                    idf = math.log(1 + total / len(postings))
+                    for product_id, weight in postings.items():
+                        term_scores[product_id] = max(term_scores[product_id], factor * weight * idf)
+
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {pid: score + term_scores[pid] for pid, score in scores.items() if pid in term_scores}
+                if not scores:
+                    return [], 0
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [product_id for product_id, _ in ranked[:self.max_results]], len(ranked)
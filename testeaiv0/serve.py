@@ -0,0 +1,98 @@
+import argparse
+import os
+
+# Sem logging/threading aqui em cima: no modo gevent o monkey patch vem antes deles
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Servidor da API: threads (WSGI) ou gevent (I/O cooperativo)')
+    parser.add_argument('--mode', choices=('threaded', 'gevent'), default=os.getenv('SERVE_MODE', 'threaded'))
+    parser.add_argument('--host', default=os.getenv('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', 5000)))
+    parser.add_argument('--threads', type=int, default=int(os.getenv('SERVE_THREADS', 8)),
+                        help='threads de requisição no modo threaded')
+    parser.add_argument('--connections', type=int, default=int(os.getenv('SERVE_CONNECTIONS', 1000)),
+                        help='conexões simultâneas (greenlets) no modo gevent')
+    parser.add_argument('--db-latency', type=float, default=0,
+                        help='ms somados a cada consulta, simulando um banco remoto (benchmark com SQLite)')
+    return parser.parse_args(argv)
+
+
+def simulate_db_latency(milliseconds):
+    """Atraso antes de cada consulta, como a ida e volta de rede até um MySQL remoto.
+
+    No SQLite o atraso só entra fora de transações de escrita: dentro
+    delas o arquivo fica travado, e segurar o lock dormindo serializaria
+    todas as escritas (e, no gevent, a espera do lock nem é cooperativa).
+    """
+    import time
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def delay(conn, cursor, statement, parameters, context, executemany):
+        if not getattr(cursor.connection, 'in_transaction', False):
+            time.sleep(milliseconds / 1000)
+
+
+def serve_threaded(app, host, port, threads):
+    """WSGI com um número fixo de threads por processo (como o gthread do gunicorn)"""
+    import logging
+    from concurrent.futures import ThreadPoolExecutor
+    from werkzeug.serving import BaseWSGIServer
+
+    class PooledWSGIServer(BaseWSGIServer):
+        executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='request')
+
+        def process_request(self, request, client_address):
+            self.executor.submit(self._handle, request, client_address)
+
+        def _handle(self, request, client_address):
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    server = PooledWSGIServer(host, port, app)
+    logging.getLogger('serve').info('Modo threaded em %s:%s com %s threads', host, server.server_port, threads)
+    server.serve_forever()
+
+
+def serve_gevent(app, host, port, connections):
+    """WSGI do gevent: uma greenlet por conexão, I/O do PyMySQL/Redis/SMTP cooperativo"""
+    import logging
+    from gevent.pool import Pool
+    from gevent.pywsgi import WSGIServer
+
+    logger = logging.getLogger('serve')
+    server = WSGIServer((host, port), app, spawn=Pool(connections), log=None, error_log=logger)
+    logger.info('Modo gevent em %s:%s com até %s conexões', host, port, connections)
+    server.serve_forever()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.mode == 'gevent':
+        # Antes de qualquer import que use socket/threading (app, SQLAlchemy, PyMySQL)
+        from gevent import monkey
+        monkey.patch_all()
+
+    import logging
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # sem uma linha de log por requisição
+    if args.db_latency:
+        simulate_db_latency(args.db_latency)
+
+    from app import app
+
+    if args.mode == 'gevent':
+        serve_gevent(app, args.host, args.port, args.connections)
+    else:
+        serve_threaded(app, args.host, args.port, args.threads)
+
+
+if __name__ == '__main__':
+    # python serve.py [--mode threaded|gevent] [--port 5000] [--threads 8] [--connections 1000]
+    main()
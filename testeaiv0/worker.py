@@ -0,0 +1,59 @@
+import argparse
+import logging
+import signal
+import time
+
+from app import app, db, job_queue, PERIODIC_JOBS
+from jobqueue import default_worker_id
+
+logger = logging.getLogger('worker')
+
+
+def schedule_periodic(last_run):
+    """Enfileirar os jobs periódicos vencidos; dedupe_key evita duplicar entre vários workers"""
+    now = time.monotonic()
+    due = [name for name, interval in PERIODIC_JOBS.items() if now - last_run.get(name, float('-inf')) >= interval]
+    if not due:
+        return
+    with db.engine.begin() as conn:
+        for name in due:
+            job_queue.enqueue(conn, name, dedupe_key=name)
+    for name in due:
+        last_run[name] = now
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Worker da fila de jobs')
+    parser.add_argument('--once', action='store_true', help='executar os jobs prontos e sair')
+    parser.add_argument('--batch', type=int, default=10, help='jobs reservados por vez')
+    parser.add_argument('--poll', type=float, default=1.0, help='espera (s) quando a fila está vazia')
+    parser.add_argument('--no-periodic', action='store_true', help='não agendar os jobs periódicos')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    worker_id = default_worker_id()
+
+    with app.app_context():
+        if args.once:
+            counts = job_queue.run_pending(db.engine, worker_id)
+            logger.info('Jobs executados: %s', counts)
+            return
+
+        # SIGTERM/SIGINT terminam o job em andamento antes de sair
+        stopping = []
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, lambda signum, frame: stopping.append(signum))
+
+        last_run = {}
+        logger.info('Worker %s iniciado', worker_id)
+        job_queue.work(
+            db.engine, worker_id, batch=args.batch, poll_interval=args.poll,
+            stop=lambda: bool(stopping),
+            tick=None if args.no_periodic else lambda: schedule_periodic(last_run)
+        )
+        logger.info('Worker %s encerrado', worker_id)
+
+
+if __name__ == '__main__':
+    # python worker.py [--once] [--batch N] [--poll segundos] [--no-periodic]
+    main()